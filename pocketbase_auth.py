@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+PocketBase管理员令牌管理 - 解析JWT过期时间、后台提前续期、并发刷新合并
+"""
+
+import base64
+import json
+import threading
+import time
+
+
+def decode_jwt_expiry(token):
+    """
+    返回JWT载荷中的 exp（Unix秒）；无法解析时返回 None，不校验签名
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload.encode("ascii"))).get("exp")
+        return float(exp) if exp is not None else None
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+
+
+class TokenManager:
+    """
+    持有当前管理员令牌并在过期前续期
+
+    - 后台线程在 exp - refresh_margin 时调用 auth-refresh，失败时退回密码登录，
+      并按指数退避重试
+    - 多个线程同时发现令牌失效时只有一个线程请求上游，其余线程等待其结果
+    - refresh(stale_token) 只在当前令牌仍是 stale_token 时刷新，
+      因此一批同时收到401的请求只会触发一次刷新
+    """
+
+    def __init__(self, pb_client, refresh_margin=300.0, min_backoff=1.0, max_backoff=60.0,
+                 clock=time.time):
+        self.pb_client = pb_client
+        self.refresh_margin = refresh_margin
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.token = None
+        self.expires_at = None
+        self.lifetime = None
+        self.last_error = None
+        self._cond = threading.Condition()
+        self._refreshing = False
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {"logins": 0, "refreshes": 0, "failures": 0, "coalesced": 0}
+
+    def _count(self, name):
+        # 登录/续期可能同时发生在后台线程与请求线程中
+        with self._cond:
+            self.stats[name] += 1
+
+    def _login(self):
+        response = self.pb_client.http.post(
+            f"{self.pb_client.pocketbase_url}/api/admins/auth-with-password",
+            json={"identity": self.pb_client.admin_email, "password": self.pb_client.admin_password}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        self._count("logins")
+        return response.json()["token"]
+
+    def _refresh_upstream(self, token):
+        if token is not None:
+            response = self.pb_client.http.post(
+                f"{self.pb_client.pocketbase_url}/api/admins/auth-refresh",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code == 200:
+                self._count("refreshes")
+                return response.json()["token"]
+        # 令牌已失效或服务器不支持续期时重新登录
+        return self._login()
+
+    def _set(self, token):
+        self.token = token
+        self.expires_at = decode_jwt_expiry(token)
+        self.lifetime = None if self.expires_at is None else self.expires_at - self.clock()
+        self._wakeup.set()
+
+    def login(self):
+        """
+        用密码登录获取新令牌，失败时抛出异常
+        """
+        token = self._login()
+        with self._cond:
+            self._set(token)
+            self.last_error = None
+        return token
+
+    def refresh(self, stale_token=None):
+        """
+        刷新令牌并返回当前令牌；已有刷新进行中时等待其结果而不是再请求一次
+        """
+        with self._cond:
+            if stale_token is not None and self.token != stale_token:
+                return self.token
+            if self._refreshing:
+                self.stats["coalesced"] += 1
+                while self._refreshing:
+                    self._cond.wait()
+                return self.token
+            self._refreshing = True
+            current = self.token
+        token = None
+        try:
+            token = self._refresh_upstream(current)
+        except Exception as e:
+            self._count("failures")
+            self.last_error = str(e)
+            print(f"❌ PocketBase令牌刷新失败: {str(e)}")
+        finally:
+            with self._cond:
+                if token is not None:
+                    self._set(token)
+                    self.last_error = None
+                self._refreshing = False
+                self._cond.notify_all()
+        return self.token
+
+    def expires_in(self):
+        if self.expires_at is None:
+            return None
+        return self.expires_at - self.clock()
+
+    def get_token(self):
+        """
+        返回可用的令牌；已过期(或即将在数秒内过期)时同步刷新
+        """
+        token = self.token
+        remaining = self.expires_in()
+        if token is not None and remaining is not None and remaining < 5:
+            token = self.refresh(token)
+        return token
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pb-token", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            remaining = self.expires_in()
+            if self.token is None or remaining is None:
+                # 尚未登录，或令牌里没有 exp：等待登录后再计算
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            # 有效期短于两倍提前量的令牌在有效期过半时续期，避免刚拿到就再次刷新
+            margin = min(self.refresh_margin, self.lifetime / 2)
+            delay = remaining - margin
+            if delay > 0:
+                self._wakeup.clear()
+                self._wakeup.wait(delay)
+                continue
+            before = self.token
+            if self.refresh(before) == before:
+                self._stop.wait(backoff)
+                backoff = min(self.max_backoff, backoff * 2)
+            else:
+                backoff = self.min_backoff
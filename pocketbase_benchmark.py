@@ -0,0 +1,1680 @@
+#!/usr/bin/env python3
+"""
+赛博朋克AI工具聚合网站 - 性能基准测试
+
+内置一个本地PocketBase替身(fake-pocketbase)，无需真实PocketBase即可压测
+run_pocketbase_server 的各个并发模式。
+
+用法:
+    python pocketbase_benchmark.py load --modes single,pool --concurrency 1,16,128
+    python pocketbase_benchmark.py export --sizes 10000,100000
+    python pocketbase_benchmark.py search --catalog-size 10000
+    python pocketbase_benchmark.py compression --catalog-size 1000
+    python pocketbase_benchmark.py import --records 10000 --latency-ms 2
+    python pocketbase_benchmark.py startup --runs 10 --latency-ms 200
+    python pocketbase_benchmark.py snapshot --sizes 10000,100000
+    python pocketbase_benchmark.py memory --sizes 10000,100000,1000000
+    python pocketbase_benchmark.py coalesce --burst 200 --latency-ms 50
+    python pocketbase_benchmark.py typeahead --sessions 200
+    python pocketbase_benchmark.py pageweight
+    python pocketbase_benchmark.py router --routes 8,100,1000
+    python pocketbase_benchmark.py metrics --repeat 100000
+    python pocketbase_benchmark.py scaling --processes 1,2,4
+    python pocketbase_benchmark.py resilience --duration 5
+    python pocketbase_benchmark.py ratelimit --repeat 200000
+    python pocketbase_benchmark.py pagination --sizes 10000,100000
+    python pocketbase_benchmark.py suite --concurrency 1,16,64 --output results.json
+    python pocketbase_benchmark.py suite --compare results.json --output results-new.json
+    python pocketbase_benchmark.py fake-pocketbase --port 8090 --latency-ms 20 --error-rate 0.05
+"""
+
+import argparse
+import base64
+import http.client
+import http.server
+import json
+import os
+import platform
+import queue
+import random
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from urllib.parse import urlparse, parse_qs
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CATEGORIES = ["text_generation", "image_generation", "coding", "audio", "video"]
+
+
+def make_tool(index):
+    """
+    生成一条合成的 ai_tools 记录
+    """
+    category = CATEGORIES[index % len(CATEGORIES)]
+    # 每条记录的 updated 各不相同，便于演练按水位增量同步
+    updated = time.strftime("%Y-%m-%d %H:%M:%S.000Z", time.gmtime(1704067200 + index))
+    return {
+        "id": f"tool{index:011d}",
+        "collectionId": "pbc_ai_tools0001",
+        "collectionName": "ai_tools",
+        "created": "2024-01-01 00:00:00.000Z",
+        "updated": updated,
+        "name": f"Tool {index}",
+        "description": f"第{index}个合成AI工具，用于 {category} 场景的基准测试。",
+        "url": f"https://example.com/tools/{index}",
+        "category": category,
+        "rating": round(3 + (index % 20) / 10, 1),
+        "is_free": index % 2 == 0,
+        "is_featured": index % 7 == 0,
+        "language_support": "zh,en",
+        "tags": f"{category},bench,tag{index % 50}"
+    }
+
+
+class FakePocketBase:
+    """
+    本地PocketBase替身，只实现本项目用到的接口
+    """
+
+    def __init__(self, catalog_size=100, latency_ms=0.0, batch_api=True, token_ttl=3600.0, error_rate=0.0):
+        self.latency = latency_ms / 1000.0
+        # 读接口(记录列表、健康检查)按此比例返回500，模拟不稳定的PocketBase
+        self.error_rate = error_rate
+        self.batch_api = batch_api
+        self.token_ttl = token_ttl
+        self.auth_calls = {"auth-with-password": 0, "auth-refresh": 0}
+        # 记录列表接口被请求的次数
+        self.list_calls = 0
+        self.tools = [make_tool(i) for i in range(catalog_size)]
+        self.lock = threading.Lock()
+        # 实时订阅: clientId -> (事件队列, 订阅主题集合)
+        self.realtime_clients = {}
+
+    def _filter(self, expression):
+        if not expression:
+            return self.tools
+        match = re.fullmatch(r"category='(.*)'", expression)
+        if match:
+            return [t for t in self.tools if t["category"] == match.group(1)]
+        match = re.fullmatch(r"updated>='(.*)'", expression)
+        if match:
+            return [t for t in self.tools if t["updated"] >= match.group(1)]
+        match = re.fullmatch(r"name~'(.*)'\|\|description~'(.*)'", expression)
+        if match:
+            needle = match.group(1).lower()
+            return [t for t in self.tools
+                    if needle in t["name"].lower() or needle in t["description"].lower()]
+        match = re.fullmatch(r"name~'(.*)'", expression)
+        if match:
+            needle = match.group(1).replace("\\'", "'").lower()
+            return [t for t in self.tools if needle in t["name"].lower()]
+        clauses = re.findall(r"(\w+)='((?:[^'\\]|\\.)*)'", expression)
+        if clauses and "||".join(f"{field}='{value}'" for field, value in clauses) == expression:
+            wanted = {(field, value.replace("\\'", "'")) for field, value in clauses}
+            return [t for t in self.tools if any((field, str(t.get(field))) in wanted for field, _ in clauses)]
+        return self.tools
+
+    def list_records(self, query):
+        with self.lock:
+            self.list_calls += 1
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("perPage", ["30"])[0])
+        items = self._filter(query.get("filter", [""])[0])
+        fields = query.get("fields", [""])[0]
+        start = (page - 1) * per_page
+        return {
+            "page": page,
+            "perPage": per_page,
+            "totalItems": len(items),
+            "totalPages": (len(items) + per_page - 1) // per_page,
+            "items": [self._project(item, fields) for item in items[start:start + per_page]]
+        }
+
+    @staticmethod
+    def _project(record, fields):
+        if not fields:
+            return record
+        return {name: record[name] for name in fields.split(",") if name in record}
+
+    def issue_token(self):
+        """
+        签发一个带 exp 的JWT形式令牌（签名部分是占位符）
+        """
+        def encode(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+        claims = {"id": "admin", "type": "admin", "exp": int(time.time() + self.token_ttl)}
+        return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode(claims)}.fake-signature"
+
+    def token_expired(self, authorization):
+        """
+        带了已过期令牌的请求返回401；未带令牌的请求按公开接口处理
+        """
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        try:
+            payload = authorization[7:].split(".")[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        except (IndexError, ValueError):
+            return True
+        return claims.get("exp", 0) <= time.time()
+
+    def _now(self):
+        return time.strftime("%Y-%m-%d %H:%M:%S.000Z", time.gmtime())
+
+    def create_record(self, record):
+        with self.lock:
+            record = dict(record)
+            record.setdefault("id", uuid.uuid4().hex[:15])
+            record["collectionId"] = "pbc_ai_tools0001"
+            record["collectionName"] = "ai_tools"
+            record["created"] = record["updated"] = self._now()
+            self.tools.append(record)
+        self.publish("create", record)
+        return record
+
+    def update_record(self, record_id, changes):
+        with self.lock:
+            for record in self.tools:
+                if record["id"] == record_id:
+                    record.update(changes)
+                    record["updated"] = self._now()
+                    break
+            else:
+                return None
+        self.publish("update", record)
+        return record
+
+    def delete_record(self, record_id):
+        with self.lock:
+            for index, record in enumerate(self.tools):
+                if record["id"] == record_id:
+                    del self.tools[index]
+                    break
+            else:
+                return None
+        self.publish("delete", record)
+        return record
+
+    def batch(self, requests_list):
+        """
+        依次执行 /api/batch 中的写请求，返回 [{status, body}]
+        """
+        results = []
+        for item in requests_list:
+            path = urlparse(item.get("url", "")).path
+            body = item.get("body") or {}
+            if item.get("method") == "POST" and path == "/api/collections/ai_tools/records":
+                results.append({"status": 200, "body": self.create_record(body)})
+            elif item.get("method") == "PATCH" and path.startswith("/api/collections/ai_tools/records/"):
+                record = self.update_record(path.rsplit("/", 1)[-1], body)
+                results.append({"status": 404 if record is None else 200, "body": record or {}})
+            else:
+                results.append({"status": 400, "body": {"message": "Unsupported batch request."}})
+        return results
+
+    def publish(self, action, record):
+        """
+        向订阅了 ai_tools 的实时客户端广播记录事件
+        """
+        for events, topics in list(self.realtime_clients.values()):
+            if "ai_tools" in topics or "ai_tools/*" in topics:
+                events.put(("ai_tools", {"action": action, "record": record}))
+
+    def drop_realtime_clients(self):
+        """
+        断开全部实时连接（用于演练重连与重连后的增量同步）
+        """
+        for events, _ in list(self.realtime_clients.values()):
+            events.put(None)
+
+    def make_handler(self):
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次写出，关闭Nagle以免与客户端的延迟ACK叠加出约40ms的停顿
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parsed = urlparse(self.path)
+                if parsed.path != "/api/realtime" and fake.error_rate and random.random() < fake.error_rate:
+                    self._reply(500, {"code": 500, "message": "Injected failure."})
+                elif parsed.path == "/api/collections/ai_tools/records":
+                    self._reply(200, fake.list_records(parse_qs(parsed.query)))
+                elif parsed.path == "/api/realtime":
+                    self._stream_realtime()
+                elif parsed.path == "/api/health":
+                    self._reply(200, {"code": 200, "message": "API is healthy."})
+                else:
+                    self._reply(404, {"code": 404, "message": "Not found."})
+
+            def _unauthorized(self):
+                if fake.token_expired(self.headers.get("Authorization")):
+                    self._reply(401, {"code": 401, "message": "The request requires valid admin authorization token."})
+                    return True
+                return False
+
+            def do_POST(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                path = urlparse(self.path).path
+                payload = self._read_json()
+                if path == "/api/admins/auth-with-password":
+                    fake.auth_calls["auth-with-password"] += 1
+                    self._reply(200, {"token": fake.issue_token(), "admin": {"id": "admin"}})
+                elif self._unauthorized():
+                    pass
+                elif path == "/api/admins/auth-refresh":
+                    fake.auth_calls["auth-refresh"] += 1
+                    self._reply(200, {"token": fake.issue_token(), "admin": {"id": "admin"}})
+                elif path == "/api/collections":
+                    self._reply(400, {"message": "Collection already exists."})
+                elif path == "/api/collections/ai_tools/records":
+                    self._reply(200, fake.create_record(payload))
+                elif path == "/api/batch" and fake.batch_api:
+                    self._reply(200, fake.batch(payload.get("requests") or []))
+                elif path == "/api/realtime":
+                    client = fake.realtime_clients.get(payload.get("clientId"))
+                    if client is None:
+                        self._reply(404, {"code": 404, "message": "Missing client."})
+                    else:
+                        client[1].clear()
+                        client[1].update(payload.get("subscriptions") or [])
+                        self._reply(204, {})
+                else:
+                    self._reply(404, {"code": 404, "message": "Not found."})
+
+            def do_PATCH(self):
+                changes = self._read_json()
+                if self._unauthorized():
+                    return
+                record_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+                record = fake.update_record(record_id, changes)
+                if record is None:
+                    self._reply(404, {"code": 404, "message": "Not found."})
+                else:
+                    self._reply(200, record)
+
+            def do_DELETE(self):
+                if self._unauthorized():
+                    return
+                record_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+                if fake.delete_record(record_id) is None:
+                    self._reply(404, {"code": 404, "message": "Not found."})
+                else:
+                    self._reply(204, {})
+
+            def _send_event(self, event, data):
+                chunk = f"id:{uuid.uuid4().hex}\nevent:{event}\ndata:{json.dumps(data, ensure_ascii=False)}\n\n"
+                chunk = chunk.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                self.wfile.flush()
+
+            def _stream_realtime(self):
+                client_id = uuid.uuid4().hex
+                events = queue.Queue()
+                fake.realtime_clients[client_id] = (events, set())
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-store")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    self._send_event("PB_CONNECT", {"clientId": client_id})
+                    while True:
+                        item = events.get()
+                        if item is None:
+                            break
+                        self._send_event(*item)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    pass
+                finally:
+                    fake.realtime_clients.pop(client_id, None)
+                    self.close_connection = True
+
+        return Handler
+
+    def serve(self, port=0, host="127.0.0.1"):
+        """
+        在后台线程启动替身服务器，返回 server 对象
+        """
+        server = ThreadingFakeServer((host, port), self.make_handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class ThreadingFakeServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # 被测进程结束时正在处理的连接会被对端断开，不必打印堆栈
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(port, path, concurrency, duration):
+    """
+    以固定并发持续请求 duration 秒，返回吞吐和延迟分位数
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        local = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                if response.status >= 400:
+                    local_errors += 1
+            except OSError:
+                local_errors += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000
+    }
+
+
+def start_app_server(pocketbase_url, mode, workers, backlog, extra_env=None):
+    """
+    以子进程启动 pocketbase_integration.py，返回 (进程, 端口)
+    """
+    port = free_port()
+    env = dict(os.environ,
+               PORT=str(port),
+               POCKETBASE_URL=pocketbase_url,
+               PB_SERVER_MODE=mode,
+               PB_WORKERS=str(workers),
+               PB_BACKLOG=str(backlog),
+               # 压测客户端都来自同一IP，默认不限流（需要时由 extra_env 打开）
+               PB_RATE_LIMIT="0")
+    env.update(extra_env or {})
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "pocketbase_integration.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    if not wait_for_port(port):
+        process.kill()
+        raise RuntimeError(f"服务器({mode})未能在端口 {port} 启动")
+    return process, port
+
+
+def command_load(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size, latency_ms=args.latency_ms)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print(f"📊 路径 {args.path} | PocketBase替身延迟 {args.latency_ms}ms | 每档 {args.duration}s")
+    print(f"{'mode':<10}{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode in args.modes.split(","):
+        process, port = start_app_server(pocketbase_url, mode, args.workers, args.backlog)
+        try:
+            for level in levels:
+                result = run_load(port, args.path, level, args.duration)
+                print(f"{mode:<10}{level:>8}{result['requests']:>10}{result['errors']:>8}"
+                      f"{result['rps']:>10.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+        finally:
+            process.terminate()
+            process.wait()
+    fake_server.shutdown()
+
+
+def start_fake_process(catalog_size, latency_ms=0.0, batch_api=True):
+    """
+    以子进程启动PocketBase替身，避免其内存计入被测进程，返回 (进程, URL)
+    """
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "fake-pocketbase",
+         "--port", str(port), "--catalog-size", str(catalog_size), "--latency-ms", str(latency_ms)]
+        + ([] if batch_api else ["--no-batch-api"]),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    if not wait_for_port(port, timeout=60):
+        process.kill()
+        raise RuntimeError("PocketBase替身启动失败")
+    return process, f"http://127.0.0.1:{port}"
+
+
+def measure_peak(func):
+    """
+    返回 (结果, 耗时秒, tracemalloc峰值字节)
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def command_export(args):
+    from pocketbase_integration import PocketBaseCyberpunkServer, encode_tool_stream
+
+    print(f"{'records':>10}{'mode':>10}{'bytes':>14}{'seconds':>10}{'peak MiB':>10}")
+    for size in [int(value) for value in args.sizes.split(",")]:
+        process, pocketbase_url = start_fake_process(size)
+        try:
+            pb_client = PocketBaseCyberpunkServer(pocketbase_url)
+            pb_client.per_page = args.per_page
+
+            def full_list():
+                data = pb_client.get_all_tools()
+                return len(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+            def streamed():
+                return sum(len(chunk) for chunk in encode_tool_stream(pb_client.iter_tools(), "ndjson"))
+
+            for mode, func in (("list", full_list), ("stream", streamed)):
+                written, elapsed, peak = measure_peak(func)
+                print(f"{size:>10}{mode:>10}{written:>14}{elapsed:>10.2f}{peak / 2 ** 20:>10.1f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def time_calls(func, arguments, repeat=1):
+    """
+    逐个调用 func(arg)，返回每次调用耗时(秒)的有序列表
+    """
+    timings = []
+    for _ in range(repeat):
+        for argument in arguments:
+            started = time.perf_counter()
+            func(argument)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings
+
+
+def command_search(args):
+    from pocketbase_integration import PocketBaseCyberpunkServer
+
+    queries = args.queries.split(",")
+    process, pocketbase_url = start_fake_process(args.catalog_size)
+    try:
+        pb_client = PocketBaseCyberpunkServer(pocketbase_url)
+        upstream = time_calls(pb_client.search_tools, queries)
+
+        started = time.perf_counter()
+        pb_client.catalog.replace_all(pb_client.get_all_tools()["items"])
+        build_seconds = time.perf_counter() - started
+        local = time_calls(pb_client.search, queries, repeat=args.repeat)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"📊 {args.catalog_size} 条记录，{len(queries)} 个查询；索引构建(含拉取) {build_seconds:.2f}s")
+    print(f"{'path':<12}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, timings in (("upstream", upstream), ("index", local)):
+        mean = sum(timings) / len(timings)
+        print(f"{name:<12}{mean * 1000:>10.3f}{percentile(timings, 0.5) * 1000:>10.3f}"
+              f"{percentile(timings, 0.99) * 1000:>10.3f}")
+
+
+def command_compression(args):
+    import gzip
+    from pocketbase_cache import JsonPayload, brotli
+    from pocketbase_catalog import ToolCatalog
+    from pocketbase_integration import HOMEPAGE_TEMPLATE
+    from pocketbase_render import HomepageRenderer
+
+    items = [make_tool(i) for i in range(args.catalog_size)]
+    payload = JsonPayload({"page": 1, "perPage": len(items), "totalItems": len(items),
+                           "totalPages": 1, "items": items})
+    catalog = ToolCatalog()
+    catalog.replace_all(items)
+    homepage = HomepageRenderer(catalog, HOMEPAGE_TEMPLATE).homepage()
+    bodies = (("homepage", homepage), (f"/api/tools ({args.catalog_size})", payload))
+
+    print(f"{'response':<22}{'identity':>10}{'gzip':>10}{'br':>10}{'gzip-6 on the fly':>20}")
+    for name, encoded in bodies:
+        # 每次请求现场压缩的CPU耗时，即预压缩后热路径省下的时间
+        started = time.process_time()
+        for _ in range(args.repeat):
+            gzip.compress(encoded.body, compresslevel=6)
+        cpu_ms = (time.process_time() - started) / args.repeat * 1000
+        print(f"{name:<22}{len(encoded.body):>10}{len(encoded.variants.get('gzip', b'')):>10}"
+              f"{len(encoded.variants.get('br', b'')) or '-':>10}{cpu_ms:>17.3f} ms")
+    if brotli is None:
+        print("ℹ️  未安装 brotli，仅提供 gzip")
+
+
+def command_import(args):
+    import tempfile
+    from pocketbase_import import iter_tool_file
+    from pocketbase_integration import PocketBaseCyberpunkServer
+
+    with tempfile.NamedTemporaryFile("w", suffix=".ndjson", encoding="utf-8", delete=False) as handle:
+        for index in range(args.records):
+            tool = make_tool(index)
+            for field in ("id", "collectionId", "collectionName", "created", "updated"):
+                del tool[field]
+            handle.write(json.dumps(tool, ensure_ascii=False) + "\n")
+        path = handle.name
+
+    def serial(pb_client):
+        # 原 populate_sample_data 的做法: 串行逐条POST
+        for tool in iter_tool_file(path):
+            pb_client.http.post(f"{pb_client.pocketbase_url}/api/collections/ai_tools/records",
+                                headers=pb_client.auth_headers(), json=tool)
+        return {"created": args.records, "updated": 0, "unchanged": 0}
+
+    def importer(workers, batch_size, use_batch, rerun=False):
+        def run(pb_client):
+            if rerun:
+                pb_client.import_tools(iter_tool_file(path), workers, batch_size, use_batch)
+            return pb_client.import_tools(iter_tool_file(path), workers, batch_size, use_batch)
+        return run
+
+    modes = (
+        ("serial", serial, False),
+        (f"workers={args.workers}", importer(args.workers, 1, False), False),
+        (f"batch={args.batch_size}", importer(args.workers, args.batch_size, True), True),
+        ("rerun", importer(args.workers, args.batch_size, True, rerun=True), True),
+    )
+    print(f"📊 导入 {args.records} 条记录 | PocketBase替身延迟 {args.latency_ms}ms")
+    print(f"{'mode':<14}{'seconds':>10}{'records/s':>12}{'created':>10}{'updated':>10}{'unchanged':>11}")
+    try:
+        for name, func, batch_api in modes:
+            process, pocketbase_url = start_fake_process(0, args.latency_ms, batch_api)
+            try:
+                pb_client = PocketBaseCyberpunkServer(pocketbase_url, pool_size=max(args.workers, 4))
+                pb_client.authenticate()
+                started = time.perf_counter()
+                stats = func(pb_client)
+                elapsed = time.perf_counter() - started
+                print(f"{name:<14}{elapsed:>10.2f}{args.records / elapsed:>12.0f}{stats['created']:>10}"
+                      f"{stats['updated']:>10}{stats['unchanged']:>11}")
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        os.unlink(path)
+
+
+def command_snapshot(args):
+    import tempfile
+    from pocketbase_integration import PocketBaseCyberpunkServer
+    from pocketbase_snapshot import load_snapshot, write_snapshot
+
+    print(f"📊 PocketBase替身延迟 {args.latency_ms}ms | 每页 {args.per_page} 条")
+    print(f"{'records':>10}{'file MiB':>10}{'write s':>10}{'load s':>10}{'full pull s':>13}{'delta s':>10}")
+    for size in [int(value) for value in args.sizes.split(",")]:
+        process, pocketbase_url = start_fake_process(size, args.latency_ms)
+        path = tempfile.mktemp(suffix=".snapshot")
+        try:
+            pb_client = PocketBaseCyberpunkServer(pocketbase_url)
+            pb_client.per_page = args.per_page
+            started = time.perf_counter()
+            items = pb_client.get_all_tools()["items"]
+            pull_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            write_snapshot(path, items, pocketbase_url)
+            write_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            records = load_snapshot(path, pocketbase_url)
+            load_seconds = time.perf_counter() - started
+
+            # 重启后的增量同步：没有变更时只需拉取id列表
+            from pocketbase_catalog import RealtimeSubscriber
+            pb_client.catalog.replace_all(records)
+            started = time.perf_counter()
+            RealtimeSubscriber(pb_client, pb_client.catalog).delta_sync()
+            delta_seconds = time.perf_counter() - started
+            print(f"{size:>10}{os.path.getsize(path) / 2 ** 20:>10.1f}{write_seconds:>10.2f}"
+                  f"{load_seconds:>10.2f}{pull_seconds:>13.2f}{delta_seconds:>10.2f}")
+        finally:
+            process.terminate()
+            process.wait()
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def iter_decoded_tools(count, chunk=10000):
+    """
+    像解析PocketBase响应那样分块 json.loads 合成记录，每个字段值都是独立的对象
+    """
+    for start in range(0, count, chunk):
+        batch = [make_tool(i) for i in range(start, min(count, start + chunk))]
+        yield from json.loads(json.dumps(batch, ensure_ascii=False))
+
+
+def command_memory(args):
+    import gc
+    from pocketbase_catalog import ToolCatalog
+
+    print(f"{'records':>10}{'dict MiB':>10}{'store MiB':>11}{'B/rec dict':>12}{'B/rec store':>13}"
+          f"{'render dict s':>15}{'render store s':>16}")
+    for size in [int(value) for value in args.sizes.split(",")]:
+        gc.collect()
+        tracemalloc.start()
+        records = list(iter_decoded_tools(size))
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        started = time.perf_counter()
+        json.dumps({"page": 1, "perPage": size, "totalItems": size, "totalPages": 1, "items": records},
+                   ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        dict_render = time.perf_counter() - started
+        del records
+        gc.collect()
+
+        tracemalloc.start()
+        catalog = ToolCatalog()
+        catalog.replace_all(iter_decoded_tools(size))
+        gc.collect()
+        store_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        started = time.perf_counter()
+        catalog.as_response()
+        store_render = time.perf_counter() - started
+        del catalog
+        gc.collect()
+
+        print(f"{size:>10}{dict_bytes / 2 ** 20:>10.1f}{store_bytes / 2 ** 20:>11.1f}"
+              f"{dict_bytes / size:>12.0f}{store_bytes / size:>13.0f}{dict_render:>15.2f}{store_render:>16.2f}")
+
+
+def wait_for_status(port, path, status=200, timeout=30.0):
+    """
+    轮询 path 直到返回 status，返回等到时的 perf_counter 时间；超时返回 None
+    """
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == status:
+                return time.perf_counter()
+        except OSError:
+            pass
+        time.sleep(0.001)
+    return None
+
+
+def command_startup(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size, latency_ms=args.latency_ms)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+
+    print(f"📊 冷启动 | PocketBase替身延迟 {args.latency_ms}ms | 目录 {args.catalog_size} 条 | 目标 <{args.target_ms}ms")
+    print(f"{'run':>5}{'first 200 ms':>15}{'ready ms':>12}")
+    first, ready = [], []
+    for run in range(args.runs):
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), POCKETBASE_URL=pocketbase_url, PB_SERVER_MODE="pool")
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, "pocketbase_integration.py")],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            served = wait_for_status(port, args.path)
+            readied = wait_for_status(port, "/readyz")
+        finally:
+            process.terminate()
+            process.wait()
+        if served is None or readied is None:
+            raise RuntimeError("服务器未能在超时内就绪")
+        first.append((served - started) * 1000)
+        ready.append((readied - started) * 1000)
+        print(f"{run + 1:>5}{first[-1]:>15.1f}{ready[-1]:>12.1f}")
+    first.sort()
+    ready.sort()
+    median = percentile(first, 0.5)
+    print(f"{'p50':>5}{median:>15.1f}{percentile(ready, 0.5):>12.1f}")
+    print(("✅" if median < args.target_ms else "❌") + f" 首个200响应中位数 {median:.1f}ms (目标 <{args.target_ms}ms)")
+    fake_server.shutdown()
+
+
+def run_burst(port, path, size):
+    """
+    size 个客户端在同一时刻请求同一路径，返回 (错误数, 最慢一个请求的秒数)
+    """
+    barrier = threading.Barrier(size)
+    errors = [0]
+    slowest = [0.0]
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.connect()
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            failed = response.status >= 400
+        except OSError:
+            failed = True
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - started
+        with lock:
+            errors[0] += failed
+            slowest[0] = max(slowest[0], elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors[0], slowest[0]
+
+
+def command_coalesce(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size, latency_ms=args.latency_ms)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    # 关闭缓存与实时订阅，每个请求都落到PocketBase，只比较请求合并的效果
+    base_env = {"PB_CACHE_TTL": "0", "PB_CACHE_SWR": "0", "PB_REALTIME": "0", "PB_SNAPSHOT_PATH": ""}
+
+    print(f"📊 {args.burst} 个并发相同请求 x {args.rounds} 轮 | PocketBase替身延迟 {args.latency_ms}ms | 缓存关闭")
+    print(f"{'single-flight':<15}{'requests':>10}{'errors':>8}{'upstream':>10}{'per burst':>11}{'slowest ms':>12}")
+    for enabled in ("0", "1"):
+        env = dict(base_env, PB_SINGLE_FLIGHT=enabled)
+        process, port = start_app_server(pocketbase_url, "pool", args.workers, args.backlog, env)
+        try:
+            if wait_for_status(port, "/readyz") is None:
+                raise RuntimeError("服务器未能在超时内就绪")
+            errors, slowest = 0, []
+            before = fake.list_calls
+            for round_index in range(args.rounds):
+                # 每轮换一个新的搜索词，模拟缓存里还没有的键
+                burst_errors, burst_slowest = run_burst(port, f"/api/search/tool%20{round_index}", args.burst)
+                errors += burst_errors
+                slowest.append(burst_slowest * 1000)
+            upstream = fake.list_calls - before
+        finally:
+            process.terminate()
+            process.wait()
+        slowest.sort()
+        label = "on" if enabled == "1" else "off"
+        print(f"{label:<15}{args.burst * args.rounds:>10}{errors:>8}{upstream:>10}"
+              f"{upstream / args.rounds:>11.1f}{percentile(slowest, 0.5):>12.1f}")
+    fake_server.shutdown()
+
+
+def typing_session(rng, words):
+    """
+    模拟一次输入: 返回 [(距开始的毫秒数, 当前输入框内容)]，每次按键一个元素
+    """
+    query = " ".join(rng.sample(words, rng.randint(1, 2)))
+    events, now = [], 0.0
+    for length in range(1, len(query) + 1):
+        # 连续敲击间隔 60~200ms，偶尔停顿思考
+        now += rng.uniform(60, 200) if rng.random() > 0.1 else rng.uniform(300, 900)
+        events.append((now, query[:length]))
+    return events
+
+
+def count_typeahead_requests(events, debounce_ms, min_length, search_pause_ms, catalog_loaded=True):
+    """
+    按主页脚本的策略计算一次输入发出的服务器请求数，返回 (联想请求数, 搜索请求数):
+    目录已加载时联想在本地完成，短于 min_length 的输入也只在本地过滤；目录未加载时
+    停顿超过 debounce_ms 发出联想请求。停顿超过 search_pause_ms（输入结束视为无限长的停顿）
+    再发出完整搜索
+    """
+    suggests = searches = 0
+    for index, (at, value) in enumerate(events):
+        if catalog_loaded and len(value.strip()) < min_length:
+            continue
+        next_at = events[index + 1][0] if index + 1 < len(events) else float("inf")
+        suggests += not catalog_loaded and next_at - at >= debounce_ms
+        searches += next_at - at >= search_pause_ms
+    return suggests, searches
+
+
+def command_typeahead(args):
+    import random
+
+    rng = random.Random(args.seed)
+    words = ["tool", "image", "coding", "video", "audio", "assistant", "generator", "gpt", "chat", "translate"]
+    sessions = [typing_session(rng, words) for _ in range(args.sessions)]
+    before = sum(len(events) for events in sessions)
+    print(f"📊 {args.sessions} 次模拟输入，共 {before} 次按键 | 联想防抖 {args.debounce_ms}ms | "
+          f"搜索停顿 {args.search_pause_ms}ms | 本地过滤 <{args.min_length} 字符")
+    print(f"{'policy':<36}{'suggest':>10}{'search':>10}{'total':>10}{'per session':>13}")
+    print(f"{'every keystroke':<36}{0:>10}{before:>10}{before:>10}{before / args.sessions:>13.1f}")
+    totals = {}
+    for label, catalog_loaded in (("debounce (catalog not loaded)", False), ("local filter + suggest", True)):
+        counts = [count_typeahead_requests(events, args.debounce_ms, args.min_length, args.search_pause_ms,
+                                           catalog_loaded) for events in sessions]
+        suggests = sum(suggest for suggest, _ in counts)
+        searches = sum(search for _, search in counts)
+        totals[catalog_loaded] = suggests + searches
+        print(f"{label:<36}{suggests:>10}{searches:>10}{suggests + searches:>10}"
+              f"{(suggests + searches) / args.sessions:>13.1f}")
+    # 目录(/api/tools)每次打开主页只加载一次，与输入多少次无关，不计入每次输入的请求数
+    print(f"✅ 目录已加载时每次输入的请求降为逐键请求的 {totals[True] / before:.1%}"
+          f"（目录加载前为 {totals[False] / before:.1%}）")
+
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    process, port = start_app_server(pocketbase_url, "pool", 8, 128, {"PB_CACHE_TTL": "0", "PB_SNAPSHOT_PATH": ""})
+    try:
+        if wait_for_status(port, "/readyz") is None:
+            raise RuntimeError("服务器未能在超时内就绪")
+        print(f"{'endpoint':<28}{'bytes':>16}{'avg ms':>13}")
+        for path in ("/api/search/tool%201", "/api/suggest?q=tool%201&limit=8"):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            started = time.perf_counter()
+            size = 0
+            for _ in range(args.repeat):
+                conn.request("GET", path)
+                size = len(conn.getresponse().read())
+            elapsed = (time.perf_counter() - started) / args.repeat * 1000
+            conn.close()
+            print(f"{path.split('?')[0]:<28}{size:>16}{elapsed:>13.2f}")
+    finally:
+        process.terminate()
+        process.wait()
+    fake_server.shutdown()
+
+
+def fetch_counted(conn, path, headers=None):
+    """
+    GET path，返回 (响应, 响应体, 响应头与响应体合计字节数)
+    """
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    header_bytes = len(f"HTTP/1.1 {response.status} {response.reason}\r\n") + len(str(response.msg)) + 2
+    return response, body, header_bytes + len(body)
+
+
+def command_pageweight(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    process, port = start_app_server(pocketbase_url, "pool", 8, 128, {"PB_SNAPSHOT_PATH": ""})
+    headers = {"Accept-Encoding": "gzip, br"}
+    try:
+        if wait_for_status(port, "/readyz") is None:
+            raise RuntimeError("服务器未能在超时内就绪")
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        # 等内存目录同步完成，主页才带服务端渲染的卡片
+        deadline = time.monotonic() + 10
+        while not json.loads(fetch_counted(conn, "/healthz")[1])["catalog_loaded"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        response, body, first_total = fetch_counted(conn, "/", headers)
+        etag = response.getheader("ETag")
+        html = fetch_counted(conn, "/")[1].decode("utf-8")
+        print(f"{'resource':<44}{'status':>8}{'bytes':>10}  cache-control")
+        print(f"{'/':<44}{response.status:>8}{first_total:>10}  {response.getheader('Cache-Control')}")
+        for path in re.findall(r'(?:href|src)="(/static/[^"]+)"', html):
+            response, _, total = fetch_counted(conn, path, headers)
+            first_total += total
+            print(f"{path:<44}{response.status:>8}{total:>10}  {response.getheader('Cache-Control')}")
+        # 再次访问: 资源在浏览器缓存中且标记为 immutable，只需用ETag重新验证主页
+        response, _, repeat_total = fetch_counted(conn, "/", dict(headers, **{"If-None-Match": etag}))
+        conn.close()
+    finally:
+        process.terminate()
+        process.wait()
+    fake_server.shutdown()
+    print(f"首次访问共 {first_total} 字节；再次访问 {repeat_total} 字节 (主页 {response.status})")
+    cards = html.count('class="cyber-tool-card"')
+    print(f"主页HTML中服务端渲染的工具卡片: {cards} 张" + ("（首屏无需等待 /api/tools）" if cards else ""))
+
+
+def build_if_chain(count):
+    """
+    原 do_GET 式的顺序判断: [(是否前缀匹配, 路径)]，逐条比较直到命中
+    """
+    chain = []
+    for index in range(count):
+        chain.append((False, f"/api/r{index}"))
+        chain.append((True, f"/api/r{index}/item/"))
+    return chain
+
+
+def match_if_chain(chain, path):
+    for is_prefix, pattern in chain:
+        if (path.startswith(pattern) if is_prefix else path == pattern):
+            return pattern
+    return None
+
+
+def command_router(args):
+    from pocketbase_router import QueryParam, Router
+
+    def endpoint(handler, **params):
+        return params
+
+    def passthrough(handler, route, params, call_next):
+        return call_next(handler, params)
+
+    print(f"{'routes':>8}{'if-chain ns':>14}{'router ns':>12}{'router param ns':>17}{'dispatch ns':>13}")
+    for count in (int(value) for value in args.routes.split(",")):
+        router = Router(middleware=[passthrough])
+        for index in range(count):
+            router.get(f"/api/r{index}", endpoint, query={"limit": QueryParam(int, 8)})
+            router.get(f"/api/r{index}/item/{{item_id:int}}", endpoint)
+        router.set_fallback("GET", endpoint)
+        chain = build_if_chain(count)
+        # 最坏情况: 命中表中最后一条路由
+        static_path = f"/api/r{count - 1}"
+        param_path = f"/api/r{count - 1}/item/42"
+        repeat = args.repeat
+
+        def per_call(func, *arguments):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                func(*arguments)
+            return (time.perf_counter() - started) / repeat * 1e9
+
+        chain_ns = per_call(match_if_chain, chain, param_path)
+        static_ns = per_call(router.match, "GET", static_path)
+        param_ns = per_call(router.match, "GET", param_path)
+        match = router.match("GET", param_path)
+        dispatch_ns = per_call(match.route.call, None, dict(match.params))
+        print(f"{count:>8}{chain_ns:>14.0f}{static_ns:>12.0f}{param_ns:>17.0f}{dispatch_ns:>13.0f}")
+
+
+def command_metrics(args):
+    import tempfile
+    from pocketbase_metrics import AccessLog, ServerMetrics
+
+    record = {"ts": "2026-01-01T00:00:00Z", "client": "127.0.0.1", "method": "GET", "path": "/api/tools",
+              "route": "/api/tools", "status": 200, "bytes": 23164, "ms": 2.5}
+    metrics = ServerMetrics()
+    repeat = args.repeat
+
+    def per_call(func):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1e9
+
+    print(f"{'operation':<44}{'ns/request':>12}")
+    observe_ns = per_call(lambda: metrics.observe_request("/api/tools", "GET", 200, 23164, 0.0025))
+    print(f"{'observe_request (直方图+计数器)':<44}{observe_ns:>12.0f}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "access.log")
+        with open(path, "a", encoding="utf-8") as stream:
+            def write_sync():
+                stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                stream.flush()
+            sync_ns = per_call(write_sync)
+        print(f"{'同步写日志 (每请求一次write+flush)':<44}{sync_ns:>12.0f}")
+        for sample in (1.0, 0.1):
+            access_log = AccessLog(path, sample=sample, interval=0.05, max_queue=repeat).start()
+            async_ns = per_call(lambda: access_log.log(record))
+            access_log.stop()
+            label = f"异步访问日志 (采样 {sample:g})"
+            print(f"{label:<44}{async_ns:>12.0f}  {access_log.stats}")
+
+
+def wait_for_workers(port, processes, timeout=30.0):
+    """
+    轮询 /healthz 直到看到 processes 个不同的工作进程都已载入目录
+    """
+    loaded = set()
+    deadline = time.monotonic() + timeout
+    while len(loaded) < processes and time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/healthz")
+            health = json.loads(conn.getresponse().read())
+            conn.close()
+            if health["catalog_loaded"]:
+                loaded.add(health["pid"])
+        except (OSError, ValueError):
+            time.sleep(0.05)
+    return len(loaded) >= processes
+
+
+def command_scaling(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    # 关闭响应缓存，每个请求都要做本地搜索与JSON序列化（CPU密集，受GIL限制）
+    env = {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off", "PB_CACHE_TTL": "0"}
+
+    print(f"📊 路径 {args.path} | 目录 {args.catalog_size} 条 | 并发 {args.concurrency} | "
+          f"每档 {args.duration}s | CPU核数 {os.cpu_count()}")
+    print(f"{'mode':<10}{'procs':>6}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'speedup':>9}")
+    runs = [("pool", 1)] + [("prefork", int(count)) for count in args.processes.split(",")]
+    baseline = None
+    for mode, processes in runs:
+        process, port = start_app_server(pocketbase_url, mode, args.workers, args.backlog,
+                                         dict(env, PB_PROCESSES=str(processes)))
+        try:
+            if not wait_for_workers(port, processes):
+                raise RuntimeError(f"{processes} 个工作进程未能在超时内载入目录")
+            result = run_load(port, args.path, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait()
+        baseline = baseline or result["rps"]
+        print(f"{mode:<10}{processes:>6}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['rps'] / baseline:>8.2f}x")
+    fake_server.shutdown()
+
+
+def run_concurrent_loads(port, loads, duration):
+    """
+    同时压测多个路径，loads 为 [(路径, 并发数)]，返回 {路径: run_load 结果}
+    """
+    results = {}
+
+    def drive(path, concurrency):
+        results[path] = run_load(port, path, concurrency, duration)
+
+    threads = [threading.Thread(target=drive, args=load) for load in loads]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def command_resilience(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    # 不同步内存目录、关闭缓存，搜索请求每次都要访问PocketBase；主页只用本地数据
+    env = {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off", "PB_REALTIME": "0", "PB_CACHE_TTL": "0",
+           "PB_READ_TIMEOUT": str(args.read_timeout), "PB_RETRIES": "0"}
+    upstream_path = "/api/search/tool"
+    header = f"{'scenario':<26}{'path':<18}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+
+    def report(label, results):
+        for path, result in results.items():
+            print(f"{label:<26}{path:<18}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+                  f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+
+    print(f"📊 PocketBase停止响应(读超时 {args.read_timeout}s)时，依赖上游的搜索与只用本地数据的主页")
+    print(header)
+    for breaker in ("1", "0"):
+        fake.latency = 0.0
+        process, port = start_app_server(pocketbase_url, "pool", args.workers, args.backlog,
+                                         dict(env, PB_CIRCUIT_BREAKER=breaker, PB_SHED_LOAD="0"))
+        try:
+            wait_for_status(port, "/readyz")
+            fake.latency = args.outage_latency
+            results = run_concurrent_loads(port, [(upstream_path, args.concurrency), ("/", 4)], args.duration)
+        finally:
+            fake.latency = 0.0
+            process.terminate()
+            process.wait()
+        report("熔断开启" if breaker == "1" else "熔断关闭", results)
+
+    print(f"\n📊 过载: {args.shed_workers} 个工作线程、队列 {args.shed_workers}，"
+          f"PocketBase延迟 {args.slow_ms}ms，{args.concurrency * 4} 个并发客户端")
+    print(header)
+    for shed in ("1", "0"):
+        process, port = start_app_server(pocketbase_url, "pool", args.shed_workers, args.shed_workers,
+                                         dict(env, PB_SHED_LOAD=shed))
+        try:
+            wait_for_status(port, "/readyz")
+            fake.latency = args.slow_ms / 1000.0
+            results = run_concurrent_loads(port, [(upstream_path, args.concurrency * 4)], args.duration)
+        finally:
+            fake.latency = 0.0
+            process.terminate()
+            process.wait()
+        report("快速拒绝(503)" if shed == "1" else "排队等待(listen backlog)", results)
+    fake_server.shutdown()
+
+
+def command_ratelimit(args):
+    from pocketbase_ratelimit import TokenBucketLimiter, rate_limit_middleware
+
+    repeat = args.repeat
+
+    def per_call(func, *arguments):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func(*arguments)
+        return (time.perf_counter() - started) / repeat * 1e9
+
+    class StubClient:
+        rate_limits = {"search": TokenBucketLimiter(1e9, 1e9)}
+
+    class StubHandler:
+        pb_client = StubClient()
+        client_address = ("10.0.0.1", 50000)
+
+        def client_key(self):
+            return self.client_address[0]
+
+    handler = StubHandler()
+    middleware = rate_limit_middleware("search")
+
+    def through_middleware():
+        handler.extra_headers = []
+        middleware(handler, None, {}, lambda handler, params: None)
+
+    clients = [f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}" for index in range(args.clients)]
+    rotating = TokenBucketLimiter(1e9, 1e9, max_clients=args.max_clients)
+    counter = iter(range(1 << 62))
+
+    print(f"{'operation':<48}{'ns/request':>12}")
+    print(f"{'take() 同一客户端':<48}{per_call(TokenBucketLimiter(1e9, 1e9).take, '10.0.0.1'):>12.0f}")
+    print(f"{f'take() {args.clients} 个客户端轮转(上限 {args.max_clients}，LRU淘汰)':<48}"
+          f"{per_call(lambda: rotating.take(clients[next(counter) % len(clients)])):>12.0f}")
+    print(f"{'中间件(take + RateLimit-* 头)':<48}{per_call(through_middleware):>12.0f}")
+    print(f"淘汰 {rotating.stats['evicted']} 个桶，当前 {len(rotating)} 个")
+
+    # 端到端: 单个抓取者以最快速度请求搜索接口，超出预算的请求应直接得到429、不访问PocketBase
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    env = {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off", "PB_REALTIME": "0", "PB_CACHE_TTL": "0",
+           "PB_RATE_LIMIT": "1", "PB_RATE_LIMIT_SEARCH": args.budget}
+    process, port = start_app_server(pocketbase_url, "pool", 8, 128, env)
+    statuses = {}
+    latencies = {}
+    try:
+        wait_for_status(port, "/readyz")
+        calls_before = fake.list_calls
+        deadline = time.monotonic() + args.duration
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request("GET", "/api/search/tool")
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+            latencies.setdefault(response.status, []).append(time.perf_counter() - started)
+        upstream_calls = fake.list_calls - calls_before
+    finally:
+        process.terminate()
+        process.wait()
+    fake_server.shutdown()
+    print(f"\n📊 单个客户端 {args.duration}s 内连续搜索，预算 {args.budget} (每秒速率/突发)")
+    for status in sorted(statuses):
+        values = sorted(latencies[status])
+        print(f"  {status}: {statuses[status]} 次，p50 {percentile(values, 0.5) * 1000:.2f}ms，"
+              f"p99 {percentile(values, 0.99) * 1000:.2f}ms")
+    print(f"  PocketBase记录列表请求: {upstream_calls} 次")
+
+
+def command_pagination(args):
+    from pocketbase_catalog import ToolCatalog
+    from pocketbase_facets import FacetIndex
+    from pocketbase_sorted import SortedIndex
+
+    limit = args.limit
+    print(f"📊 深翻页(最后一页)每页耗时 | 每页 {limit} 条 | sort=rating")
+    print(f"{'records':>10}{'offset 旧 ms':>14}{'offset 索引 ms':>16}{'keyset ms':>12}")
+    for size in [int(value) for value in args.sizes.split(",")]:
+        catalog = ToolCatalog()
+        catalog.replace_all(iter_decoded_tools(size))
+        facets = FacetIndex().attach(catalog)
+        sorted_index = SortedIndex().attach(catalog)
+        ids = facets.select({})[0]
+        start = max(0, size - limit)
+        after = sorted_index.order(ids, "rating")[start - 1] if start else None
+
+        def offset_old():
+            # 原 query_tools: 物化全部匹配记录、排序后再切片
+            records = [catalog.get(record_id) for record_id in ids]
+            records.sort(key=lambda record: record.get("rating") or 0, reverse=True)
+            return records[start:start + limit]
+
+        def offset_indexed():
+            ordered = sorted_index.order(facets.select({})[0], "rating")
+            return [catalog.get(record_id) for record_id in ordered[start:start + limit]]
+
+        def keyset():
+            return [catalog.get(record_id) for record_id in sorted_index.page("rating", after, limit)[0]]
+
+        timings = []
+        for func in (offset_old, offset_indexed, keyset):
+            repeat = max(1, args.repeat if func is keyset else args.repeat // 10)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            timings.append((time.perf_counter() - started) / repeat * 1000)
+        print(f"{size:>10}{timings[0]:>14.2f}{timings[1]:>16.2f}{timings[2]:>12.3f}")
+
+    # 端到端: 整表与只取主页所需字段的响应大小，以及用 after/limit 翻完整个目录
+    fake = FakePocketBase(catalog_size=args.catalog_size)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    process, port = start_app_server(pocketbase_url, "pool", 8, 128,
+                                     {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off"})
+    try:
+        if wait_for_status(port, "/readyz") is None:
+            raise RuntimeError("服务器未能在超时内就绪")
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        deadline = time.monotonic() + 10
+        while not json.loads(fetch_counted(conn, "/healthz")[1])["catalog_loaded"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print(f"\n📊 /api/tools 响应大小 | 目录 {args.catalog_size} 条")
+        print(f"{'path':<60}{'identity':>10}{'gzip':>10}")
+        for path in ("/api/tools", f"/api/tools?fields={args.fields}"):
+            plain = fetch_counted(conn, path)[2]
+            gzipped = fetch_counted(conn, path, {"Accept-Encoding": "gzip"})[2]
+            print(f"{path:<60}{plain:>10}{gzipped:>10}")
+
+        pages = 0
+        latencies = []
+        after = ""
+        while True:
+            started = time.perf_counter()
+            response, body, _ = fetch_counted(conn, f"/api/tools?limit={limit}&fields={args.fields}"
+                                                    + (f"&after={after}" if after else ""))
+            latencies.append(time.perf_counter() - started)
+            if response.status != 200:
+                raise RuntimeError(f"翻页失败: HTTP {response.status}")
+            pages += 1
+            after = json.loads(body)["next"]
+            if not after:
+                break
+        conn.close()
+    finally:
+        process.terminate()
+        process.wait()
+    fake_server.shutdown()
+    latencies.sort()
+    print(f"\n📊 after/limit 翻完目录: {pages} 页，每页 p50 {percentile(latencies, 0.5) * 1000:.2f}ms，"
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f}ms")
+
+
+def process_tree_rss(pid):
+    """
+    进程及其全部子进程(prefork 的工作进程)的常驻内存字节数，读取 /proc；不支持的平台返回 None
+    """
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as handle:
+                for line in handle:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as handle:
+                    pending.extend(int(child) for child in handle.read().split())
+        except (OSError, ValueError):
+            if current == pid:
+                return None
+    return total
+
+
+class RssSampler:
+    """
+    后台每隔 interval 秒采样一次进程树的RSS，记录峰值
+    """
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(baseline, results, threshold):
+    """
+    与基线结果逐项比较，返回退化的项数（吞吐下降或p99上升超过 threshold 比例）
+    """
+    previous = {(item["path"], item["concurrency"]): item for item in baseline.get("results", [])}
+    regressions = 0
+    print(f"\n📊 与基线 {baseline.get('meta', {}).get('revision') or '?'} 对比 (阈值 {threshold:.0%})")
+    print(f"{'path':<32}{'clients':>8}{'req/s':>18}{'p99 ms':>20}")
+    for item in results:
+        before = previous.get((item["path"], item["concurrency"]))
+        if before is None:
+            continue
+        rps_change = (item["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        p99_change = (item["p99_ms"] - before["p99_ms"]) / before["p99_ms"] if before["p99_ms"] else 0.0
+        regressed = rps_change < -threshold or p99_change > threshold
+        regressions += regressed
+        print(f"{item['path']:<32}{item['concurrency']:>8}{item['rps']:>10.1f} {rps_change:>+7.1%}"
+              f"{item['p99_ms']:>12.1f} {p99_change:>+7.1%}" + ("  ⚠️ 退化" if regressed else ""))
+    return regressions
+
+
+def command_suite(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    fake_server = fake.serve()
+    pocketbase_url = f"http://127.0.0.1:{fake_server.server_address[1]}"
+    env = {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off", "PB_PROCESSES": str(args.processes)}
+    paths = args.paths.split(",")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+
+    print(f"📊 模式 {args.mode} | 目录 {args.catalog_size} 条 | PocketBase替身延迟 {args.latency_ms}ms、"
+          f"错误率 {args.error_rate:.0%} | 每档 {args.duration}s")
+    print(f"{'path':<32}{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'RSS MiB':>9}")
+    results = []
+    process, port = start_app_server(pocketbase_url, args.mode, args.workers, args.backlog, env)
+    try:
+        if not wait_for_workers(port, args.processes if args.mode == "prefork" else 1):
+            print("⚠️ 内存目录未能在超时内同步，结果包含直接访问PocketBase的请求")
+        for path in paths:
+            for level in levels:
+                with RssSampler(process.pid) as sampler:
+                    result = run_load(port, path, level, args.duration)
+                result["path"] = path
+                result["rss_mib"] = round(sampler.peak / 2 ** 20, 1) if sampler.peak else None
+                results.append(result)
+                rss = f"{result['rss_mib']:>9.1f}" if result["rss_mib"] is not None else f"{'-':>9}"
+                print(f"{path:<32}{level:>8}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.1f}"
+                      f"{result['p50_ms']:>9.1f}{result['p90_ms']:>9.1f}{result['p99_ms']:>9.1f}{rss}")
+    finally:
+        process.terminate()
+        process.wait()
+        fake_server.shutdown()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {name: value for name, value in vars(args).items() if name != "func"}
+        },
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存到 {args.output}")
+    if baseline is not None and compare_results(baseline, results, args.threshold):
+        sys.exit(1)
+
+
+def command_fake_pocketbase(args):
+    fake = FakePocketBase(catalog_size=args.catalog_size, latency_ms=args.latency_ms,
+                          batch_api=not args.no_batch_api, error_rate=args.error_rate)
+    server = ThreadingFakeServer((args.host, args.port), fake.make_handler())
+    print(f"🧪 PocketBase替身运行于 http://{args.host}:{args.port} ({args.catalog_size} 条记录)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="赛博朋克AI工具聚合网站性能基准测试")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="压测各并发模式的吞吐与p99延迟")
+    load.add_argument("--modes", default="single,threading,pool")
+    load.add_argument("--concurrency", default="1,16,128")
+    load.add_argument("--duration", type=float, default=5.0)
+    load.add_argument("--path", default="/api/tools")
+    load.add_argument("--latency-ms", type=float, default=20.0)
+    load.add_argument("--catalog-size", type=int, default=30)
+    load.add_argument("--workers", type=int, default=32)
+    load.add_argument("--backlog", type=int, default=128)
+    load.set_defaults(func=command_load)
+
+    export = commands.add_parser("export", help="对比整表加载与流式导出的内存峰值")
+    export.add_argument("--sizes", default="10000,100000")
+    export.add_argument("--per-page", type=int, default=500)
+    export.set_defaults(func=command_export)
+
+    search = commands.add_parser("search", help="对比本地索引与PocketBase LIKE查询的搜索延迟")
+    search.add_argument("--catalog-size", type=int, default=10000)
+    search.add_argument("--queries", default="tool 42,tag7,coding,合成,基准测试,通,image gen,zzz")
+    search.add_argument("--repeat", type=int, default=50)
+    search.set_defaults(func=command_search)
+
+    compression = commands.add_parser("compression", help="预压缩响应的传输字节与节省的CPU时间")
+    compression.add_argument("--catalog-size", type=int, default=1000)
+    compression.add_argument("--repeat", type=int, default=50)
+    compression.set_defaults(func=command_compression)
+
+    bulk = commands.add_parser("import", help="对比串行逐条POST与并发/批量导入的吞吐")
+    bulk.add_argument("--records", type=int, default=10000)
+    bulk.add_argument("--latency-ms", type=float, default=2.0)
+    bulk.add_argument("--workers", type=int, default=16)
+    bulk.add_argument("--batch-size", type=int, default=100)
+    bulk.set_defaults(func=command_import)
+
+    startup = commands.add_parser("startup", help="从启动进程到第一个200响应的冷启动时间")
+    startup.add_argument("--runs", type=int, default=10)
+    startup.add_argument("--path", default="/healthz")
+    startup.add_argument("--latency-ms", type=float, default=200.0)
+    startup.add_argument("--catalog-size", type=int, default=1000)
+    startup.add_argument("--target-ms", type=float, default=150.0)
+    startup.set_defaults(func=command_startup)
+
+    snapshot = commands.add_parser("snapshot", help="磁盘快照的写入/载入耗时与全量拉取、增量同步的对比")
+    snapshot.add_argument("--sizes", default="10000,100000")
+    snapshot.add_argument("--latency-ms", type=float, default=5.0)
+    snapshot.add_argument("--per-page", type=int, default=500)
+    snapshot.set_defaults(func=command_snapshot)
+
+    memory = commands.add_parser("memory", help="原始字典与列式存储的每条记录内存及整表渲染耗时")
+    memory.add_argument("--sizes", default="10000,100000,1000000")
+    memory.set_defaults(func=command_memory)
+
+    coalesce = commands.add_parser("coalesce", help="缓存关闭时并发相同请求落到PocketBase的次数(请求合并开/关)")
+    coalesce.add_argument("--burst", type=int, default=200)
+    coalesce.add_argument("--rounds", type=int, default=5)
+    coalesce.add_argument("--latency-ms", type=float, default=50.0)
+    coalesce.add_argument("--catalog-size", type=int, default=1000)
+    coalesce.add_argument("--workers", type=int, default=256)
+    coalesce.add_argument("--backlog", type=int, default=1024)
+    coalesce.set_defaults(func=command_coalesce)
+
+    typeahead = commands.add_parser("typeahead", help="主页逐键搜索与防抖+本地过滤的请求量，及联想接口的响应大小")
+    typeahead.add_argument("--sessions", type=int, default=200)
+    typeahead.add_argument("--debounce-ms", type=float, default=250.0)
+    typeahead.add_argument("--min-length", type=int, default=3)
+    typeahead.add_argument("--search-pause-ms", type=float, default=1000.0)
+    typeahead.add_argument("--catalog-size", type=int, default=1000)
+    typeahead.add_argument("--repeat", type=int, default=200)
+    typeahead.add_argument("--seed", type=int, default=7)
+    typeahead.set_defaults(func=command_typeahead)
+
+    pageweight = commands.add_parser("pageweight", help="主页首次访问与再次访问传输的字节数")
+    pageweight.add_argument("--catalog-size", type=int, default=100)
+    pageweight.set_defaults(func=command_pageweight)
+
+    router = commands.add_parser("router", help="路由匹配与分派开销: 顺序if判断与预编译路由表随路由数量的变化")
+    router.add_argument("--routes", default="8,100,1000")
+    router.add_argument("--repeat", type=int, default=200000)
+    router.set_defaults(func=command_router)
+
+    metrics = commands.add_parser("metrics", help="每个请求的指标记录开销，以及同步写日志与异步/采样访问日志的对比")
+    metrics.add_argument("--repeat", type=int, default=100000)
+    metrics.set_defaults(func=command_metrics)
+
+    scaling = commands.add_parser("scaling", help="单进程线程池与多进程(prefork)在CPU密集路由上的吞吐随进程数的变化")
+    scaling.add_argument("--processes", default="1,2,4")
+    scaling.add_argument("--path", default="/api/search/tool%201")
+    scaling.add_argument("--concurrency", type=int, default=32)
+    scaling.add_argument("--duration", type=float, default=5.0)
+    scaling.add_argument("--catalog-size", type=int, default=2000)
+    scaling.add_argument("--workers", type=int, default=8)
+    scaling.add_argument("--backlog", type=int, default=128)
+    scaling.set_defaults(func=command_scaling)
+
+    resilience = commands.add_parser("resilience", help="PocketBase故障时熔断器的效果，以及过载时快速拒绝与排队的延迟对比")
+    resilience.add_argument("--duration", type=float, default=5.0)
+    resilience.add_argument("--concurrency", type=int, default=16)
+    resilience.add_argument("--catalog-size", type=int, default=200)
+    resilience.add_argument("--read-timeout", type=float, default=1.0)
+    resilience.add_argument("--outage-latency", type=float, default=30.0)
+    resilience.add_argument("--slow-ms", type=float, default=50.0)
+    resilience.add_argument("--workers", type=int, default=16)
+    resilience.add_argument("--backlog", type=int, default=128)
+    resilience.add_argument("--shed-workers", type=int, default=4)
+    resilience.set_defaults(func=command_resilience)
+
+    ratelimit = commands.add_parser("ratelimit", help="令牌桶限流的每请求开销，以及单个抓取者被限流时的429延迟与上游请求数")
+    ratelimit.add_argument("--repeat", type=int, default=200000)
+    ratelimit.add_argument("--clients", type=int, default=100000)
+    ratelimit.add_argument("--max-clients", type=int, default=10000)
+    ratelimit.add_argument("--budget", default="10/30")
+    ratelimit.add_argument("--duration", type=float, default=3.0)
+    ratelimit.add_argument("--catalog-size", type=int, default=200)
+    ratelimit.set_defaults(func=command_ratelimit)
+
+    pagination = commands.add_parser("pagination", help="offset与键集(after/limit)分页的深翻页耗时，以及 fields 投影后的响应大小")
+    pagination.add_argument("--sizes", default="10000,100000")
+    pagination.add_argument("--limit", type=int, default=50)
+    pagination.add_argument("--repeat", type=int, default=200)
+    pagination.add_argument("--catalog-size", type=int, default=2000)
+    pagination.add_argument("--fields", default="id,name,description,url,category,tags")
+    pagination.set_defaults(func=command_pagination)
+
+    suite = commands.add_parser("suite", help="对主页与各API路由做并发压测，报告吞吐、延迟分位数与RSS并保存为JSON")
+    suite.add_argument("--paths", default="/,/api/tools,/api/tools/category/coding,/api/search/tool")
+    suite.add_argument("--concurrency", default="1,16,64")
+    suite.add_argument("--duration", type=float, default=5.0)
+    suite.add_argument("--mode", default="pool", help="服务器并发模式(single/threading/pool/prefork)")
+    suite.add_argument("--processes", type=int, default=2, help="prefork 模式的工作进程数")
+    suite.add_argument("--workers", type=int, default=32)
+    suite.add_argument("--backlog", type=int, default=128)
+    suite.add_argument("--catalog-size", type=int, default=1000)
+    suite.add_argument("--latency-ms", type=float, default=5.0)
+    suite.add_argument("--error-rate", type=float, default=0.0)
+    suite.add_argument("--output", help="把结果写入JSON文件")
+    suite.add_argument("--compare", help="与之前保存的JSON结果对比，有退化时以状态码1退出")
+    suite.add_argument("--threshold", type=float, default=0.1, help="吞吐下降或p99上升超过该比例视为退化")
+    suite.set_defaults(func=command_suite)
+
+    fake = commands.add_parser("fake-pocketbase", help="单独运行PocketBase替身")
+    fake.add_argument("--host", default="127.0.0.1")
+    fake.add_argument("--port", type=int, default=8090)
+    fake.add_argument("--latency-ms", type=float, default=0.0)
+    fake.add_argument("--catalog-size", type=int, default=100)
+    fake.add_argument("--no-batch-api", action="store_true", help="模拟没有 /api/batch 的旧版本")
+    fake.add_argument("--error-rate", type=float, default=0.0, help="读接口返回500的比例(0~1)")
+    fake.set_defaults(func=command_fake_pocketbase)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
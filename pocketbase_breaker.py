@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+上游熔断器 - 按PocketBase接口统计最近调用的错误率，错误率过高时暂停调用该接口，
+到期后只放行一个探测请求(半开)，探测成功才恢复
+"""
+
+import threading
+import time
+from collections import deque
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# /metrics 中熔断状态的数值表示
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    熔断期间的调用被直接拒绝；retry_after 为距下次允许探测的秒数
+    """
+
+    def __init__(self, endpoint, retry_after):
+        super().__init__(f"PocketBase接口 {endpoint} 已熔断，{retry_after:.1f}s 后重试")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "failures", "opened_at", "open_for", "probing", "trips", "rejected")
+
+    def __init__(self, window):
+        self.state = CLOSED
+        # 最近 window 次调用的结果，True 为失败
+        self.outcomes = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_for = 0.0
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+
+class CircuitBreaker:
+    """
+    按接口(key_func(url) 的结果)独立熔断
+
+    最近 window 次调用中至少有 min_calls 次、且失败比例达到 error_rate 时熔断 reset_timeout 秒；
+    此后的第一个调用作为探测放行，其余调用仍被拒绝。探测成功则清空统计恢复正常，
+    失败则再次熔断，熔断时长翻倍(不超过 max_reset_timeout)。
+    失败指连接错误、超时与5xx响应；4xx说明PocketBase本身可用，不计为失败。
+    """
+
+    def __init__(self, key_func=None, window=20, min_calls=5, error_rate=0.5,
+                 reset_timeout=5.0, max_reset_timeout=60.0, clock=time.monotonic):
+        self.key_func = key_func or (lambda url: url)
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits.setdefault(key, _Circuit(self.window))
+        return circuit
+
+    def before(self, url):
+        """
+        调用前检查，返回接口键；熔断中抛出 CircuitOpenError
+        """
+        key = self.key_func(url)
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit.state == CLOSED:
+                return key
+            remaining = circuit.opened_at + circuit.open_for - self.clock()
+            if circuit.state == OPEN and remaining <= 0:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return key
+            circuit.rejected += 1
+        raise CircuitOpenError(key, max(remaining, 0.0))
+
+    def record(self, key, failed):
+        """
+        记录一次调用的结果
+        """
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit.state == HALF_OPEN:
+                circuit.probing = False
+                if failed:
+                    self._trip(circuit, min(self.max_reset_timeout, circuit.open_for * 2))
+                else:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                    circuit.failures = 0
+                return
+            if circuit.state == OPEN:
+                # 熔断前已发出的调用，结果不再影响状态
+                return
+            if len(circuit.outcomes) == circuit.outcomes.maxlen and circuit.outcomes[0]:
+                circuit.failures -= 1
+            circuit.outcomes.append(failed)
+            circuit.failures += failed
+            calls = len(circuit.outcomes)
+            if calls >= self.min_calls and circuit.failures >= self.error_rate * calls:
+                self._trip(circuit, self.reset_timeout)
+
+    def _trip(self, circuit, open_for):
+        circuit.state = OPEN
+        circuit.opened_at = self.clock()
+        circuit.open_for = open_for
+        circuit.trips += 1
+
+    def retry_after(self, key):
+        """
+        接口 key 熔断中(含半开)时返回距其恢复探测的秒数，未熔断时返回 None；
+        其他接口的熔断状态不影响结果
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == CLOSED:
+                return None
+            return max(0.0, circuit.opened_at + circuit.open_for - self.clock())
+
+    def stats(self):
+        """
+        每个接口的状态、窗口内失败数/调用数、熔断次数与被拒绝的调用数
+        """
+        with self._lock:
+            return {
+                key: {
+                    "state": circuit.state,
+                    "failures": circuit.failures,
+                    "calls": len(circuit.outcomes),
+                    "trips": circuit.trips,
+                    "rejected": circuit.rejected
+                }
+                for key, circuit in self._circuits.items()
+            }
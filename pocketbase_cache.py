@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+工具列表响应缓存 - TTL + LRU + stale-while-revalidate，缓存预序列化的JSON响应
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，没有时只提供gzip
+    brotli = None
+
+
+# get_or_load 返回的缓存状态
+CACHE_HIT = "HIT"
+CACHE_MISS = "MISS"
+CACHE_STALE = "STALE"
+
+
+def make_cache_key(endpoint, params=None):
+    """
+    由接口名和参数生成缓存键，参数顺序与多余空白不影响结果
+    """
+    if not params:
+        return (endpoint,)
+    normalized = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, (list, tuple)):
+            value = tuple(sorted(str(v).strip() for v in value))
+        else:
+            value = str(value).strip()
+        normalized.append((name, value))
+    return (endpoint,) + tuple(normalized)
+
+
+def parse_pocketbase_time(value):
+    """
+    解析PocketBase的时间字符串，如 "2024-01-01 00:00:00.000Z"
+    """
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+# 小于该字节数的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+
+
+def compress_variants(body, gzip_level=9, brotli_quality=11):
+    """
+    预先生成 gzip / br 压缩版本，只保留确实更小的版本
+    """
+    variants = {}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+    compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    if len(compressed) < len(body):
+        variants["gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=brotli_quality)
+        if len(compressed) < len(body):
+            variants["br"] = compressed
+    return variants
+
+
+def parse_accept_encoding(header):
+    """
+    解析 Accept-Encoding，返回 {编码: q值}
+    """
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class EncodedBody:
+    """
+    响应字节及其预压缩版本，请求时只做内容协商，不做压缩
+    """
+
+    __slots__ = ("body", "variants")
+
+    # 同样可接受时按此顺序优先
+    PREFERENCE = ("br", "gzip")
+
+    def __init__(self, body, gzip_level=9, brotli_quality=11):
+        self.body = body
+        self.variants = compress_variants(body, gzip_level, brotli_quality)
+
+    def select(self, accept_encoding):
+        """
+        按 Accept-Encoding 选择版本，返回 (Content-Encoding 或 None, 字节)
+        """
+        if self.variants:
+            accepted = parse_accept_encoding(accept_encoding)
+            wildcard = accepted.get("*", 0.0)
+            best, best_quality = None, 0.0
+            for coding in self.PREFERENCE:
+                quality = accepted.get(coding, wildcard)
+                if coding in self.variants and quality > best_quality:
+                    best, best_quality = coding, quality
+            if best is not None:
+                return best, self.variants[best]
+        return None, self.body
+
+
+class RenderedJson:
+    """
+    已渲染好的JSON响应体及其中最新的 updated 时间，JsonPayload 直接使用而不再序列化
+    """
+
+    __slots__ = ("body", "latest_updated")
+
+    def __init__(self, body, latest_updated=""):
+        self.body = body
+        self.latest_updated = latest_updated
+
+
+class JsonPayload(EncodedBody):
+    """
+    预序列化的JSON响应：原始数据、UTF-8字节及其压缩版本、强ETag与Last-Modified
+
+    data 为响应字典，或由内存目录直接渲染好的 RenderedJson。
+    ETag 是响应字节的哈希；Last-Modified 取所有记录中最新的 updated 时间。
+    每个数据版本只序列化、压缩一次（在缓存加载或后台刷新时完成）。
+    """
+
+    __slots__ = ("data", "etag", "last_modified")
+
+    def __init__(self, data):
+        self.data = data
+        if isinstance(data, RenderedJson):
+            body, latest = data.body, data.latest_updated
+        else:
+            body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            latest = max((item.get("updated") or "" for item in data.get("items", ())), default="")
+        # 动态数据用较低的brotli质量，避免大目录刷新时耗时过长
+        super().__init__(body, gzip_level=6, brotli_quality=5)
+        self.etag = '"%s"' % hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        modified = parse_pocketbase_time(latest)
+        self.last_modified = format_datetime(modified, usegmt=True) if modified else None
+
+    @classmethod
+    def loader(cls, load):
+        """
+        把返回数据的 load() 包装为返回 JsonPayload 的加载函数，供 ResponseCache 使用
+        """
+        def build():
+            data = load()
+            return None if data is None else cls(data)
+        return build
+
+    def etag_for(self, encoding=None):
+        """
+        每种内容编码是不同的表示，强ETag需要区分，如 "abc-gzip"
+        """
+        if not encoding:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+    def not_modified(self, if_none_match=None, if_modified_since=None):
+        """
+        条件请求判断；有 If-None-Match 时忽略 If-Modified-Since (RFC 9110)
+        """
+        if if_none_match:
+            # If-None-Match 使用弱比较，忽略 W/ 前缀；任一编码表示的ETag都算匹配
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+            if "*" in tags:
+                return True
+            return any(self.etag_for(encoding) in tags for encoding in (None,) + tuple(self.variants))
+        if if_modified_since and self.last_modified:
+            try:
+                return parsedate_to_datetime(self.last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """
+    有界LRU响应缓存
+
+    - 新鲜期(ttl)内直接命中
+    - 过期后的 stale_while_revalidate 秒内先返回旧值，并在后台刷新；
+      同一个键同时最多只有一个后台刷新
+    - 加载失败(loader 返回 None 或抛异常)时，只要还有旧值就返回旧值
+    - 加载期间发生过 invalidate 时，加载结果只返回给本次调用方、不写入缓存，
+      避免失效前开始的加载把旧数据当作新鲜值再缓存一个TTL
+    - 传入 single_flight 时，同一键、同一失效代次的并发加载合并为一次；
+      失效之后到达的请求不会加入失效之前开始的加载
+    """
+
+    def __init__(self, ttl=60.0, stale_while_revalidate=600.0, max_entries=256, clock=time.monotonic,
+                 single_flight=None):
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self.clock = clock
+        self.single_flight = single_flight
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        # 每次 invalidate 加一；加载开始与结束时不同说明结果可能早于失效
+        self._generation = 0
+        self._stats = {
+            "hits": 0, "misses": 0, "stale": 0, "stale_errors": 0,
+            "refreshes": 0, "refresh_errors": 0, "evictions": 0, "discarded": 0
+        }
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def _count(self, name):
+        self._stats[name] += 1
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            if generation != self._generation:
+                self._count("discarded")
+                return
+            self._entries[key] = CacheEntry(value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._count("evictions")
+
+    def _load(self, key, loader, generation, propagate=()):
+        try:
+            if self.single_flight is None:
+                return loader()
+            # 合并键带上代次: 结果只会写回它开始时的代次，失效后的请求另起一次加载
+            return self.single_flight.do((key, generation), loader)
+        except propagate:
+            raise
+        except Exception as e:
+            print(f"❌ 缓存加载异常: {str(e)}")
+            return None
+
+    def _refresh(self, key, loader, generation):
+        try:
+            value = self._load(key, loader, generation)
+            if value is None:
+                with self._lock:
+                    self._count("refresh_errors")
+            else:
+                self._store(key, value, generation)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_load(self, key, loader, propagate=()):
+        """
+        返回 (value, state)，state 为 HIT / MISS / STALE；无可用数据时 value 为 None
+
+        loader 抛出的 propagate 中的异常（请求本身无效，而非上游故障）原样抛给调用方，
+        不退回旧值
+        """
+        if not self.enabled:
+            return self._load(key, loader, self._generation, propagate), CACHE_MISS
+
+        serve_stale = False
+        start_refresh = False
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = self.clock() - entry.stored_at
+                if age < self.ttl:
+                    self._count("hits")
+                    return entry.value, CACHE_HIT
+                serve_stale = age < self.ttl + self.stale_while_revalidate
+            if serve_stale:
+                self._count("stale")
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._count("refreshes")
+                    start_refresh = True
+            else:
+                self._count("misses")
+
+        if serve_stale:
+            # 在 stale-while-revalidate 窗口内: 立即返回旧值，同一键只启动一个后台刷新
+            if start_refresh:
+                threading.Thread(
+                    target=self._refresh, args=(key, loader, generation), name="pb-cache-refresh", daemon=True
+                ).start()
+            return entry.value, CACHE_STALE
+
+        value = self._load(key, loader, generation, propagate)
+        if value is not None:
+            self._store(key, value, generation)
+            return value, CACHE_MISS
+        if entry is not None:
+            # PocketBase不可用时退回旧数据，而不是返回500
+            with self._lock:
+                self._count("stale_errors")
+            return entry.value, CACHE_STALE
+        return None, CACHE_MISS
+
+    def invalidate(self, key=None):
+        """
+        删除一个键；key 为 None 时清空全部。同时让所有在途加载的结果不再写入缓存
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["entries"] = len(self._entries)
+        lookups = data["hits"] + data["misses"] + data["stale"]
+        data["hit_ratio"] = round((data["hits"] + data["stale"]) / lookups, 4) if lookups else 0.0
+        return data
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+AI工具目录的内存副本，以及基于PocketBase实时订阅(SSE)的增量同步
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+
+from pocketbase_cache import RenderedJson
+from pocketbase_store import ToolStore
+
+
+def filter_literal(value):
+    """
+    把值写成PocketBase过滤表达式中的单引号字符串，转义反斜杠与单引号；
+    用户输入（已URL解码的路径参数等）因此无法闭合引号、拼接出 || 等额外条件
+    """
+    text = str(value).replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{text}'"
+
+
+class CatalogResetError(RuntimeError):
+    """
+    逐块读取目录期间目录被整表重载，已产出的记录与之后的记录不属于同一份目录
+    """
+
+
+class ToolCatalog:
+    """
+    ai_tools 集合的内存副本
+
+    记录按行号存放在列式的 ToolStore 中，删除后的行号留空并复用，变更时递增 version
+    并通知监听器。读取时按需物化为字典；全量/按类别的列表响应直接由列数据渲染JSON。
+    监听器签名: listener(action, record, previous)，整表重载时 action 为 "reset"。
+    """
+
+    def __init__(self):
+        self._store = ToolStore()
+        self._row_of = {}
+        self._free_rows = []
+        self._lock = threading.RLock()
+        self._listeners = []
+        self.version = 0
+        # 整表重载(replace_all)的次数，iter_records 据此判断迭代期间目录是否被整体替换
+        self.generation = 0
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, action, record, previous):
+        for listener in self._listeners:
+            try:
+                listener(action, record, previous)
+            except Exception as e:
+                print(f"❌ 目录监听器异常: {str(e)}")
+
+    def replace_all(self, records):
+        """
+        用完整列表替换目录（首次加载，或重连时目录为空的全量重载）
+        """
+        with self._lock:
+            self._store.clear()
+            self._row_of = {}
+            self._free_rows = []
+            for record in records:
+                self._row_of[record["id"]] = self._store.append(record)
+            self.version += 1
+            self.generation += 1
+            self.loaded = True
+            self._notify("reset", None, None)
+
+    def upsert(self, record):
+        """
+        新增或更新一条记录；比已有版本更旧的记录(按 updated)会被忽略
+        """
+        with self._lock:
+            row = self._row_of.get(record["id"])
+            if row is not None and record.get("updated", "") < self._store.updated(row):
+                return False
+            previous = self._store.get(row) if row is not None else None
+            if row is None:
+                if self._free_rows:
+                    row = self._free_rows.pop()
+                    self._store.set(row, record)
+                else:
+                    row = self._store.append(record)
+                self._row_of[record["id"]] = row
+            else:
+                self._store.set(row, record)
+            self.version += 1
+            self._notify("update" if previous is not None else "create", record, previous)
+            return True
+
+    def delete(self, record_id):
+        with self._lock:
+            row = self._row_of.pop(record_id, None)
+            if row is None:
+                return False
+            previous = self._store.get(row)
+            self._store.delete(row)
+            self._free_rows.append(row)
+            self.version += 1
+            self._notify("delete", None, previous)
+            return True
+
+    def apply_event(self, action, record):
+        """
+        应用一条实时事件: create / update / delete
+        """
+        if action == "delete":
+            return self.delete(record["id"])
+        if action in ("create", "update"):
+            return self.upsert(record)
+        return False
+
+    def get(self, record_id):
+        with self._lock:
+            row = self._row_of.get(record_id)
+            return self._store.get(row) if row is not None else None
+
+    def records(self):
+        """
+        返回当前全部记录的列表快照
+        """
+        with self._lock:
+            return [self._store.get(row) for row in self._store.rows()]
+
+    def snapshot(self, then):
+        """
+        持锁取得全部记录（目录未加载时为 None）并返回 then(records) 的结果；then 返回前不会有新的变更，
+        用于把"当前目录 + 之后的每条变更"无缝交给其他消费者
+        """
+        with self._lock:
+            return then([self._store.get(row) for row in self._store.rows()] if self.loaded else None)
+
+    def head(self, count):
+        """
+        按目录顺序返回前 count 条记录，连同读取时的 version 与总条数: (version, total, records)
+        """
+        with self._lock:
+            records = [self._store.get(row) for row in itertools.islice(self._store.rows(), count)]
+            return self.version, len(self._row_of), records
+
+    def ids(self):
+        with self._lock:
+            return set(self._row_of)
+
+    def latest_updated(self):
+        """
+        目录中最新的 updated 时间，作为增量同步的水位
+        """
+        with self._lock:
+            return self._store.latest_updated(self._store.rows())
+
+    def iter_records(self, chunk_size=512):
+        """
+        逐条产出记录而不复制整个列表：每次持锁物化 chunk_size 行，产出时不持锁
+
+        每一行都在锁内完整读出；块与块之间的单条增删改可能部分可见。
+        迭代期间目录被整表重载时抛出 CatalogResetError，而不是混入新旧两份目录的记录。
+        """
+        with self._lock:
+            generation = self.generation
+        row = 0
+        while True:
+            with self._lock:
+                if self.generation != generation:
+                    raise CatalogResetError("读取期间目录已整表重载")
+                end = min(row + chunk_size, len(self._store))
+                chunk = [self._store.get(index) for index in range(row, end)]
+            if row >= end:
+                return
+            for record in chunk:
+                if record is not None:
+                    yield record
+            row = end
+
+    def render(self, rows, fields=None):
+        """
+        由列数据直接渲染列表响应
+        """
+        with self._lock:
+            return RenderedJson(self._store.render_list(rows, fields), self._store.latest_updated(rows))
+
+    def as_response(self, records=None, fields=None):
+        """
+        以PocketBase列表接口的格式返回记录；不传 records 时返回整个目录的预渲染响应，
+        fields 限定其中每条记录的字段
+        """
+        if records is None:
+            with self._lock:
+                return self.render(list(self._store.rows()), fields)
+        return {
+            "page": 1,
+            "perPage": len(records),
+            "totalItems": len(records),
+            "totalPages": 1,
+            "items": records
+        }
+
+    def by_category(self, category):
+        with self._lock:
+            return self.render([row for row in self._store.rows() if self._store.category_of(row) == category])
+
+
+def iter_sse_events(lines):
+    """
+    把SSE文本行解析为 (event, data, id) 元组
+    """
+    event, data, event_id = "message", [], None
+    for line in lines:
+        if line is None:
+            continue
+        if line == "":
+            if data:
+                yield event, "\n".join(data), event_id
+            event, data, event_id = "message", [], None
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+        elif field == "id":
+            event_id = value
+
+
+class RealtimeSubscriber:
+    """
+    订阅 /api/realtime 上的 ai_tools 记录事件，增量修补 ToolCatalog
+
+    每次(重新)连接后都先同步一次，用来弥补断线期间可能丢失的事件：目录为空时全量重载，
+    已有数据(例如从磁盘快照载入)时只做增量同步；连接失败按指数退避(带抖动)重试。
+    """
+
+    def __init__(self, pb_client, catalog, collection="ai_tools",
+                 min_backoff=0.5, max_backoff=30.0, read_timeout=330.0):
+        self.pb_client = pb_client
+        self.catalog = catalog
+        self.collection = collection
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.read_timeout = read_timeout
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"connects": 0, "resyncs": 0, "delta_syncs": 0, "events": 0, "failures": 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="pb-realtime", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        请求停止订阅；阻塞在流读取上的后台线程会在下一个事件或读超时后退出
+        """
+        self._stop.set()
+
+    def resync(self):
+        """
+        同步目录：已有数据时增量同步，否则全量重载
+        """
+        if self.catalog.loaded and len(self.catalog):
+            self.delta_sync()
+            return
+        data = self.pb_client.get_all_tools()
+        if data is None:
+            raise RuntimeError("全量重载失败")
+        self.catalog.replace_all(data.get("items", []))
+        self.stats["resyncs"] += 1
+
+    def delta_sync(self):
+        """
+        增量同步: 拉取 updated 不早于水位的记录，再对比全部id找出已删除的记录
+
+        水位处用 >= 而不是 >，同一毫秒内更新的其他记录不会漏掉；
+        已有的相同版本重复应用无副作用。
+        """
+        watermark = self.catalog.latest_updated()
+        changed = 0
+        for items in self.pb_client.iter_tool_pages(filter=f"updated>={filter_literal(watermark)}"):
+            for record in items:
+                if self.catalog.get(record["id"]) != record:
+                    changed += bool(self.catalog.upsert(record))
+        upstream_ids = set()
+        for items in self.pb_client.iter_tool_pages(fields="id"):
+            upstream_ids.update(item["id"] for item in items)
+        deleted = 0
+        for record_id in self.catalog.ids() - upstream_ids:
+            deleted += bool(self.catalog.delete(record_id))
+        self.stats["delta_syncs"] += 1
+        print(f"🔄 目录增量同步: 水位 {watermark}，更新 {changed} 条，删除 {deleted} 条")
+
+    def _subscribe(self, client_id):
+        response = self.pb_client.http.post(
+            f"{self.pb_client.pocketbase_url}/api/realtime",
+            json={"clientId": client_id, "subscriptions": [self.collection]}
+        )
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"订阅失败: {response.text}")
+
+    def _listen(self):
+        response = self.pb_client.http.get(
+            f"{self.pb_client.pocketbase_url}/api/realtime",
+            stream=True,
+            timeout=(self.pb_client.http.timeout[0], self.read_timeout),
+            headers={"Accept": "text/event-stream"}
+        )
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"实时连接失败: HTTP {response.status_code}")
+            # text/event-stream 固定为UTF-8，requests 默认会按 ISO-8859-1 解码
+            response.encoding = "utf-8"
+            lines = response.iter_lines(chunk_size=None, decode_unicode=True)
+            for event, data, _ in iter_sse_events(lines):
+                if self._stop.is_set():
+                    return
+                payload = json.loads(data)
+                if event == "PB_CONNECT":
+                    self._subscribe(payload["clientId"])
+                    self.stats["connects"] += 1
+                    # 订阅后再全量重载，断线期间的变更不会丢失
+                    self.resync()
+                    print(f"🔄 PocketBase实时订阅已建立，目录 {len(self.catalog)} 条")
+                elif event == self.collection or event.startswith(self.collection + "/"):
+                    self.catalog.apply_event(payload.get("action"), payload.get("record") or {})
+                    self.stats["events"] += 1
+        finally:
+            response.close()
+
+    def _run(self):
+        backoff = self.min_backoff
+        while not self._stop.is_set():
+            connected_at = time.monotonic()
+            try:
+                self._listen()
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                self.stats["failures"] += 1
+                print(f"⚠️ PocketBase实时连接中断: {str(e)}")
+            # 连接维持过一段时间后视为恢复正常，退避从头开始
+            if time.monotonic() - connected_at > self.max_backoff:
+                backoff = self.min_backoff
+            self._stop.wait(backoff * (0.5 + random.random()))
+            backoff = min(self.max_backoff, backoff * 2)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+AI工具分面索引 - 类别/标签/语言倒排 + 免费/推荐位图
+"""
+
+import threading
+
+
+# 多值分面: 分面名 -> 记录字段（逗号分隔的文本字段会被拆分）
+FACET_FIELDS = {"category": "category", "tags": "tags", "language": "language_support"}
+
+# 布尔分面: 分面名 -> 记录字段
+FLAG_FIELDS = {"is_free": "is_free", "is_featured": "is_featured"}
+
+
+def split_values(value):
+    """
+    把 "zh,en" 这样的逗号分隔文本拆分为去重后的小写值列表
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(",")
+    return sorted({str(part).strip().lower() for part in parts if str(part).strip()})
+
+
+def iter_bits(bits):
+    """
+    按从低到高的顺序产出位图中被置位的位置
+    """
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield offset * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+class FacetIndex:
+    """
+    以Python大整数作为位图的分面索引
+
+    每条记录占一个位，分面值 -> 位图；组合查询只做位运算，
+    各分面计数是结果位图与分面值位图相与后的置位数。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._bit_of = {}
+        self._id_at = []
+        self._free_bits = []
+        self._all = 0
+        self._values = {facet: {} for facet in FACET_FIELDS}
+        self._flags = {flag: 0 for flag in FLAG_FIELDS}
+        self._record_values = {}
+
+    def __len__(self):
+        return len(self._bit_of)
+
+    def add(self, record):
+        with self._lock:
+            record_id = record["id"]
+            if record_id in self._bit_of:
+                self.remove(record_id)
+            if self._free_bits:
+                bit = self._free_bits.pop()
+                self._id_at[bit] = record_id
+            else:
+                bit = len(self._id_at)
+                self._id_at.append(record_id)
+            self._bit_of[record_id] = bit
+            mask = 1 << bit
+            self._all |= mask
+            values = {}
+            for facet, field in FACET_FIELDS.items():
+                values[facet] = split_values(record.get(field))
+                index = self._values[facet]
+                for value in values[facet]:
+                    index[value] = index.get(value, 0) | mask
+            for flag, field in FLAG_FIELDS.items():
+                if record.get(field):
+                    self._flags[flag] |= mask
+            self._record_values[record_id] = values
+
+    def remove(self, record_id):
+        with self._lock:
+            bit = self._bit_of.pop(record_id, None)
+            if bit is None:
+                return
+            mask = 1 << bit
+            self._all &= ~mask
+            for facet, values in self._record_values.pop(record_id).items():
+                index = self._values[facet]
+                for value in values:
+                    remaining = index[value] & ~mask
+                    if remaining:
+                        index[value] = remaining
+                    else:
+                        del index[value]
+            for flag in self._flags:
+                self._flags[flag] &= ~mask
+            self._id_at[bit] = None
+            self._free_bits.append(bit)
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            for record in records:
+                self.add(record)
+
+    def attach(self, catalog):
+        """
+        挂到 ToolCatalog 上，随目录变更增量更新
+        """
+        def listener(action, record, previous):
+            if action == "reset":
+                self.rebuild(catalog.iter_records())
+            elif action == "delete":
+                self.remove(previous["id"])
+            else:
+                self.add(record)
+
+        catalog.add_listener(listener)
+        if catalog.loaded:
+            self.rebuild(catalog.iter_records())
+        return self
+
+    def select(self, selections, match="all"):
+        """
+        按分面筛选，返回 (匹配的记录id列表, 各分面计数)
+
+        selections: {"category": [...], "tags": [...], "language": [...],
+                     "is_free": bool, "is_featured": bool}
+        同一分面内的多个值取并集(OR)；不同分面之间 match="all" 取交集(AND)，
+        match="any" 取并集(OR)。
+        """
+        with self._lock:
+            filters = []
+            for facet in FACET_FIELDS:
+                wanted = split_values(selections.get(facet))
+                if wanted:
+                    bits = 0
+                    for value in wanted:
+                        bits |= self._values[facet].get(value, 0)
+                    filters.append(bits)
+            for flag in FLAG_FIELDS:
+                wanted = selections.get(flag)
+                if wanted is not None:
+                    bits = self._flags[flag]
+                    filters.append(bits if wanted else self._all & ~bits)
+
+            if not filters:
+                result = self._all
+            elif match == "any":
+                result = 0
+                for bits in filters:
+                    result |= bits
+            else:
+                result = self._all
+                for bits in filters:
+                    result &= bits
+
+            counts = {
+                facet: {value: n for value, n in
+                        ((value, popcount(result & bits)) for value, bits in sorted(index.items())) if n}
+                for facet, index in self._values.items()
+            }
+            for flag, bits in self._flags.items():
+                counts[flag] = popcount(result & bits)
+            ids = [self._id_at[bit] for bit in iter_bits(result)]
+        return ids, counts
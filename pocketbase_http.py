@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+PocketBase HTTP会话层 - 连接池、超时与幂等读重试
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 只有幂等方法才允许自动重试
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+
+class HttpStats:
+    """
+    线程安全的计数器集合
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "errors": 0}
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+class CountingRetry(Retry):
+    """
+    每次重试都计数的 Retry，urllib3 会在每次重试时通过 new() 复制对象
+    """
+
+    def __init__(self, *args, stats=None, **kwargs):
+        self.stats = stats
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.stats = self.stats
+        return retry
+
+    def increment(self, *args, **kwargs):
+        # 重试次数耗尽时 super().increment 会抛出异常，此时不计为一次重试
+        retry = super().increment(*args, **kwargs)
+        if self.stats is not None:
+            self.stats.incr("retries")
+        return retry
+
+
+class PooledSession:
+    """
+    可在多个处理线程间共享的keep-alive会话
+
+    每个线程持有自己的 requests.Session（Session 本身不保证线程安全），
+    但所有 Session 挂载同一个 HTTPAdapter，因此共用同一个 urllib3 连接池。
+    observer(method, url, status, seconds) 在每次请求结束后调用，异常时 status 为 "error"。
+    breaker 为 CircuitBreaker 时，熔断中的接口直接抛出 CircuitOpenError，不占用连接与线程时间。
+    """
+
+    def __init__(self, pool_size=32, connect_timeout=3.05, read_timeout=10.0,
+                 retries=2, backoff_factor=0.2, observer=None, breaker=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.stats = HttpStats()
+        self.observer = observer
+        self.breaker = breaker
+        retry = CountingRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+            stats=self.stats
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            pool_block=False,
+            max_retries=retry
+        )
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self.adapter)
+            session.mount("https://", self.adapter)
+            self._local.session = session
+        return session
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """
+        发送请求；timeout 可为单个秒数或 (connect, read) 元组，缺省使用会话配置
+        """
+        circuit = self.breaker.before(url) if self.breaker is not None else None
+        self.stats.incr("requests")
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = self._session().request(method, url, timeout=timeout or self.timeout, **kwargs)
+            status = response.status_code
+            return response
+        except requests.RequestException:
+            self.stats.incr("errors")
+            raise
+        finally:
+            if circuit is not None:
+                self.breaker.record(circuit, status == "error" or status >= 500)
+            if self.observer is not None:
+                self.observer(method, url, status, time.perf_counter() - started)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def pool_stats(self):
+        """
+        汇总连接池中新建与复用的连接数
+        """
+        opened = 0
+        used = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            used += pool.num_requests
+        return {"connections_opened": opened, "connections_reused": max(0, used - opened)}
+
+    def snapshot(self):
+        """
+        返回请求、重试、错误与连接复用计数
+        """
+        data = self.stats.snapshot()
+        data.update(self.pool_stats())
+        return data
+
+    def close(self):
+        self.adapter.close()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+ai_tools 批量导入 - 流式读取JSON/CSV/NDJSON，按 url/name 幂等upsert，
+优先使用PocketBase批量接口(/api/batch)，不支持时退回有界并发的逐条请求
+
+用法:
+    python pocketbase_import.py tools.ndjson --workers 16 --batch-size 100
+"""
+
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from pocketbase_catalog import filter_literal
+
+
+# ai_tools 的可写字段及其类型，与 create_collections 中的表结构一致
+TOOL_FIELDS = {
+    "name": "text",
+    "description": "text",
+    "url": "url",
+    "category": "text",
+    "rating": "number",
+    "is_free": "bool",
+    "is_featured": "bool",
+    "language_support": "text",
+    "tags": "text"
+}
+
+# 文件扩展名 -> 格式
+IMPORT_FORMATS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+RECORDS_PATH = "/api/collections/ai_tools/records"
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on", "y")
+
+
+def normalize_tool(raw):
+    """
+    只保留表结构中的字段并转换类型；CSV中的空单元格视为缺省
+    """
+    tool = {}
+    for field, kind in TOOL_FIELDS.items():
+        value = raw.get(field)
+        if value is None or value == "":
+            continue
+        if kind == "number":
+            value = float(value)
+        elif kind == "bool":
+            value = parse_bool(value)
+        elif isinstance(value, (list, tuple)):
+            value = ",".join(str(part).strip() for part in value)
+        else:
+            value = str(value).strip()
+        tool[field] = value
+    tool.setdefault("is_free", False)
+    return tool
+
+
+def tool_keys(record):
+    """
+    upsert匹配键: 规范化后的 url 与 name，任一命中即视为同一工具
+    """
+    keys = []
+    url = str(record.get("url") or "").strip().lower().rstrip("/")
+    if url:
+        keys.append(("url", url))
+    name = str(record.get("name") or "").strip().lower()
+    if name:
+        keys.append(("name", name))
+    return keys
+
+
+def detect_format(path):
+    fmt = IMPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"无法识别的文件格式: {path} (可选: {', '.join(sorted(IMPORT_FORMATS))})")
+    return fmt
+
+
+def iter_tool_file(path, fmt=None):
+    """
+    逐条产出文件中的工具记录；NDJSON与CSV按行流式读取，
+    JSON 为数组或 {"items": [...]}，需要整体解析
+    """
+    fmt = fmt or detect_format(path)
+    with open(path, encoding="utf-8-sig", newline="") as handle:
+        if fmt == "ndjson":
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        elif fmt == "csv":
+            yield from csv.DictReader(handle)
+        elif fmt == "json":
+            data = json.load(handle)
+            yield from (data.get("items", []) if isinstance(data, dict) else data)
+        else:
+            raise ValueError(f"未知的导入格式: {fmt}")
+
+
+class ImportProgress:
+    """
+    线程安全的导入计数，按固定间隔打印进度与吞吐
+    """
+
+    def __init__(self, interval=2.0, quiet=False):
+        self.interval = interval
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._counts = {"read": 0, "created": 0, "updated": 0, "unchanged": 0,
+                        "duplicates": 0, "failed": 0, "requests": 0}
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._counts)
+        data["seconds"] = round(time.perf_counter() - self.started, 3)
+        written = data["created"] + data["updated"]
+        data["records_per_second"] = round(written / data["seconds"], 1) if data["seconds"] else 0.0
+        return data
+
+    def maybe_report(self, force=False):
+        if self.quiet:
+            return
+        now = time.perf_counter()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        data = self.snapshot()
+        print(f"📦 已读取 {data['read']} | 新增 {data['created']} | 更新 {data['updated']} | "
+              f"未变 {data['unchanged']} | 失败 {data['failed']} | {data['records_per_second']} 条/秒")
+
+
+class ToolImporter:
+    """
+    ai_tools 幂等批量导入
+
+    先逐页读取现有记录建立 url/name -> 记录 的映射，之后每条输入记录:
+    内容未变则跳过、已存在则 PATCH、否则 POST。写请求按 batch_size 分组，
+    优先以一次 /api/batch 请求提交（PocketBase >= 0.23 且开启了批量接口），
+    否则退回逐条请求；最多 workers 组同时在途，读取文件的速度受此约束。
+    """
+
+    def __init__(self, pb_client, workers=8, batch_size=50, use_batch=True, progress=None):
+        self.pb_client = pb_client
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        # None 表示尚未探测服务器是否支持批量接口
+        self.use_batch = None if use_batch else False
+        self.progress = progress or ImportProgress()
+        self._existing = {}
+        self._lock = threading.Lock()
+
+    def load_existing(self):
+        """
+        读取现有记录，建立 upsert 匹配表
+        """
+        self._existing = {}
+        for items in self.pb_client.iter_tool_pages():
+            for record in items:
+                for key in tool_keys(record):
+                    self._existing.setdefault(key, record)
+        return len(self._existing)
+
+    def load_matching(self, tools):
+        """
+        只读取与给定工具 url 或 name 相同的现有记录；工具很少时（如示例数据）代替 load_existing 的整表扫描
+        """
+        self._existing = {}
+        clauses = [f"{field}={filter_literal(tool[field])}"
+                   for tool in tools for field in ("url", "name") if tool.get(field)]
+        if clauses:
+            for items in self.pb_client.iter_tool_pages(filter="||".join(clauses)):
+                for record in items:
+                    for key in tool_keys(record):
+                        self._existing.setdefault(key, record)
+        return len(self._existing)
+
+    def _match(self, tool):
+        for key in tool_keys(tool):
+            record = self._existing.get(key)
+            if record is not None:
+                return record
+        return None
+
+    def _remember(self, record):
+        with self._lock:
+            for key in tool_keys(record):
+                self._existing[key] = record
+
+    def plan(self, tool):
+        """
+        返回 (方法, 记录id, 请求体)；内容未变时返回 None
+        """
+        record = self._match(tool)
+        if record is None:
+            return "POST", None, tool
+        changes = {field: value for field, value in tool.items() if record.get(field) != value}
+        if not changes:
+            return None
+        return "PATCH", record["id"], changes
+
+    def _write_one(self, method, record_id, body):
+        url = f"{self.pb_client.pocketbase_url}{RECORDS_PATH}"
+        if record_id:
+            url = f"{url}/{record_id}"
+        self.progress.incr("requests")
+        response = self.pb_client.admin_request(method, url, json=body)
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def _write_batch(self, operations):
+        """
+        以一次 /api/batch 请求提交一组写操作；服务器不支持时返回 None
+        """
+        requests_body = [
+            {"method": method, "url": RECORDS_PATH + (f"/{record_id}" if record_id else ""), "body": body}
+            for method, record_id, body in operations
+        ]
+        self.progress.incr("requests")
+        response = self.pb_client.admin_request(
+            "POST",
+            f"{self.pb_client.pocketbase_url}/api/batch",
+            json={"requests": requests_body}
+        )
+        if response.status_code in (403, 404, 405):
+            # 旧版本没有该接口，或设置中未启用批量接口
+            return None
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        results = []
+        for result in response.json():
+            if result.get("status") not in (200, 201):
+                raise RuntimeError(f"HTTP {result.get('status')}: {json.dumps(result.get('body'))[:200]}")
+            results.append(result.get("body") or {})
+        return results
+
+    def _submit(self, operations):
+        """
+        提交一组写操作（在工作线程中运行）
+        """
+        results = None
+        if self.use_batch is not False:
+            try:
+                results = self._write_batch(operations)
+            except Exception as e:
+                # 批量请求在事务中执行，失败时整组回滚，改为逐条重试以定位失败记录
+                print(f"⚠️ 批量写入失败，改为逐条写入: {str(e)}")
+            else:
+                if results is None:
+                    self.use_batch = False
+                else:
+                    self.use_batch = True
+        if results is None:
+            results = []
+            for method, record_id, body in operations:
+                try:
+                    results.append(self._write_one(method, record_id, body))
+                except Exception as e:
+                    print(f"❌ 导入工具失败 {body.get('name', record_id)}: {str(e)}")
+                    self.progress.incr("failed")
+                    results.append(None)
+        for (method, _, _), record in zip(operations, results):
+            if record is None:
+                continue
+            self._remember(record)
+            self.progress.incr("created" if method == "POST" else "updated")
+
+    def run(self, tools, load_existing=True):
+        """
+        导入工具记录迭代器，返回统计信息；load_existing=False 时沿用已载入的匹配表（见 load_matching）
+        """
+        if load_existing:
+            self.load_existing()
+        seen = set()
+        pending = set()
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pb-import") as pool:
+            def flush():
+                # 在途批次达到上限时先等待其中一个完成，形成背压
+                while len(pending) >= self.workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        future.result()
+                pending.add(pool.submit(self._submit, list(batch)))
+                batch.clear()
+                self.progress.maybe_report()
+
+            for raw in tools:
+                self.progress.incr("read")
+                if not isinstance(raw, dict):
+                    print(f"❌ 无效的工具记录(应为对象): {json.dumps(raw, ensure_ascii=False)[:80]}")
+                    self.progress.incr("failed")
+                    continue
+                try:
+                    tool = normalize_tool(raw)
+                except (TypeError, ValueError) as e:
+                    print(f"❌ 无效的工具记录 {raw.get('name')}: {str(e)}")
+                    self.progress.incr("failed")
+                    continue
+                keys = tool_keys(tool)
+                if not keys or any(key in seen for key in keys):
+                    # 同一文件中重复的工具只导入第一条，避免并发请求互相覆盖
+                    self.progress.incr("duplicates")
+                    continue
+                seen.update(keys)
+                operation = self.plan(tool)
+                if operation is None:
+                    self.progress.incr("unchanged")
+                    continue
+                batch.append(operation)
+                if len(batch) >= self.batch_size:
+                    flush()
+            if batch:
+                flush()
+            for future in pending:
+                future.result()
+        self.progress.maybe_report(force=True)
+        return self.progress.snapshot()
+
+
+def main(argv=None):
+    from pocketbase_integration import PocketBaseCyberpunkServer
+
+    parser = argparse.ArgumentParser(description="批量导入AI工具到PocketBase的 ai_tools 表")
+    parser.add_argument("path", help="JSON / NDJSON / CSV 文件")
+    parser.add_argument("--format", choices=sorted(set(IMPORT_FORMATS.values())))
+    parser.add_argument("--url", default=os.environ.get("POCKETBASE_URL", "http://localhost:8090"))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("PB_IMPORT_WORKERS", 8)))
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("PB_IMPORT_BATCH", 50)))
+    parser.add_argument("--no-batch-api", action="store_true", help="不使用 /api/batch，始终逐条请求")
+    args = parser.parse_args(argv)
+
+    pb_client = PocketBaseCyberpunkServer(args.url, pool_size=max(args.workers, 4))
+    if not pb_client.authenticate():
+        return 1
+    pb_client.create_collections()
+    importer = ToolImporter(pb_client, args.workers, args.batch_size, use_batch=not args.no_batch_api)
+    stats = importer.run(iter_tool_file(args.path, args.format))
+    print(f"✅ 导入完成: {json.dumps(stats, ensure_ascii=False)}")
+    pb_client.http.close()
+    return 0 if stats["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,50 +3,196 @@
 PocketBase集成示例 - 为赛博朋克AI工具聚合网站添加数据库功能
 """
 
-import requests
 import json
+import math
 import os
 from datetime import datetime
 import http.server
+import queue
+import socket
 import socketserver
+import threading
+import time
 from urllib.parse import urlparse, parse_qs
 
+from pocketbase_auth import TokenManager
+from pocketbase_breaker import STATE_VALUES, CircuitBreaker
+from pocketbase_cache import JsonPayload, ResponseCache, make_cache_key
+from pocketbase_catalog import RealtimeSubscriber, ToolCatalog, filter_literal
+from pocketbase_facets import FLAG_FIELDS, FACET_FIELDS, FacetIndex
+from pocketbase_metrics import PROMETHEUS_CONTENT_TYPE, ServerMetrics, access_log_from_env, now_iso, upstream_endpoint
+from pocketbase_search import SearchIndex
+from pocketbase_singleflight import SingleFlight
+from pocketbase_snapshot import SnapshotWriter, load_snapshot
+from pocketbase_sorted import SORT_KEYS, SortedIndex, UnknownCursorError
+from pocketbase_store import parse_fields, project
+from pocketbase_ratelimit import rate_limit_middleware, rate_limits_from_env
+from pocketbase_render import HomepageRenderer
+from pocketbase_router import QueryParam, Router
+from pocketbase_static import IMMUTABLE_CACHE_CONTROL, STATIC_PREFIX, StaticAssets
+
+
+# 流式导出支持的格式: ndjson 每行一条记录; json 为增量输出的 {"items": [...]}
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "json": "application/json; charset=utf-8"
+}
+
+
+def encode_tool_stream(records, fmt="ndjson", chunk_size=64 * 1024):
+    """
+    把记录迭代器编码为字节块，整个目录不会同时出现在内存中
+    """
+    buffer = []
+    buffered = 0
+    count = 0
+    if fmt == "json":
+        buffer.append(b'{"items":[')
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        if fmt == "json":
+            if count:
+                buffer.append(b",")
+        else:
+            line += b"\n"
+        buffer.append(line)
+        buffered += len(line)
+        count += 1
+        if buffered >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            buffered = 0
+    if fmt == "json":
+        buffer.append(f'],"totalItems":{count}}}'.encode('utf-8'))
+    if buffer:
+        yield b"".join(buffer)
+
 
 class PocketBaseCyberpunkServer:
     """
     集成PocketBase的赛博朋克AI工具聚合网站服务器
     """
     
-    def __init__(self, pocketbase_url="http://localhost:8090"):
+    def __init__(self, pocketbase_url="http://localhost:8090", pool_size=None,
+                 connect_timeout=None, read_timeout=None, retries=None):
         self.pocketbase_url = pocketbase_url
         self.admin_email = os.getenv("PB_ADMIN_EMAIL", "admin@example.com")
         self.admin_password = os.getenv("PB_ADMIN_PASSWORD", "admin123")
-        self.auth_token = None
+        # 请求/上游调用指标（/metrics）与异步访问日志（PB_ACCESS_LOG=off 关闭）
+        self.metrics = ServerMetrics()
+        self.metrics.registry.add_collector(self.collect_metrics)
+        self.access_log = access_log_from_env()
+        # 按接口熔断：PocketBase持续出错或超时时快速失败，不再占住处理线程（PB_CIRCUIT_BREAKER=0 关闭）
+        self.breaker = CircuitBreaker(
+            key_func=upstream_endpoint,
+            error_rate=float(os.getenv("PB_BREAKER_ERROR_RATE", 0.5)),
+            reset_timeout=float(os.getenv("PB_BREAKER_RESET", 5))
+        ) if os.getenv("PB_CIRCUIT_BREAKER", "1") != "0" else None
+        # 搜索/列表接口按客户端IP限流（令牌桶），经反向代理时按 X-Forwarded-For 识别客户端
+        self.rate_limits = rate_limits_from_env()
+        self.trust_forwarded = os.getenv("PB_TRUST_FORWARDED", "0") == "1"
+        # 所有PocketBase调用共用的连接池会话，首次使用时才创建（见 http 属性）
+        self._http_options = {
+            "pool_size": pool_size or int(os.getenv("PB_POOL_SIZE", 32)),
+            "connect_timeout": connect_timeout or float(os.getenv("PB_CONNECT_TIMEOUT", 3.05)),
+            "read_timeout": read_timeout or float(os.getenv("PB_READ_TIMEOUT", 10)),
+            "retries": int(os.getenv("PB_RETRIES", 2)) if retries is None else retries,
+            "observer": self.metrics.observe_upstream,
+            "breaker": self.breaker
+        }
+        self._http = None
+        self._http_lock = threading.Lock()
+        # 列表/搜索/联想的上游调用都落在记录列表接口上，按它的熔断状态决定返回503还是500
+        self.records_endpoint = upstream_endpoint(f"{pocketbase_url}/api/collections/ai_tools/records")
+        # 管理员令牌：过期前 PB_TOKEN_REFRESH_MARGIN 秒在后台续期
+        self.auth = TokenManager(self, refresh_margin=float(os.getenv("PB_TOKEN_REFRESH_MARGIN", 300)))
+        # 并发的相同请求合并为一次加载（与缓存无关，PB_SINGLE_FLIGHT=0 关闭）
+        self.single_flight = SingleFlight(enabled=os.getenv("PB_SINGLE_FLIGHT", "1") != "0")
+        # 工具列表响应缓存（PB_CACHE_TTL=0 关闭）；缓存未命中的加载经 single_flight 按键与失效代次合并
+        self.response_cache = ResponseCache(
+            ttl=float(os.getenv("PB_CACHE_TTL", 60)),
+            stale_while_revalidate=float(os.getenv("PB_CACHE_SWR", 600)),
+            max_entries=int(os.getenv("PB_CACHE_SIZE", 256)),
+            single_flight=self.single_flight
+        )
+        # 分页大小（PocketBase单页上限为500）
+        self.per_page = int(os.getenv("PB_PER_PAGE", 500))
+        # 由实时订阅维护的 ai_tools 内存副本，任何变更都使响应缓存失效
+        self.catalog = ToolCatalog()
+        self.catalog.add_listener(lambda action, record, previous: self.response_cache.invalidate())
+        # 本地全文索引，随目录增量更新
+        self.search_index = SearchIndex().attach(self.catalog)
+        self.search_limit = int(os.getenv("PB_SEARCH_LIMIT", 100))
+        # 类别/标签/语言分面索引
+        self.facets = FacetIndex().attach(self.catalog)
+        # 按评分/名称预排序的id列表，/api/tools 的键集分页与分面查询排序直接使用
+        self.sorted_index = SortedIndex().attach(self.catalog)
+        # 主页直接带上目录前 PB_SSR_TOOLS 个工具卡片（0 关闭），按目录版本缓存
+        self.homepage = HomepageRenderer(
+            self.catalog, HOMEPAGE_TEMPLATE, first_count=int(os.getenv("PB_SSR_TOOLS", 24))
+        )
+        self.realtime = None
+        # 目录的磁盘快照，重启时先载入再增量同步（PB_SNAPSHOT_PATH 为空时关闭）
+        snapshot_path = os.getenv("PB_SNAPSHOT_PATH", "pb_catalog.snapshot")
+        self.snapshot = SnapshotWriter(
+            self.catalog, snapshot_path, source=pocketbase_url,
+            interval=float(os.getenv("PB_SNAPSHOT_INTERVAL", 5))
+        ).attach() if snapshot_path else None
+        # 后台启动流程的状态: pending -> running -> ready / degraded
+        self.bootstrap_state = "pending"
+        self.bootstrap_error = None
+        self._upstream_check = (0.0, None)
         
+    @property
+    def http(self):
+        """
+        连接池会话；requests/urllib3 的导入(约50ms)推迟到第一次访问PocketBase时
+        """
+        if self._http is None:
+            with self._http_lock:
+                if self._http is None:
+                    from pocketbase_http import PooledSession
+                    self._http = PooledSession(**self._http_options)
+        return self._http
+    
+    @property
+    def auth_token(self):
+        return self.auth.token
+    
     def authenticate(self):
         """
-        认证到PocketBase
+        认证到PocketBase，并启动后台令牌续期
         """
         try:
-            auth_url = f"{self.pocketbase_url}/api/admins/auth-with-password"
-            payload = {
-                "identity": self.admin_email,
-                "password": self.admin_password
-            }
-            
-            response = requests.post(auth_url, json=payload)
-            if response.status_code == 200:
-                data = response.json()
-                self.auth_token = data["token"]
-                print("✅ PocketBase认证成功")
-                return True
-            else:
-                print(f"❌ PocketBase认证失败: {response.text}")
-                return False
+            self.auth.login()
+            self.auth.start()
+            print("✅ PocketBase认证成功")
+            return True
         except Exception as e:
-            print(f"❌ PocketBase认证异常: {str(e)}")
+            print(f"❌ PocketBase认证失败: {str(e)}")
             return False
     
+    def auth_headers(self, token=None):
+        """
+        携带管理员令牌的请求头
+        """
+        return {
+            "Authorization": f"Bearer {token or self.auth.get_token()}",
+            "Content-Type": "application/json"
+        }
+    
+    def admin_request(self, method, url, **kwargs):
+        """
+        以管理员身份发送请求；收到401时刷新令牌(多个线程只刷新一次)并重试一次
+        """
+        token = self.auth.get_token()
+        response = self.http.request(method, url, headers=self.auth_headers(token), **kwargs)
+        if response.status_code == 401:
+            fresh = self.auth.refresh(token)
+            if fresh and fresh != token:
+                response = self.http.request(method, url, headers=self.auth_headers(fresh), **kwargs)
+        return response
+    
     def create_collections(self):
         """
         创建数据表结构
@@ -55,11 +201,6 @@ class PocketBaseCyberpunkServer:
             print("❌ 未认证到PocketBase")
             return False
             
-        headers = {
-            "Authorization": f"Bearer {self.auth_token}",
-            "Content-Type": "application/json"
-        }
-        
         # 创建AI工具表
         tools_collection = {
             "schema": [
@@ -79,9 +220,9 @@ class PocketBaseCyberpunkServer:
         }
         
         try:
-            response = requests.post(
+            response = self.admin_request(
+                "POST",
                 f"{self.pocketbase_url}/api/collections",
-                headers=headers,
                 json=tools_collection
             )
             
@@ -101,11 +242,6 @@ class PocketBaseCyberpunkServer:
         if not self.auth_token:
             print("❌ 未认证到PocketBase")
             return False
-            
-        headers = {
-            "Authorization": f"Bearer {self.auth_token}",
-            "Content-Type": "application/json"
-        }
         
         # 示例AI工具数据
         sample_tools = [
@@ -144,353 +280,375 @@ class PocketBaseCyberpunkServer:
             }
         ]
         
-        success_count = 0
-        for tool in sample_tools:
-            try:
-                response = requests.post(
-                    f"{self.pocketbase_url}/api/collections/ai_tools/records",
-                    headers=headers,
-                    json=tool
-                )
-                
-                if response.status_code in [200, 201]:
-                    success_count += 1
-                else:
-                    print(f"❌ 添加工具失败: {response.text}")
-            except Exception as e:
-                print(f"❌ 添加工具异常: {str(e)}")
+        from pocketbase_import import ImportProgress, ToolImporter
         
-        print(f"✅ 成功添加 {success_count}/{len(sample_tools)} 个示例工具")
-        return success_count > 0
+        # 按 url/name 幂等upsert，重复启动不会产生重复记录；只查询这几条工具是否已存在，不扫描整表
+        try:
+            importer = ToolImporter(self, workers=4, progress=ImportProgress(quiet=True))
+            importer.load_matching(sample_tools)
+            stats = importer.run(sample_tools, load_existing=False)
+        except Exception as e:
+            print(f"❌ 添加示例工具异常: {str(e)}")
+            return False
+        print(f"✅ 示例工具: 新增 {stats['created']}，更新 {stats['updated']}，"
+              f"未变 {stats['unchanged']}，失败 {stats['failed']}")
+        return stats["failed"] == 0
+    
+    def import_tools(self, tools, workers=8, batch_size=50, use_batch=True):
+        """
+        批量导入工具记录（幂等upsert），返回统计信息
+        """
+        if not self.auth_token:
+            print("❌ 未认证到PocketBase")
+            return None
+        from pocketbase_import import ToolImporter
+        return ToolImporter(self, workers, batch_size, use_batch).run(tools)
     
-    def get_all_tools(self):
+    def get_tools_page(self, page=1, per_page=None, filter=None, fields=None):
         """
-        获取所有AI工具
+        获取一页AI工具，失败时抛出异常；fields 限定返回的字段，如 "id"
+        """
+        params = {"page": page, "perPage": per_page or self.per_page, "skipTotal": 1}
+        if filter:
+            params["filter"] = filter
+        if fields:
+            params["fields"] = fields
+        response = self.http.get(
+            f"{self.pocketbase_url}/api/collections/ai_tools/records",
+            params=params
+        )
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        return response.json()
+    
+    def iter_tool_pages(self, per_page=None, filter=None, fields=None):
+        """
+        逐页获取AI工具，每次产出一页的记录列表
+        """
+        per_page = per_page or self.per_page
+        page = 1
+        while True:
+            data = self.get_tools_page(page, per_page, filter, fields)
+            items = data.get("items", [])
+            if items:
+                yield items
+            # skipTotal 时 totalPages 为 -1，以不满一页作为结束标志
+            total_pages = data.get("totalPages", -1)
+            if len(items) < per_page or 0 <= total_pages <= page:
+                break
+            page += 1
+    
+    def iter_tools(self, per_page=None):
+        """
+        逐条产出全部工具：目录已同步时读内存，否则逐页请求PocketBase
+        """
+        if self.catalog.loaded:
+            yield from self.catalog.iter_records()
+            return
+        for items in self.iter_tool_pages(per_page):
+            yield from items
+    
+    def _collect_tools(self, filter=None, fields=None):
+        def collect():
+            items = []
+            for page_items in self.iter_tool_pages(filter=filter, fields=fields):
+                items.extend(page_items)
+            return {
+                "page": 1,
+                "perPage": len(items),
+                "totalItems": len(items),
+                "totalPages": 1,
+                "items": items
+            }
+        # 同一过滤条件的并发翻页只请求上游一次，各调用方共享结果（只读）；
+        # 键带上缓存失效代次，数据变更后的请求不会拿到变更前开始的翻页结果
+        return self.single_flight.do(("upstream", filter, fields, self.response_cache.generation), collect)
+    
+    def get_all_tools(self, fields=None):
+        """
+        获取所有AI工具（自动翻页）；fields 原样传给PocketBase的 fields 参数
         """
         try:
-            response = requests.get(f"{self.pocketbase_url}/api/collections/ai_tools/records")
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ 获取工具列表失败: {response.text}")
-                return None
+            return self._collect_tools(fields=fields)
         except Exception as e:
             print(f"❌ 获取工具列表异常: {str(e)}")
             return None
     
     def get_tools_by_category(self, category):
         """
-        按类别获取AI工具
+        按类别获取AI工具（自动翻页）
         """
         try:
-            params = {"filter": f"category='{category}'"}
-            response = requests.get(
-                f"{self.pocketbase_url}/api/collections/ai_tools/records",
-                params=params
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ 获取类别工具失败: {response.text}")
-                return None
+            return self._collect_tools(f"category={filter_literal(category)}")
         except Exception as e:
             print(f"❌ 获取类别工具异常: {str(e)}")
             return None
     
     def search_tools(self, query):
         """
-        搜索AI工具
+        搜索AI工具（自动翻页）
         """
         try:
-            params = {"filter": f"name~'{query}'||description~'{query}'"}
-            response = requests.get(
-                f"{self.pocketbase_url}/api/collections/ai_tools/records",
-                params=params
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ 搜索工具失败: {response.text}")
-                return None
+            needle = filter_literal(query)
+            return self._collect_tools(f"name~{needle}||description~{needle}")
         except Exception as e:
             print(f"❌ 搜索工具异常: {str(e)}")
             return None
 
-
-class CyberpunkPocketBaseHandler(http.server.BaseHTTPRequestHandler):
-    """
-    集成PocketBase的赛博朋克处理器
-    """
+    def start_realtime(self):
+        """
+        启动ai_tools实时订阅（后台线程）
+        """
+        if self.realtime is None:
+            self.realtime = RealtimeSubscriber(self, self.catalog).start()
+        return self.realtime
     
-    def __init__(self, pocketbase_client, *args, **kwargs):
-        self.pb_client = pocketbase_client
-        super().__init__(*args, **kwargs)
+    def stop_realtime(self):
+        if self.realtime is not None:
+            self.realtime.stop()
+            self.realtime = None
     
-    def do_GET(self):
+    def load_snapshot(self):
         """
-        处理GET请求
+        从磁盘快照载入目录，返回载入的记录数；没有可用快照时返回 None
         """
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        query_params = parse_qs(parsed_path.query)
-        
-        # API路由处理
-        if path == '/api/tools':
-            self.serve_tools_api(query_params)
-        elif path.startswith('/api/tools/category/'):
-            category = path.split('/')[-1]
-            self.serve_category_api(category)
-        elif path.startswith('/api/search/'):
-            query = path.split('/')[-1]
-            self.serve_search_api(query)
-        else:
-            # 返回赛博朋克主页
-            self.serve_cyberpunk_homepage()
+        if self.snapshot is None:
+            return None
+        started = time.perf_counter()
+        records = load_snapshot(self.snapshot.path, self.pocketbase_url)
+        if records is None:
+            return None
+        self.catalog.replace_all(records)
+        self.snapshot.mark_clean()
+        print(f"💾 从快照载入目录 {len(records)} 条，用时 {(time.perf_counter() - started) * 1000:.1f}ms")
+        return len(records)
     
-    def serve_tools_api(self, query_params):
+    def bootstrap(self, realtime=True):
         """
-        提供工具API
+        载入快照、认证、建表、填充示例数据并启动实时订阅；PocketBase不可用时以只读模式继续
         """
+        self.bootstrap_state = "running"
         try:
-            tools_data = self.pb_client.get_all_tools()
-            if tools_data:
-                self.send_json_response(tools_data)
+            # 只有实时订阅能让快照之后的变更同步进来，关闭订阅时不使用快照
+            if realtime and self.snapshot is not None:
+                self.load_snapshot()
+                self.snapshot.start()
+            if self.authenticate():
+                print("✅ 连接到PocketBase服务器")
+                self.create_collections()
+                self.populate_sample_data()
             else:
-                self.send_error(500, "无法获取工具数据")
+                print("⚠️ 无法连接到PocketBase服务器，将以只读模式运行")
+            # 订阅ai_tools实时事件，增量维护内存目录
+            if realtime:
+                self.start_realtime()
+            self.bootstrap_state = "ready" if self.auth_token else "degraded"
         except Exception as e:
-            print(f"API错误: {str(e)}")
-            self.send_error(500, f"服务器错误: {str(e)}")
+            self.bootstrap_error = str(e)
+            self.bootstrap_state = "degraded"
+            print(f"❌ 启动流程异常: {str(e)}")
     
-    def serve_category_api(self, category):
+    def start_bootstrap(self, realtime=True):
         """
-        提供类别API
+        在后台线程运行 bootstrap，监听端口无需等待PocketBase
         """
-        try:
-            tools_data = self.pb_client.get_tools_by_category(category)
-            if tools_data:
-                self.send_json_response(tools_data)
-            else:
-                self.send_error(500, f"无法获取类别 {category} 的工具数据")
-        except Exception as e:
-            print(f"API错误: {str(e)}")
-            self.send_error(500, f"服务器错误: {str(e)}")
+        thread = threading.Thread(target=self.bootstrap, args=(realtime,), name="pb-bootstrap", daemon=True)
+        thread.start()
+        return thread
     
-    def serve_search_api(self, query):
+    def check_upstream(self, max_age=2.0):
         """
-        提供搜索API
+        请求 /api/health 检查PocketBase是否可达，结果缓存 max_age 秒
         """
+        checked_at, healthy = self._upstream_check
+        now = time.monotonic()
+        if healthy is not None and now - checked_at < max_age:
+            return healthy
         try:
-            tools_data = self.pb_client.search_tools(query)
-            if tools_data:
-                self.send_json_response(tools_data)
-            else:
-                self.send_error(500, f"无法搜索 '{query}' 的结果")
-        except Exception as e:
-            print(f"API错误: {str(e)}")
-            self.send_error(500, f"服务器错误: {str(e)}")
+            response = self.http.get(f"{self.pocketbase_url}/api/health", timeout=1.0)
+            healthy = response.status_code == 200
+        except Exception:
+            healthy = False
+        self._upstream_check = (now, healthy)
+        return healthy
     
-    def serve_cyberpunk_homepage(self):
+    def health(self):
         """
-        返回赛博朋克主页
+        存活状态：进程能响应即视为存活，附带启动流程与上游状态
+        """
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "bootstrap": self.bootstrap_state,
+            "bootstrap_error": self.bootstrap_error,
+            "authenticated": bool(self.auth_token),
+            "catalog_loaded": self.catalog.loaded,
+            "catalog_size": len(self.catalog),
+            "realtime": self.realtime is not None,
+            "single_flight": self.single_flight.stats(top=5),
+            "circuits": self.breaker.stats() if self.breaker is not None else None
+        }
+    
+    def collect_metrics(self):
+        """
+        抓取 /metrics 时读取的各组件计数
+        """
+        cache = self.response_cache.stats()
+        single_flight = self.single_flight.stats(top=0)
+        collected = [
+            ("pb_cache_events_total", "counter", "响应缓存查找结果与刷新次数",
+             [({"event": name}, value) for name, value in cache.items() if name not in ("entries", "hit_ratio")]),
+            ("pb_cache_hit_ratio", "gauge", "响应缓存命中率(含过期仍可用的命中)", [({}, cache["hit_ratio"])]),
+            ("pb_cache_entries", "gauge", "响应缓存条目数", [({}, cache["entries"])]),
+            ("pb_single_flight_calls_total", "counter", "请求合并层的调用数",
+             [({"outcome": "executed"}, single_flight["executions"]), ({"outcome": "merged"}, single_flight["merged"])]),
+            ("pb_catalog_records", "gauge", "内存目录中的记录数", [({}, len(self.catalog))]),
+            ("pb_catalog_loaded", "gauge", "内存目录是否已同步", [({}, int(self.catalog.loaded))]),
+            ("pb_token_events_total", "counter", "管理员令牌登录/续期/失败次数",
+             [({"event": name}, value) for name, value in self.auth.stats.items()]),
+        ]
+        if self._http is not None:
+            collected.append(("pb_upstream_pool_events_total", "counter", "PocketBase连接池请求、重试、错误与连接复用",
+                              [({"event": name}, value) for name, value in self._http.snapshot().items()]))
+        if self.breaker is not None:
+            circuits = self.breaker.stats()
+            collected.append(("pb_circuit_state", "gauge", "PocketBase接口熔断状态(0正常 1半开 2熔断)",
+                              [({"endpoint": key}, STATE_VALUES[value["state"]]) for key, value in circuits.items()]))
+            collected.append(("pb_circuit_rejected_total", "counter", "熔断期间被直接拒绝的PocketBase调用数",
+                              [({"endpoint": key}, value["rejected"]) for key, value in circuits.items()]))
+        if self.rate_limits:
+            collected.append(("pb_rate_limit_requests_total", "counter", "限流器放行/拒绝的请求数",
+                              [({"budget": budget, "outcome": outcome}, limiter.stats[outcome])
+                               for budget, limiter in self.rate_limits.items() for outcome in ("allowed", "limited")]))
+            collected.append(("pb_rate_limit_clients", "gauge", "限流器当前跟踪的客户端数",
+                              [({"budget": budget}, len(limiter)) for budget, limiter in self.rate_limits.items()]))
+        if self.access_log is not None:
+            collected.append(("pb_access_log_records_total", "counter", "访问日志记录数",
+                              [({"outcome": name}, value) for name, value in self.access_log.stats.items()]))
+        return collected
+    
+    def readiness(self):
+        """
+        返回 (是否就绪, 详情)：内存目录已就绪(含从快照载入)，或启动流程结束且PocketBase可达
+        """
+        details = self.health()
+        finished = self.bootstrap_state in ("ready", "degraded")
+        upstream = None
+        if finished and not self.catalog.loaded:
+            upstream = self.check_upstream()
+        details["upstream"] = upstream
+        ready = self.catalog.loaded or (finished and bool(upstream))
+        details["status"] = "ready" if ready else "not_ready"
+        return ready, details
+    
+    def list_tools(self, fields=None):
+        """
+        获取全部工具：目录已同步时直接读内存，否则请求PocketBase；fields 为 parse_fields 的结果
+        """
+        if self.catalog.loaded:
+            return self.catalog.as_response(fields=fields)
+        return self.get_all_tools(",".join(fields) if fields else None)
+    
+    def list_tools_by_category(self, category):
         """
-        html_content = """
+        按类别获取工具：目录已同步时直接读内存，否则请求PocketBase
+        """
+        if self.catalog.loaded:
+            return self.catalog.by_category(category)
+        return self.get_tools_by_category(category)
+    
+    def query_tools(self, selections, match="all", sort="rating", page=1, per_page=None, fields=None):
+        """
+        分面组合查询，返回分页结果及各分面计数
+
+        目录已同步时直接用内存分面索引与排序索引；否则拉取一次全量数据临时建索引。
+        排序只比较预先算好的键，只有当前页的记录才会被物化。
+        """
+        if self.catalog.loaded:
+            facets, sorted_index, get_record = self.facets, self.sorted_index, self.catalog.get
+        else:
+            data = self.get_all_tools()
+            if data is None:
+                return None
+            facets, sorted_index = FacetIndex(), SortedIndex()
+            facets.rebuild(data["items"])
+            sorted_index.rebuild(data["items"])
+            get_record = {record["id"]: record for record in data["items"]}.get
+        ids, counts = facets.select(selections, match)
+        ids = sorted_index.order(ids, sort)
+        per_page = per_page or self.per_page
+        start = (page - 1) * per_page
+        records = [project(record, fields) for record in map(get_record, ids[start:start + per_page])
+                   if record is not None]
+        return {
+            "page": page,
+            "perPage": per_page,
+            "totalItems": len(ids),
+            "totalPages": (len(ids) + per_page - 1) // per_page,
+            "items": records,
+            "facets": counts
+        }
+    
+    def page_tools(self, sort="rating", after=None, limit=50, fields=None):
+        """
+        键集分页: 按 sort 排序后 after 之后的 limit 条记录，next 为下一页的 after 值
+
+        只用内存目录的排序索引回答，每页只做一次二分查找和 limit 次读取；
+        目录未同步时返回 None。after 未知时抛出 UnknownCursorError。
+        """
+        if not self.catalog.loaded:
+            return None
+        ids, cursor, total = self.sorted_index.page(sort, after, limit)
+        return {
+            "perPage": limit,
+            "totalItems": total,
+            "sort": sort,
+            "next": cursor,
+            "items": [project(record, fields) for record in map(self.catalog.get, ids) if record is not None]
+        }
+    
+    def search(self, query):
+        """
+        搜索工具：目录已同步时查本地索引(BM25排序)，否则请求PocketBase
+        """
+        if self.catalog.loaded:
+            hits = self.search_index.search(query, limit=self.search_limit)
+            records = [self.catalog.get(record_id) for _, record_id in hits]
+            return self.catalog.as_response([r for r in records if r is not None])
+        return self.search_tools(query)
+
+    def suggest(self, query, limit=8):
+        """
+        输入联想：只返回匹配工具的 id 与 name，最后一个词按前缀匹配
+        """
+        if self.catalog.loaded:
+            items = []
+            for _, record_id in self.search_index.search(query, limit=limit):
+                record = self.catalog.get(record_id)
+                if record is not None:
+                    items.append({"id": record["id"], "name": record["name"]})
+            return {"items": items}
+        try:
+            data = self.get_tools_page(1, limit, f"name~{filter_literal(query)}", fields="id,name")
+        except Exception as e:
+            print(f"❌ 输入联想异常: {str(e)}")
+            return None
+        return {"items": data.get("items", [])[:limit]}
+
+
+# 赛博朋克主页。样式与脚本在 static/ 目录中，{文件名} 在启动时替换为带指纹的URL；
+# Google字体异步加载，不阻塞首次渲染。{{...}} 由 HomepageRenderer 填入服务端渲染的工具卡片
+CYBERPUNK_HOMEPAGE_HTML = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>赛博朋克AI工具库 - 基于PocketBase</title>
-    <style>
-        :root {
-            --cyber-primary: #00ffff; /* 青色霓虹 */
-            --cyber-secondary: #ff00ff; /* 品红霓虹 */
-            --cyber-accent: #ff006e; /* 粉红霓虹 */
-            --cyber-dark: #0a0a12; /* 深蓝黑色背景 */
-            --cyber-darker: #000000; /* 纯黑 */
-            --cyber-light: #ffffff; /* 白色文字 */
-            --neon-glow: 0 0 10px var(--cyber-primary), 0 0 20px var(--cyber-primary), 0 0 30px var(--cyber-primary), 0 0 40px var(--cyber-primary);
-        }
-        
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Courier New', 'Orbitron', monospace;
-            background: var(--cyber-dark);
-            color: var(--cyber-light);
-            line-height: 1.6;
-            min-height: 100vh;
-            padding: 20px;
-            position: relative;
-            overflow-x: hidden;
-            background-image: 
-                linear-gradient(rgba(0, 255, 255, 0.05) 1px, transparent 1px),
-                linear-gradient(90deg, rgba(0, 255, 255, 0.05) 1px, transparent 1px);
-            background-size: 50px 50px;
-        }
-        
-        .cyber-container {
-            max-width: 1200px;
-            margin: 0 auto;
-            position: relative;
-            z-index: 2;
-        }
-        
-        .cyber-header {
-            text-align: center;
-            padding: 60px 20px 40px;
-            margin-bottom: 50px;
-            position: relative;
-            overflow: hidden;
-            background: rgba(10, 10, 18, 0.8);
-            border: 2px solid var(--cyber-primary);
-            border-radius: 10px;
-            backdrop-filter: blur(10px);
-            box-shadow: var(--neon-glow);
-        }
-        
-        .cyber-title {
-            font-size: 4rem;
-            margin-bottom: 20px;
-            background: linear-gradient(45deg, var(--cyber-primary), var(--cyber-secondary));
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            font-weight: 800;
-            letter-spacing: 3px;
-            text-transform: uppercase;
-            font-family: 'Orbitron', monospace;
-        }
-        
-        .cyber-slogan {
-            font-size: 1.6rem;
-            color: var(--cyber-primary);
-            margin-bottom: 25px;
-            text-shadow: var(--neon-glow);
-        }
-        
-        .cyber-search-container {
-            position: relative;
-            max-width: 700px;
-            margin: 0 auto 25px;
-        }
-        
-        .cyber-search-input {
-            width: 100%;
-            padding: 20px 70px 20px 25px;
-            font-size: 1.2rem;
-            border: 2px solid var(--cyber-primary);
-            border-radius: 10px;
-            background: rgba(0, 0, 0, 0.7);
-            color: var(--cyber-light);
-            outline: none;
-            transition: all 0.3s ease;
-            backdrop-filter: blur(10px);
-            font-family: 'Courier New', monospace;
-        }
-        
-        .cyber-search-input:focus {
-            border-color: var(--cyber-secondary);
-            box-shadow: var(--neon-glow-secondary);
-            background: rgba(0, 0, 0, 0.9);
-        }
-        
-        .cyber-tools-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(350px, 1fr));
-            gap: 30px;
-            margin-top: 30px;
-        }
-        
-        .cyber-tool-card {
-            background: rgba(10, 10, 18, 0.8);
-            border: 2px solid var(--cyber-primary);
-            border-radius: 15px;
-            padding: 30px;
-            transition: all 0.4s ease;
-            backdrop-filter: blur(10px);
-            position: relative;
-            overflow: hidden;
-            box-shadow: var(--neon-glow);
-        }
-        
-        .cyber-tool-card:hover {
-            transform: translateY(-10px);
-            box-shadow: var(--neon-glow-secondary);
-            border-color: var(--cyber-secondary);
-        }
-        
-        .cyber-tool-title {
-            font-size: 1.8rem;
-            color: var(--cyber-secondary);
-            margin-bottom: 15px;
-            font-weight: bold;
-            text-shadow: var(--neon-glow-secondary);
-        }
-        
-        .cyber-tool-description {
-            color: var(--cyber-light);
-            margin-bottom: 20px;
-            line-height: 1.6;
-        }
-        
-        .cyber-tool-category {
-            display: inline-block;
-            background: rgba(0, 255, 255, 0.2);
-            color: var(--cyber-primary);
-            padding: 8px 16px;
-            border-radius: 20px;
-            font-size: 0.9rem;
-            margin-bottom: 15px;
-            border: 1px solid var(--cyber-primary);
-        }
-        
-        .cyber-tool-actions {
-            display: flex;
-            gap: 15px;
-            margin-top: 20px;
-        }
-        
-        .cyber-tool-link {
-            display: inline-block;
-            background: linear-gradient(45deg, var(--cyber-primary), var(--cyber-secondary);
-            color: var(--cyber-darker);
-            padding: 12px 25px;
-            border-radius: 10px;
-            text-decoration: none;
-            font-weight: bold;
-            transition: all 0.3s ease;
-            border: none;
-            font-family: 'Courier New', monospace;
-        }
-        
-        .cyber-tool-link:hover {
-            transform: scale(1.05);
-            box-shadow: var(--neon-glow-secondary);
-        }
-        
-        .cyber-status {
-            text-align: center;
-            padding: 20px;
-            color: var(--cyber-primary);
-            font-size: 1.2rem;
-            margin: 20px 0;
-        }
-        
-        @media (max-width: 768px) {
-            .cyber-title {
-                font-size: 2.5rem;
-            }
-            
-            .cyber-tools-grid {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
-    <link href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&display=swap" rel="stylesheet">
+    <link rel="stylesheet" href="{cyberpunk.css}">
+    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+    <link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&display=swap" media="print" onload="this.media='all'">
+    <script src="{cyberpunk.js}" defer></script>
 </head>
 <body>
     <div class="cyber-container">
@@ -499,157 +657,812 @@ class CyberpunkPocketBaseHandler(http.server.BaseHTTPRequestHandler):
             <p class="cyber-slogan" style="font-family: 'Orbitron', monospace;">基于PocketBase的赛博朋克AI工具聚合平台</p>
             
             <div class="cyber-search-container">
-                <input type="text" id="cyberSearchInput" class="cyber-search-input" placeholder="搜索AI工具..." autocomplete="off" style="font-family: 'Orbitron', monospace;">
+                <input type="text" id="cyberSearchInput" class="cyber-search-input" placeholder="搜索AI工具..." autocomplete="off" list="cyberSuggestions" style="font-family: 'Orbitron', monospace;">
+                <datalist id="cyberSuggestions"></datalist>
             </div>
         </header>
         
         <div class="cyber-status" id="cyberStatus">
-            加载工具数据中...
+            {{status}}
         </div>
         
         <main>
-            <div class="cyber-tools-grid" id="cyberToolsGrid">
-                <!-- 工具卡片将通过JavaScript动态加载 -->
+            <div class="cyber-tools-grid" id="cyberToolsGrid" data-rendered="{{rendered}}" data-total="{{total}}">
+            {{tools}}
             </div>
         </main>
     </div>
     
-    <script>
-        // 加载工具数据
-        async function loadTools() {
-            try {
-                const response = await fetch('/api/tools');
-                const data = await response.json();
-                
-                const toolsContainer = document.getElementById('cyberToolsGrid');
-                const statusElement = document.getElementById('cyberStatus');
-                
-                if (data && data.items && data.items.length > 0) {
-                    toolsContainer.innerHTML = '';
-                    
-                    data.items.forEach(tool => {
-                        const toolCard = document.createElement('div');
-                        toolCard.className = 'cyber-tool-card';
-                        
-                        toolCard.innerHTML = `
-                            <span class="cyber-tool-category">${tool.category.replace('_', ' ').toUpperCase()}</span>
-                            <h3 class="cyber-tool-title">${tool.name}</h3>
-                            <p class="cyber-tool-description">${tool.description}</p>
-                            <div class="cyber-tool-actions">
-                                <a href="${tool.url}" target="_blank" class="cyber-tool-link">访问网站</a>
-                            </div>
-                        `;
-                        
-                        toolsContainer.appendChild(toolCard);
-                    });
-                    
-                    statusElement.textContent = `共加载 ${data.items.length} 个AI工具`;
-                } else {
-                    statusElement.textContent = '暂无工具数据';
-                }
-            } catch (error) {
-                console.error('加载工具数据失败:', error);
-                document.getElementById('cyberStatus').textContent = '加载失败: ' + error.message;
-            }
-        }
-        
-        // 搜索功能
-        document.getElementById('cyberSearchInput').addEventListener('input', async (e) => {
-            const query = e.target.value.trim();
-            
-            if (query.length > 0) {
-                try {
-                    const response = await fetch(`/api/search/${encodeURIComponent(query)}`);
-                    const data = await response.json();
-                    
-                    const toolsContainer = document.getElementById('cyberToolsGrid');
-                    const statusElement = document.getElementById('cyberStatus');
-                    
-                    if (data && data.items && data.items.length > 0) {
-                        toolsContainer.innerHTML = '';
-                        
-                        data.items.forEach(tool => {
-                            const toolCard = document.createElement('div');
-                            toolCard.className = 'cyber-tool-card';
-                            
-                            toolCard.innerHTML = `
-                                <span class="cyber-tool-category">${tool.category.replace('_', ' ').toUpperCase()}</span>
-                                <h3 class="cyber-tool-title">${tool.name}</h3>
-                                <p class="cyber-tool-description">${tool.description}</p>
-                                <div class="cyber-tool-actions">
-                                    <a href="${tool.url}" target="_blank" class="cyber-tool-link">访问网站</a>
-                                </div>
-                            `;
-                            
-                            toolsContainer.appendChild(toolCard);
-                        });
-                        
-                        statusElement.textContent = `搜索到 ${data.items.length} 个结果`;
-                    } else {
-                        toolsContainer.innerHTML = '<div class="cyber-status">未找到匹配的工具</div>';
-                        statusElement.textContent = '未找到匹配的工具';
-                    }
-                } catch (error) {
-                    console.error('搜索失败:', error);
-                }
-            } else {
-                // 如果搜索框为空，则重新加载所有工具
-                loadTools();
-            }
-        });
-        
-        // 页面加载完成后获取工具数据
-        document.addEventListener('DOMContentLoaded', () => {
-            loadTools();
-        });
-    </script>
 </body>
 </html>
+"""
+
+STATIC_ASSETS = StaticAssets()
+HOMEPAGE_TEMPLATE = STATIC_ASSETS.render_template(CYBERPUNK_HOMEPAGE_HTML)
+
+
+# 触发 /api/tools 分面查询模式的参数（tag 是 tags 的别名）
+FACET_QUERY_PARAMS = set(FACET_FIELDS) | set(FLAG_FIELDS) | {"tag", "match", "sort", "page", "perPage"}
+
+# /api/tools 键集分页缺省的每页条数，以及目录同步前让客户端等待的秒数
+KEYSET_DEFAULT_LIMIT = 50
+CATALOG_RETRY_AFTER = 2
+
+
+def parse_bool_param(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class CyberpunkPocketBaseHandler(http.server.BaseHTTPRequestHandler):
+    """
+    集成PocketBase的赛博朋克处理器
+    """
+    
+    def __init__(self, pocketbase_client, *args, **kwargs):
+        self.pb_client = pocketbase_client
+        self.request_started = None
+        self.extra_headers = []
+        super().__init__(*args, **kwargs)
+    
+    def setup(self):
+        super().setup()
+        # 统计本连接发送的字节数（sendfile 发送的部分在 send_static 中补记）
+        self.wfile = self.byte_counter = CountingWriter(self.wfile)
+    
+    def parse_request(self):
+        self.request_started = time.perf_counter()
+        self.route_name = None
+        self.response_status = None
+        # 中间件追加、随响应头一起发出的头部（如 RateLimit-*）
+        self.extra_headers = []
+        self.bytes_before = self.byte_counter.sent
+        return super().parse_request()
+    
+    def handle_one_request(self):
+        super().handle_one_request()
+        if self.request_started is not None:
+            self.record_request()
+            self.request_started = None
+    
+    def record_request(self):
         """
-        
+        请求结束后记录指标与访问日志
+        """
+        elapsed = time.perf_counter() - self.request_started
+        route = self.route_name or 'unmatched'
+        status = self.response_status or 0
+        sent = self.byte_counter.sent - self.bytes_before
+        method = self.command or '-'
+        self.pb_client.metrics.observe_request(route, method, status, sent, elapsed)
+        if self.pb_client.access_log is not None:
+            self.pb_client.access_log.log({
+                "ts": now_iso(),
+                "client": self.client_address[0] if self.client_address else "-",
+                "method": method,
+                "path": self.path if hasattr(self, 'path') else "-",
+                "route": route,
+                "status": status,
+                "bytes": sent,
+                "ms": round(elapsed * 1000, 3)
+            })
+    
+    def log_request(self, code='-', size='-'):
+        """
+        只记下状态码；访问日志由 record_request 在请求结束后异步写出
+        """
+        try:
+            self.response_status = int(code)
+        except (TypeError, ValueError):
+            self.response_status = 0
+    
+    def dispatch(self):
+        """
+        按路由表分派请求：路径参数与声明过的查询参数按类型转换后作为关键字参数传入
+        """
+        parsed_path = urlparse(self.path)
+        self.query_params = parse_qs(parsed_path.query)
+        match = ROUTES.match(self.command, parsed_path.path)
+        if match.route is not None:
+            self.route_name = match.route.name
+        if match.route is None:
+            self.send_response(405)
+            self.send_header('Allow', ', '.join(match.allowed))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        try:
+            params = match.route.parse_query(parsed_path.query, self.query_params)
+        except ValueError as e:
+            self.send_error(400, f"参数错误: {str(e)}")
+            return
+        params.update(match.params)
+        match.route.call(self, params)
+    
+    def do_GET(self):
+        self.dispatch()
+    
+    def do_HEAD(self):
+        """
+        HEAD 与 GET 走同一个路由，只是响应体被丢弃（见 end_headers）
+        """
+        wfile = self.wfile
+        try:
+            self.dispatch()
+        finally:
+            self.wfile = wfile
+    
+    def do_OPTIONS(self):
+        """
+        CORS预检：返回该路径支持的方法，允许浏览器请求的头部，预检结果缓存一天
+        """
+        match = ROUTES.match('OPTIONS', urlparse(self.path).path)
+        methods = ', '.join(match.allowed)
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', methods)
+        self.send_header('Access-Control-Allow-Headers',
+                         self.headers.get('Access-Control-Request-Headers') or CORS_ALLOW_HEADERS)
+        self.send_header('Access-Control-Max-Age', '86400')
+        self.send_header('Allow', methods)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def end_headers(self):
+        for name, value in self.extra_headers:
+            self.send_header(name, value)
+        super().end_headers()
+        if self.command == 'HEAD':
+            # 响应头已写出，之后的响应体写入全部丢弃；do_HEAD 结束时恢复
+            self.wfile = DISCARD_WRITER
+    
+    def client_key(self):
+        """
+        限流用的客户端标识: 客户端IP，PB_TRUST_FORWARDED=1 时取 X-Forwarded-For 的第一个地址
+        """
+        if self.pb_client.trust_forwarded:
+            forwarded = self.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',', 1)[0].strip()
+        return self.client_address[0]
+    
+    def serve_healthz(self):
+        self.send_json_response(self.pb_client.health())
+    
+    def serve_readyz(self):
+        ready, details = self.pb_client.readiness()
+        self.send_json_response(details, status=200 if ready else 503)
+    
+    def serve_metrics(self):
+        """
+        Prometheus文本格式的运行指标
+        """
+        body = self.pb_client.metrics.render().encode('utf-8')
         self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        self.wfile.write(html_content.encode('utf-8'))
+        self.wfile.write(body)
     
-    def send_json_response(self, data):
-        """发送JSON响应"""
+    def serve_tools_api(self, stream=None, fields=None, after=None, limit=None, sort=None):
+        """
+        提供工具API；分面查询的参数是动态的，直接读取 self.query_params
+
+        fields=id,name 只返回指定字段；after=<id>&limit=N 为键集分页（可加 sort=rating|name）
+        """
+        query_params = self.query_params
+        stream_format = stream
+        if stream_format is not None:
+            if stream_format not in STREAM_CONTENT_TYPES:
+                self.send_error(400, f"不支持的流式格式: {stream_format}")
+                return
+            self.serve_tools_stream(stream_format, fields)
+            return
+        if after is not None or limit is not None:
+            self.serve_tools_page(sort or "rating", after, limit or KEYSET_DEFAULT_LIMIT, fields)
+            return
+        if FACET_QUERY_PARAMS & set(query_params):
+            self.serve_tools_query(query_params, fields)
+            return
+        try:
+            cache_key = make_cache_key("tools", {"fields": fields} if fields else None)
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.list_tools(fields))
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error("无法获取工具数据")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_tools_page(self, sort, after, limit, fields):
+        """
+        键集分页: ?after=<上一页的next>&limit=50&sort=rating|name，返回的 next 为 null 时已到末尾
+        """
+        if (FACET_QUERY_PARAMS - {"sort"}) & set(self.query_params):
+            self.send_error(400, "after/limit 不能与分面筛选或 page/perPage 同时使用")
+            return
+        if sort not in SORT_KEYS:
+            self.send_error(400, f"不支持的排序方式: {sort}")
+            return
+        if not self.pb_client.catalog.loaded:
+            # 未同步时每页都要全量拉取并排序，不如让客户端稍后重试
+            self.send_json_response({"error": "工具目录尚未同步，请稍后重试", "retry_after": CATALOG_RETRY_AFTER},
+                                    {"Retry-After": str(CATALOG_RETRY_AFTER)}, status=503)
+            return
+        try:
+            cache_key = make_cache_key("page", {"sort": sort, "after": after or "", "limit": limit,
+                                                "fields": fields or ()})
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.page_tools(sort, after, limit, fields)),
+                propagate=UnknownCursorError
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error("无法获取工具数据")
+        except UnknownCursorError:
+            self.send_error(400, f"未知的翻页游标: {after}")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_tools_query(self, query_params, fields=None):
+        """
+        分面组合查询: ?category=a,b&tags=x&language=zh&is_free=1&match=all|any&sort=rating|name
+        """
+        try:
+            selections = {}
+            for facet in FACET_FIELDS:
+                values = query_params.get(facet, []) + (query_params.get('tag', []) if facet == 'tags' else [])
+                if values:
+                    selections[facet] = ",".join(values)
+            for flag in FLAG_FIELDS:
+                if flag in query_params:
+                    selections[flag] = parse_bool_param(query_params[flag][0])
+            match = query_params.get('match', ['all'])[0]
+            sort = query_params.get('sort', ['rating'])[0]
+            page = max(1, int(query_params.get('page', [1])[0]))
+            per_page = max(1, min(500, int(query_params.get('perPage', [self.pb_client.per_page])[0])))
+        except ValueError as e:
+            self.send_error(400, f"参数错误: {str(e)}")
+            return
+        if match not in ("all", "any"):
+            self.send_error(400, f"不支持的匹配方式: {match}")
+            return
+        if sort not in SORT_KEYS:
+            self.send_error(400, f"不支持的排序方式: {sort}")
+            return
+        try:
+            cache_params = dict(selections, match=match, sort=sort, page=page, perPage=per_page, fields=fields or ())
+            cache_key = make_cache_key("query", cache_params)
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.query_tools(selections, match, sort, page, per_page, fields))
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error("无法获取工具数据")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_tools_stream(self, stream_format, fields=None):
+        """
+        以NDJSON或增量JSON流式输出整个工具目录
+        """
+        records = (project(record, fields) for record in self.pb_client.iter_tools())
+        chunks = encode_tool_stream(records, stream_format)
+        try:
+            # 先取到第一块数据再发送响应头，上游失败时仍可返回500
+            first_chunk = next(chunks, b"")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+            return
         self.send_response(200)
+        self.send_header('Content-type', STREAM_CONTENT_TYPES[stream_format])
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(first_chunk)
+            for chunk in chunks:
+                self.wfile.write(chunk)
+        except Exception as e:
+            # 响应头已发出，只能中断连接
+            print(f"❌ 流式导出中断: {str(e)}")
+    
+    def serve_category_api(self, category):
+        """
+        提供类别API
+        """
+        try:
+            cache_key = make_cache_key("category", {"category": category})
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.list_tools_by_category(category))
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error(f"无法获取类别 {category} 的工具数据")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_search_api(self, query):
+        """
+        提供搜索API
+        """
+        try:
+            # PocketBase的 ~ 运算符不区分大小写，因此按小写归一化缓存键
+            cache_key = make_cache_key("search", {"q": query.lower()})
+            # 缓存未命中（或缓存关闭）时，同一时刻的相同请求也只加载、序列化一次
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.search(query))
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error(f"无法搜索 '{query}' 的结果")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_suggest_api(self, q, limit):
+        """
+        输入联想API: /api/suggest?q=gpt&limit=8
+        """
+        query = q
+        if not query:
+            self.send_json_response({"items": []})
+            return
+        try:
+            cache_key = make_cache_key("suggest", {"q": query.lower(), "limit": limit})
+            payload, cache_state = self.pb_client.response_cache.get_or_load(
+                cache_key,
+                JsonPayload.loader(lambda: self.pb_client.suggest(query, limit))
+            )
+            if payload is not None:
+                self.send_payload(payload, {"X-Cache": cache_state})
+            else:
+                self.send_upstream_error(f"无法获取 '{query}' 的联想结果")
+        except Exception as e:
+            print(f"API错误: {str(e)}")
+            self.send_error(500, f"服务器错误: {str(e)}")
+    
+    def serve_cyberpunk_homepage(self):
+        """
+        返回赛博朋克主页
+        """
+        # 主页很小且引用的资源URL随内容变化，每次用ETag重新验证，未变时只返回304
+        self.send_static(self.pb_client.homepage.homepage(), 'no-cache')
+    
+    def serve_static_asset(self, path):
+        """
+        提供带指纹的静态资源，内容不变所以可永久缓存
+        """
+        asset = STATIC_ASSETS.lookup(STATIC_PREFIX + path)
+        if asset is None:
+            self.send_error(404, "Not Found")
+            return
+        self.send_static(asset, IMMUTABLE_CACHE_CONTROL)
+    
+    def send_upstream_error(self, message, endpoint=None):
+        """
+        无法从PocketBase取得数据: 出错的接口（缺省为记录列表接口）正在熔断时返回503并带
+        Retry-After，否则返回500；其他接口（如实时订阅）的熔断不影响本次响应
+        """
+        breaker = self.pb_client.breaker
+        endpoint = endpoint or self.pb_client.records_endpoint
+        retry_after = breaker.retry_after(endpoint) if breaker is not None else None
+        if retry_after is None:
+            self.send_error(500, message)
+            return
+        retry_after = max(1, math.ceil(retry_after))
+        self.send_json_response({"error": message, "retry_after": retry_after},
+                                {"Retry-After": str(retry_after)}, status=503)
+    
+    def send_error(self, code, message=None, explain=None):
+        """
+        状态行只能使用latin-1编码，中文错误信息改放到响应体中
+        """
+        if message is not None and not message.isascii():
+            message, explain = None, explain or message
+        super().send_error(code, message, explain)
+    
+    def send_payload(self, payload, extra_headers=None):
+        """
+        发送预序列化的JSON响应，支持 If-None-Match / If-Modified-Since 条件请求
+        """
+        encoding, body = payload.select(self.headers.get('Accept-Encoding'))
+        not_modified = payload.not_modified(
+            self.headers.get('If-None-Match'),
+            self.headers.get('If-Modified-Since')
+        )
+        self.send_response(304 if not_modified else 200)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('ETag', payload.etag_for(encoding))
+        if payload.last_modified:
+            self.send_header('Last-Modified', payload.last_modified)
+        # 允许浏览器和CDN缓存，但每次使用前都要用ETag重新验证
+        self.send_header('Cache-Control', 'public, no-cache')
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        if not_modified:
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        self.write_body(encoding, body)
+    
+    def send_static(self, asset, cache_control):
+        """
+        发送内存中的静态资源：支持 If-None-Match，按 Accept-Encoding 选择预压缩版本，
+        平台支持时用 sendfile 从内存文件零拷贝写出
+        """
+        encoding, body = asset.select(self.headers.get('Accept-Encoding'))
+        not_modified = asset.not_modified(self.headers.get('If-None-Match'))
+        self.send_response(304 if not_modified else 200)
+        self.send_header('Content-type', asset.content_type)
+        self.send_header('ETag', asset.etag_for(encoding))
+        self.send_header('Cache-Control', cache_control)
+        if not_modified:
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        handle = asset.files.get(encoding)
+        if handle is None or self.command == 'HEAD':
+            self.write_body(encoding, body)
+            return
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.connection.sendfile(handle, 0, len(body))
+        self.byte_counter.sent += len(body)
+    
+    def write_body(self, encoding, body):
+        """
+        补齐编码相关的响应头并写出响应体
+        """
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_json_response(self, data, extra_headers=None, status=200):
+        """发送JSON响应"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
         self.send_header('Content-type', 'application/json; charset=utf-8')
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self.wfile.write(body)
+
+
+class BoundedThreadPoolServer(socketserver.TCPServer):
+    """
+    固定工作线程数 + 有界等待队列的HTTP服务器
+
+    accept循环只负责把连接放入等待队列，由 workers 个常驻线程处理。队列满时：
+    shed=False 则accept暂停，多余的连接留在内核的listen backlog中排队；
+    shed=True 则立即以 503 + Retry-After 拒绝新连接（由单独的线程回复），
+    已排队的请求不会因为积压而越等越久。
+    关闭时先处理完已接受的连接，最多等待 drain_timeout 秒。
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=32, backlog=128,
+                 bind_and_activate=True, drain_timeout=1.0, shed=False, retry_after=1, on_shed=None):
+        self.workers = max(1, int(workers))
+        self.request_queue_size = max(1, int(backlog))
+        self.drain_timeout = drain_timeout
+        self.shed = shed
+        self.on_shed = on_shed
+        self.overload_response = overload_response(retry_after)
+        self._pending = queue.Queue(maxsize=self.request_queue_size)
+        self._rejected = queue.Queue(maxsize=self.request_queue_size)
+        self._worker_threads = []
+        super().__init__(server_address, handler_class, bind_and_activate)
+        if shed:
+            threading.Thread(target=self._shed_loop, name="pb-shedder", daemon=True).start()
+        for index in range(self.workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"pb-worker-{index}",
+                daemon=True
+            )
+            worker.start()
+            self._worker_threads.append(worker)
+
+    def process_request(self, request, client_address):
+        """
+        把连接交给工作线程；开启 shed 且队列已满时转交拒绝线程
+        """
+        if not self.shed:
+            self._pending.put((request, client_address))
+            return
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            if self.on_shed is not None:
+                self.on_shed()
+            try:
+                self._rejected.put_nowait(request)
+            except queue.Full:
+                # 拒绝线程也积压了，直接断开
+                self.shutdown_request(request)
+
+    def _shed_loop(self):
+        while True:
+            request = self._rejected.get()
+            try:
+                # 先读掉请求头，避免关闭时内核因未读数据发送RST，客户端收不到503
+                request.settimeout(0.2)
+                request.recv(65536)
+                request.sendall(self.overload_response)
+            except OSError:
+                pass
+            finally:
+                self.shutdown_request(request)
+
+    def _worker_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._worker_threads:
+            self._pending.put(None)
+        deadline = time.monotonic() + self.drain_timeout
+        for worker in self._worker_threads:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+
+
+def overload_response(retry_after=1):
+    """
+    等待队列已满时直接写到连接上的完整503响应
+    """
+    body = json.dumps({"error": "服务器繁忙，请稍后重试", "retry_after": retry_after}, ensure_ascii=False).encode('utf-8')
+    head = (
+        "HTTP/1.0 503 Service Unavailable\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        f"Retry-After: {retry_after}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+class ThreadingPocketBaseServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    每个连接一个线程的HTTP服务器（不限并发）
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class CountingWriter:
+    """
+    包装连接的 wfile，累计写出的字节数
+    """
+
+    __slots__ = ("raw", "sent")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sent = 0
+
+    def write(self, data):
+        written = self.raw.write(data)
+        self.sent += len(data)
+        return written
 
+    def flush(self):
+        self.raw.flush()
 
-def run_pocketbase_server(pocketbase_url="http://localhost:8090", port=8095):
+    @property
+    def closed(self):
+        return self.raw.closed
+
+    def close(self):
+        self.raw.close()
+
+
+def metrics_middleware(handler, route, params, call_next):
+    return handler.pb_client.metrics.middleware(handler, route, params, call_next)
+
+
+# CORS预检未带 Access-Control-Request-Headers 时允许的请求头
+CORS_ALLOW_HEADERS = "Content-Type, If-None-Match, If-Modified-Since"
+
+
+class DiscardWriter:
+    """
+    HEAD 请求在写完响应头后替换 wfile，丢弃响应体
+    """
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+DISCARD_WRITER = DiscardWriter()
+
+# 路由表：新增接口在这里注册，处理方法以关键字参数接收路径参数与声明的查询参数
+ROUTES = Router(middleware=[metrics_middleware])
+ROUTES.get('/healthz', CyberpunkPocketBaseHandler.serve_healthz)
+ROUTES.get('/readyz', CyberpunkPocketBaseHandler.serve_readyz)
+ROUTES.get('/metrics', CyberpunkPocketBaseHandler.serve_metrics)
+ROUTES.get('/api/tools', CyberpunkPocketBaseHandler.serve_tools_api, query={
+    'stream': QueryParam(str),
+    'fields': QueryParam(parse_fields),
+    'after': QueryParam(str),
+    'limit': QueryParam(int, minimum=1, maximum=500),
+    'sort': QueryParam(str)
+}, middleware=[rate_limit_middleware('listing')])
+ROUTES.get('/api/tools/category/{category}', CyberpunkPocketBaseHandler.serve_category_api,
+           middleware=[rate_limit_middleware('listing')])
+ROUTES.get('/api/search/{query}', CyberpunkPocketBaseHandler.serve_search_api,
+           middleware=[rate_limit_middleware('search')])
+ROUTES.get('/api/suggest', CyberpunkPocketBaseHandler.serve_suggest_api, query={
+    'q': QueryParam(str, ''),
+    'limit': QueryParam(int, 8, minimum=1, maximum=50)
+}, middleware=[rate_limit_middleware('suggest')])
+ROUTES.get(STATIC_PREFIX + '{path:path}', CyberpunkPocketBaseHandler.serve_static_asset)
+# 其他路径返回赛博朋克主页
+ROUTES.set_fallback('GET', CyberpunkPocketBaseHandler.serve_cyberpunk_homepage, name='homepage')
+
+
+# 可选的并发模式: single=单线程(原始行为), threading=每连接一线程, pool=有界线程池
+# prefork=多个工作进程共享端口，每个进程内为有界线程池
+SERVER_MODES = ("single", "threading", "pool", "prefork")
+
+
+def create_server(pb_client, port=8095, mode="pool", workers=32, backlog=128, host="", reuse_port=False):
+    """
+    按并发模式创建HTTP服务器（不启动）；reuse_port 时以 SO_REUSEPORT 绑定，多个进程可监听同一端口
+    """
+    def handler_factory(*args, **kwargs):
+        return CyberpunkPocketBaseHandler(pb_client, *args, **kwargs)
+
+    if mode == "single":
+        httpd = socketserver.TCPServer((host, port), handler_factory, bind_and_activate=False)
+    elif mode == "threading":
+        httpd = ThreadingPocketBaseServer((host, port), handler_factory, bind_and_activate=False)
+    elif mode == "pool":
+        httpd = BoundedThreadPoolServer((host, port), handler_factory, workers=workers, backlog=backlog,
+                                        bind_and_activate=False,
+                                        shed=os.getenv("PB_SHED_LOAD", "1") != "0",
+                                        retry_after=int(os.getenv("PB_SHED_RETRY_AFTER", 1)),
+                                        on_shed=pb_client.metrics.shed.labels().inc)
+    else:
+        raise ValueError(f"未知的服务器模式: {mode} (可选: {', '.join(SERVER_MODES)})")
+    try:
+        if reuse_port:
+            httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        httpd.server_bind()
+        httpd.server_activate()
+    except BaseException:
+        httpd.server_close()
+        raise
+    return httpd
+
+
+def serve_worker(index, pocketbase_url, port, workers, backlog, drain_timeout, changes):
+    """
+    prefork 模式的工作进程: 从 changes 队列接收目录及其后的每条变更，以 SO_REUSEPORT 监听同一端口
+    """
+    from pocketbase_workers import CatalogFollower, drain_on_signals
+
+    pb_client = PocketBaseCyberpunkServer(pocketbase_url)
+    follower = CatalogFollower(pb_client.catalog, changes).start()
+    # 不做认证/建表/实时订阅，这些只在监督进程中进行
+    pb_client.bootstrap_state = "ready"
+    if pb_client.access_log is not None:
+        pb_client.access_log.start()
+    try:
+        with create_server(pb_client, port, "pool", workers, backlog, reuse_port=True) as httpd:
+            httpd.drain_timeout = drain_timeout
+            drain_on_signals(httpd)
+            httpd.serve_forever()
+    finally:
+        follower.stop()
+        if pb_client.access_log is not None:
+            pb_client.access_log.stop()
+        if pb_client._http is not None:
+            pb_client.http.close()
+
+
+def run_prefork_server(pocketbase_url, port, workers, backlog, processes=None, drain_timeout=10.0):
+    """
+    监督进程: 同步目录并把每条变更转发给工作进程，启动并看护工作进程；不处理HTTP请求
+    """
+    # multiprocessing 只在 prefork 模式下导入，不拖慢其他模式的冷启动
+    from pocketbase_workers import CatalogBroadcaster, PreforkSupervisor, check_port, reuse_port_supported
+
+    if not reuse_port_supported():
+        raise ValueError("当前平台不支持 SO_REUSEPORT，无法使用 prefork 模式")
+    check_port(port)
+    pb_client = PocketBaseCyberpunkServer(pocketbase_url)
+    broadcaster = CatalogBroadcaster(pb_client.catalog)
+    supervisor = PreforkSupervisor(
+        serve_worker, (pocketbase_url, port, workers, backlog, drain_timeout),
+        processes=processes, drain_timeout=drain_timeout, broadcaster=broadcaster
+    )
+    try:
+        pb_client.start_bootstrap(realtime=os.getenv("PB_REALTIME", "1") != "0")
+        print(f"✅ 服务器启动成功! 访问: http://localhost:{port}")
+        print("🛑 按 Ctrl+C 停止服务器")
+        supervisor.run()
+        print("\n🛑 服务器已停止")
+    finally:
+        print(f"📈 工作进程统计: {supervisor.stats}，目录变更转发: {broadcaster.stats}")
+        pb_client.stop_realtime()
+        pb_client.auth.stop()
+        if pb_client.snapshot is not None:
+            pb_client.snapshot.stop()
+        if pb_client._http is not None:
+            pb_client.http.close()
+
+
+def run_pocketbase_server(pocketbase_url="http://localhost:8090", port=8095,
+                          mode="pool", workers=32, backlog=128):
     """
     运行集成PocketBase的赛博朋克服务器
     """
     print("🚀 启动集成PocketBase的赛博朋克AI工具聚合网站服务器...")
     print(f"🔌 PocketBase URL: {pocketbase_url}")
     print(f"🌐 服务器地址: http://localhost:{port}")
+    print(f"🧵 并发模式: {mode} (workers={workers}, backlog={backlog})")
+    
+    if mode == "prefork":
+        try:
+            run_prefork_server(pocketbase_url, port, workers, backlog,
+                               processes=int(os.getenv("PB_PROCESSES", 0)) or None,
+                               drain_timeout=float(os.getenv("PB_DRAIN_TIMEOUT", 10)))
+        except OSError as e:
+            print(f"\n❌ 端口{port}已被占用，请尝试其他端口: {e}")
+        return
     
     # 初始化PocketBase客户端
     pb_client = PocketBaseCyberpunkServer(pocketbase_url)
-    
-    # 尝试认证
-    if pb_client.authenticate():
-        print("✅ 连接到PocketBase服务器")
-        
-        # 创建数据表
-        pb_client.create_collections()
-        
-        # 填充示例数据
-        pb_client.populate_sample_data()
-    else:
-        print("⚠️ 无法连接到PocketBase服务器，将以只读模式运行")
-    
-    # 创建处理器
-    def handler_factory(*args, **kwargs):
-        return CyberpunkPocketBaseHandler(pb_client, *args, **kwargs)
+    if pb_client.access_log is not None:
+        pb_client.access_log.start()
     
     try:
-        with socketserver.TCPServer(("", port), handler_factory) as httpd:
+        with create_server(pb_client, port, mode, workers, backlog) as httpd:
+            # 端口已开始监听，认证/建表/同步目录在后台进行，就绪状态见 /readyz
+            pb_client.start_bootstrap(realtime=os.getenv("PB_REALTIME", "1") != "0")
             print(f"✅ 服务器启动成功! 访问: http://localhost:{port}")
             print("🛑 按 Ctrl+C 停止服务器")
             httpd.serve_forever()
@@ -657,10 +1470,25 @@ def run_pocketbase_server(pocketbase_url="http://localhost:8090", port=8095):
         print("\n🛑 服务器已停止")
     except OSError as e:
         print(f"\n❌ 端口{port}已被占用，请尝试其他端口: {e}")
+    finally:
+        print(f"📈 响应缓存统计: {pb_client.response_cache.stats()}")
+        print(f"📈 请求合并统计: {pb_client.single_flight.stats()}")
+        pb_client.stop_realtime()
+        pb_client.auth.stop()
+        if pb_client.access_log is not None:
+            pb_client.access_log.stop()
+        if pb_client.snapshot is not None:
+            pb_client.snapshot.stop()
+        if pb_client._http is not None:
+            print(f"📈 PocketBase连接池统计: {pb_client.http.snapshot()}")
+            pb_client.http.close()
 
 
 if __name__ == "__main__":
     import sys
     port = int(os.environ.get('PORT', 8095))
     pocketbase_url = os.environ.get('POCKETBASE_URL', 'http://localhost:8090')
-    run_pocketbase_server(pocketbase_url, port)
\ No newline at end of file
+    mode = os.environ.get('PB_SERVER_MODE', 'pool')
+    workers = int(os.environ.get('PB_WORKERS', 32))
+    backlog = int(os.environ.get('PB_BACKLOG', 128))
+    run_pocketbase_server(pocketbase_url, port, mode, workers, backlog)
\ No newline at end of file
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+运行指标与访问日志 - 按路由/上游接口的延迟直方图、计数器，以Prometheus文本格式输出；
+访问日志在后台线程中批量写出，可按比例采样
+"""
+
+import bisect
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+
+# 延迟直方图的桶上界(秒)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class GaugeChild(CounterChild):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class HistogramChild:
+    """
+    固定桶直方图；桶下标在锁外用二分查找确定，锁内只做三次加法
+    """
+
+    __slots__ = ("_lock", "buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        # 最后一格是 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class MetricFamily:
+    """
+    同名指标按标签值分成多个子指标，子指标首次使用时创建
+    """
+
+    def __init__(self, kind, name, help_text, labelnames=(), buckets=None):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else DEFAULT_BUCKETS
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        if self.kind == "histogram":
+            return HistogramChild(self.buckets)
+        if self.kind == "gauge":
+            return GaugeChild()
+        return CounterChild()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in sorted(self._children.items()):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{format_labels(self.labelnames, values)} {format_value(child.value)}")
+                continue
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, values)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, values)} {count}")
+
+
+class MetricsRegistry:
+    """
+    指标注册表。add_collector 注册在抓取时才读取的指标（如缓存统计），
+    回调返回 [(名称, 类型, 说明, [(标签字典, 值)])]
+    """
+
+    def __init__(self):
+        self._families = []
+        self._collectors = []
+
+    def _add(self, family):
+        self._families.append(family)
+        return family
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(MetricFamily("counter", name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(MetricFamily("gauge", name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=None):
+        return self._add(MetricFamily("histogram", name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for family in self._families:
+            family.render(lines)
+        for collector in self._collectors:
+            try:
+                collected = collector()
+            except Exception as e:
+                print(f"❌ 指标采集异常: {str(e)}")
+                continue
+            for name, kind, help_text, samples in collected:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_text = format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{name}{label_text} {format_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+def upstream_endpoint(url):
+    """
+    把上游URL归一为低基数的接口名，记录id替换为 {id}
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if "records" in parts:
+        index = parts.index("records")
+        parts = parts[:index + 1] + ["{id}"] * min(1, len(parts) - index - 1)
+    return "/" + "/".join(parts)
+
+
+class ServerMetrics:
+    """
+    本服务的指标集合: HTTP请求、在途请求、发送字节，以及对PocketBase的每次调用
+    """
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.request_seconds = self.registry.histogram(
+            "pb_http_request_duration_seconds", "HTTP请求处理耗时", ("route", "method"))
+        self.responses = self.registry.counter(
+            "pb_http_responses_total", "按状态码统计的HTTP响应数", ("route", "method", "status"))
+        self.bytes_sent = self.registry.counter(
+            "pb_http_response_bytes_total", "发送的响应字节数(含响应头)", ("route",))
+        self.in_flight = self.registry.gauge(
+            "pb_http_requests_in_flight", "正在处理的HTTP请求数", ("route",))
+        self.upstream_seconds = self.registry.histogram(
+            "pb_upstream_request_duration_seconds", "PocketBase调用耗时", ("method", "endpoint"))
+        self.upstream_responses = self.registry.counter(
+            "pb_upstream_responses_total", "PocketBase调用结果", ("method", "endpoint", "status"))
+        self.shed = self.registry.counter(
+            "pb_http_requests_shed_total", "等待队列已满时直接以503拒绝的连接数")
+
+    def observe_request(self, route, method, status, sent, seconds):
+        self.request_seconds.labels(route, method).observe(seconds)
+        self.responses.labels(route, method, str(status)).inc()
+        if sent:
+            self.bytes_sent.labels(route).inc(sent)
+
+    def observe_upstream(self, method, url, status, seconds):
+        """
+        PooledSession 的 observer 回调；请求异常时 status 为 "error"
+        """
+        endpoint = upstream_endpoint(url)
+        self.upstream_seconds.labels(method, endpoint).observe(seconds)
+        self.upstream_responses.labels(method, endpoint, str(status)).inc()
+
+    def middleware(self, handler, route, params, call_next):
+        """
+        路由中间件: 维护每个路由的在途请求数
+        """
+        gauge = self.in_flight.labels(route.name)
+        gauge.inc()
+        try:
+            return call_next(handler, params)
+        finally:
+            gauge.dec()
+
+    def render(self):
+        return self.registry.render()
+
+
+class AccessLog:
+    """
+    结构化访问日志: 请求线程只把记录放进有界队列，后台线程每隔 interval 秒批量写出
+
+    target 为 "stderr"、"stdout" 或文件路径；sample 为记录比例(0~1)。
+    队列满时丢弃新记录并计数，不阻塞请求线程。
+    """
+
+    def __init__(self, target="stderr", sample=1.0, interval=1.0, max_queue=10000):
+        self.target = target
+        self.sample = max(0.0, min(1.0, float(sample)))
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.stats = {"logged": 0, "sampled_out": 0, "dropped": 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def log(self, record):
+        if self.sample < 1.0 and random.random() >= self.sample:
+            self._count("sampled_out")
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pb-access-log", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _open(self):
+        if self.target == "stderr":
+            return sys.stderr, False
+        if self.target == "stdout":
+            return sys.stdout, False
+        return open(self.target, "a", encoding="utf-8"), True
+
+    def _drain(self):
+        records = []
+        while True:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                return records
+
+    def _run(self):
+        stream, owned = self._open()
+        try:
+            while True:
+                stopping = self._stop.wait(self.interval)
+                records = self._drain()
+                if records:
+                    stream.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+                    stream.flush()
+                    self._count("logged", len(records))
+                if stopping:
+                    break
+        finally:
+            if owned:
+                stream.close()
+
+
+def access_log_from_env():
+    """
+    按 PB_ACCESS_LOG / PB_ACCESS_LOG_SAMPLE 创建访问日志；PB_ACCESS_LOG=off 时返回 None
+    """
+    target = os.getenv("PB_ACCESS_LOG", "stderr")
+    if target.lower() in ("", "0", "off", "none"):
+        return None
+    return AccessLog(target, sample=float(os.getenv("PB_ACCESS_LOG_SAMPLE", 1.0)))
+
+
+def now_iso():
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z"
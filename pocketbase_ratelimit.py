@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+按客户端限流 - 内存中的令牌桶，按客户端IP分别计数，长时间不活动的桶按LRU淘汰
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def parse_budget(text):
+    """
+    解析 "每秒速率/突发容量"，如 "10/20"；只写速率时突发容量取速率的两倍
+    """
+    rate, _, burst = str(text).partition("/")
+    rate = float(rate)
+    burst = float(burst) if burst else rate * 2
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"无效的限流配置: {text}")
+    return rate, burst
+
+
+class TokenBucketLimiter:
+    """
+    令牌桶: 每个客户端最多积攒 burst 个令牌，每秒补充 rate 个，每个请求消耗一个
+
+    桶只存 [令牌数, 上次更新时间] 两个数，按访问顺序放在 OrderedDict 中，超过
+    max_clients 时淘汰最久未访问的桶（被淘汰的客户端下次从满桶开始，只会更宽松）。
+    """
+
+    def __init__(self, rate, burst, max_clients=10000, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"allowed": 0, "limited": 0, "evicted": 0}
+        # RateLimit-Policy: 容量;w=装满一桶所需的秒数
+        self.policy = f"{int(self.burst)};w={max(1, math.ceil(self.burst / self.rate))}"
+
+    def take(self, client):
+        """
+        消耗一个令牌，返回 (是否放行, 剩余令牌数, 距桶装满/可再次请求的秒数)
+        """
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+                    self.stats["evicted"] += 1
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            tokens = bucket[0]
+            if tokens >= 1.0:
+                bucket[0] = tokens = tokens - 1.0
+                self.stats["allowed"] += 1
+                return True, int(tokens), math.ceil((self.burst - tokens) / self.rate)
+            self.stats["limited"] += 1
+        return False, 0, math.ceil((1.0 - tokens) / self.rate)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# 预算名 -> (环境变量, 缺省的 "每秒速率/突发容量")
+RATE_LIMIT_BUDGETS = {
+    "search": ("PB_RATE_LIMIT_SEARCH", "10/30"),
+    "listing": ("PB_RATE_LIMIT_LISTING", "20/60"),
+    "suggest": ("PB_RATE_LIMIT_SUGGEST", "20/60")
+}
+
+
+def rate_limits_from_env():
+    """
+    按环境变量创建各预算的限流器；PB_RATE_LIMIT=0 全部关闭，单个预算设为 off 时只关闭该项
+    """
+    if os.getenv("PB_RATE_LIMIT", "1") == "0":
+        return {}
+    max_clients = int(os.getenv("PB_RATE_LIMIT_CLIENTS", 10000))
+    limiters = {}
+    for budget, (variable, default) in RATE_LIMIT_BUDGETS.items():
+        text = os.getenv(variable, default)
+        if text.lower() in ("", "0", "off", "none"):
+            continue
+        rate, burst = parse_budget(text)
+        limiters[budget] = TokenBucketLimiter(rate, burst, max_clients=max_clients)
+    return limiters
+
+
+def rate_limit_middleware(budget):
+    """
+    按 budget 名称限流的路由中间件；限流器取自 handler.pb_client.rate_limits，未配置时直接放行。
+    放行的响应附带 RateLimit-* 头，超限时直接返回429，不再执行处理函数
+    """
+    def middleware(handler, route, params, call_next):
+        limiter = handler.pb_client.rate_limits.get(budget)
+        if limiter is None:
+            return call_next(handler, params)
+        allowed, remaining, reset = limiter.take(handler.client_key())
+        handler.extra_headers.extend((
+            ("RateLimit-Limit", str(int(limiter.burst))),
+            ("RateLimit-Remaining", str(remaining)),
+            ("RateLimit-Reset", str(reset)),
+            ("RateLimit-Policy", limiter.policy)
+        ))
+        if allowed:
+            return call_next(handler, params)
+        handler.send_json_response({"error": "请求过于频繁，请稍后重试", "retry_after": reset},
+                                   {"Retry-After": str(reset)}, status=429)
+    return middleware
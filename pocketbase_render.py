@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+主页服务端渲染 - 预编译的HTML模板，把目录前N个工具卡片直接写入主页，按目录版本缓存
+"""
+
+import html
+import re
+import threading
+
+from pocketbase_static import StaticAsset
+
+
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+# 与 static/cyberpunk.js 中 createToolCard 生成的结构一致，客户端可直接接管
+TOOL_CARD_TEMPLATE = """<div class="cyber-tool-card" data-id="{{id}}">
+                <span class="cyber-tool-category">{{category}}</span>
+                <h3 class="cyber-tool-title">{{name}}</h3>
+                <p class="cyber-tool-description">{{description}}</p>
+                <div class="cyber-tool-actions">
+                    <a href="{{url}}" target="_blank" rel="noopener" class="cyber-tool-link">访问网站</a>
+                </div>
+            </div>"""
+
+
+class CompiledTemplate:
+    """
+    把 {{名称}} 占位符模板预先拆成 [文本, 名称, 文本, 名称, ..., 文本]，
+    渲染时只做一次 join，不再解析模板
+    """
+
+    __slots__ = ("parts", "names")
+
+    def __init__(self, text):
+        pieces = PLACEHOLDER.split(text)
+        self.parts = pieces[0::2]
+        self.names = pieces[1::2]
+
+    def render(self, values):
+        """
+        values 中的值按原样插入，需要转义的由调用方先转义
+        """
+        out = [self.parts[0]]
+        for name, part in zip(self.names, self.parts[1:]):
+            out.append(values[name])
+            out.append(part)
+        return "".join(out)
+
+
+def tool_card_values(tool):
+    category = str(tool.get("category") or "").replace("_", " ", 1).upper()
+    return {
+        "id": html.escape(str(tool.get("id") or "")),
+        "category": html.escape(category),
+        "name": html.escape(str(tool.get("name") or "")),
+        "description": html.escape(str(tool.get("description") or "")),
+        "url": html.escape(str(tool.get("url") or ""))
+    }
+
+
+class HomepageRenderer:
+    """
+    生成带前 first_count 个工具卡片的主页
+
+    页面模板需包含 {{status}}、{{tools}}、{{rendered}}、{{total}} 占位符。目录未就绪
+    (或 first_count 为 0)时返回不含卡片的页面，由客户端脚本照旧加载。渲染结果连同
+    压缩版本按目录 version 缓存，目录变更后的第一次请求重新渲染。
+    """
+
+    def __init__(self, catalog, page_template, first_count=24):
+        self.catalog = catalog
+        self.page = CompiledTemplate(page_template)
+        self.card = CompiledTemplate(TOOL_CARD_TEMPLATE)
+        self.first_count = max(0, int(first_count))
+        self._lock = threading.Lock()
+        # (目录version, StaticAsset)，整体替换以免读到不配对的两项
+        self._cached = None
+        self.empty = StaticAsset("index.html", self.render_page([], None).encode("utf-8"))
+        self.stats = {"renders": 0}
+
+    def render_page(self, tools, total):
+        if total is None:
+            status = "加载工具数据中..."
+        elif total:
+            status = f"共 {total} 个AI工具"
+        else:
+            status = "暂无工具数据"
+        return self.page.render({
+            "status": status,
+            "tools": "\n            ".join(self.card.render(tool_card_values(tool)) for tool in tools),
+            "rendered": str(len(tools)),
+            "total": "" if total is None else str(total)
+        })
+
+    def homepage(self):
+        """
+        返回当前目录版本的主页 StaticAsset
+        """
+        if not self.first_count or not self.catalog.loaded:
+            return self.empty
+        cached = self._cached
+        if cached is not None and cached[0] == self.catalog.version:
+            return cached[1]
+        with self._lock:
+            # 并发请求只有一个线程渲染，其余等待后直接使用结果
+            cached = self._cached
+            if cached is not None and cached[0] == self.catalog.version:
+                return cached[1]
+            version, total, tools = self.catalog.head(self.first_count)
+            asset = StaticAsset("index.html", self.render_page(tools, total).encode("utf-8"), sendfile=False)
+            self._cached = (version, asset)
+            self.stats["renders"] += 1
+        return asset
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+预编译路由表 - 按路径段建树，匹配耗时只与路径深度有关，与路由数量无关
+
+路由模式示例:
+    /api/tools                      静态路径，直接查字典
+    /api/tools/category/{category}  {名称} 匹配一个路径段（已URL解码）
+    /api/items/{id:int}             带类型的路径参数，转换失败视为不匹配
+    /static/{path:path}             path 类型匹配剩余的全部路径
+"""
+
+import re
+from urllib.parse import parse_qs, unquote
+
+
+PARAM_PATTERN = re.compile(r"^\{(\w+)(?::(\w+))?\}$")
+
+
+def convert_int(value):
+    return int(value)
+
+
+def convert_str(value):
+    if not value:
+        raise ValueError("空值")
+    return value
+
+
+# 路径参数类型；path 类型只能出现在模式末尾
+PATH_CONVERTERS = {"str": convert_str, "int": convert_int, "path": convert_str}
+
+
+def parse_bool_value(value):
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+class QueryParam:
+    """
+    查询参数声明: 类型转换、缺省值，以及数值的取值范围（超出时截断到边界）
+    """
+
+    __slots__ = ("type", "default", "minimum", "maximum")
+
+    def __init__(self, type=str, default=None, minimum=None, maximum=None):
+        self.type = parse_bool_value if type is bool else type
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def parse(self, values):
+        if not values:
+            return self.default
+        value = self.type(values[0].strip() if isinstance(values[0], str) else values[0])
+        if self.minimum is not None:
+            value = max(self.minimum, value)
+        if self.maximum is not None:
+            value = min(self.maximum, value)
+        return value
+
+
+class Route:
+    """
+    一条路由: 方法、模式、处理函数以及按注册顺序组合好的中间件链
+
+    处理函数签名 endpoint(handler, **参数)；中间件签名
+    middleware(handler, route, params, call_next)，调用 call_next(handler, params) 继续。
+    """
+
+    __slots__ = ("method", "pattern", "name", "endpoint", "query", "middleware", "call")
+
+    def __init__(self, method, pattern, endpoint, name=None, query=None, middleware=()):
+        self.method = method
+        self.pattern = pattern
+        self.name = name or pattern
+        self.endpoint = endpoint
+        self.query = query or {}
+        self.middleware = tuple(middleware)
+        self.call = None
+
+    def compile(self, global_middleware=()):
+        """
+        把中间件链预先组合成一个可调用对象，请求时不再逐层构造闭包
+        """
+        endpoint = self.endpoint
+
+        def call(handler, params):
+            return endpoint(handler, **params)
+
+        for middleware in reversed(tuple(global_middleware) + self.middleware):
+            call = self._wrap(middleware, call)
+        self.call = call
+        return self
+
+    def _wrap(self, middleware, call_next):
+        route = self
+
+        def call(handler, params):
+            return middleware(handler, route, params, call_next)
+        return call
+
+    def parse_query(self, query_string, raw=None):
+        """
+        按声明转换查询参数；转换失败抛出 ValueError
+        """
+        if not self.query:
+            return {}
+        raw = parse_qs(query_string) if raw is None else raw
+        return {name: spec.parse(raw.get(name)) for name, spec in self.query.items()}
+
+
+class _Node:
+    __slots__ = ("children", "param", "rest", "routes")
+
+    def __init__(self):
+        # 静态段 -> 子节点
+        self.children = {}
+        # (参数名, 转换函数, 子节点)：每个位置只允许一个参数段
+        self.param = None
+        # (参数名, 路由表)：path 类型参数，吞掉剩余路径
+        self.rest = None
+        # 方法 -> Route
+        self.routes = {}
+
+
+class RouteMatch:
+    __slots__ = ("route", "params", "_routes")
+
+    def __init__(self, route, params, routes):
+        self.route = route
+        self.params = params
+        self._routes = routes
+
+    @property
+    def allowed(self):
+        """
+        该路径支持的方法（只在405与OPTIONS时才需要，按需计算）
+        """
+        return Router.allowed_methods(self._routes)
+
+
+class Router:
+    """
+    路由表。静态路径在一个字典中一次命中；含参数的路径逐段走树，每段一次字典查找。
+    fallback 处理所有未匹配的路径（本项目中返回主页）。
+    """
+
+    def __init__(self, middleware=()):
+        self.middleware = list(middleware)
+        self.routes = []
+        self._static = {}
+        self._root = _Node()
+        self._fallback = {}
+
+    def add(self, method, pattern, endpoint, name=None, query=None, middleware=()):
+        route = Route(method.upper(), pattern, endpoint, name, query, middleware)
+        segments = pattern.strip("/").split("/") if pattern.strip("/") else []
+        if not any(PARAM_PATTERN.match(segment) for segment in segments):
+            self._static.setdefault(pattern, {})[route.method] = route
+        else:
+            node = self._root
+            for index, segment in enumerate(segments):
+                match = PARAM_PATTERN.match(segment)
+                if match is None:
+                    node = node.children.setdefault(segment, _Node())
+                    continue
+                param_name, kind = match.group(1), match.group(2) or "str"
+                if kind not in PATH_CONVERTERS:
+                    raise ValueError(f"未知的路径参数类型: {kind}")
+                if kind == "path":
+                    if index != len(segments) - 1:
+                        raise ValueError(f"path 类型参数只能位于末尾: {pattern}")
+                    if node.rest is None:
+                        node.rest = (param_name, {})
+                    node.rest[1][route.method] = route
+                    break
+                if node.param is None:
+                    node.param = (param_name, PATH_CONVERTERS[kind], _Node())
+                elif node.param[0] != param_name:
+                    raise ValueError(f"同一位置的路径参数名冲突: {pattern}")
+                node = node.param[2]
+            else:
+                node.routes[route.method] = route
+        self.routes.append(route)
+        route.compile(self.middleware)
+        return route
+
+    def get(self, pattern, endpoint, **options):
+        return self.add("GET", pattern, endpoint, **options)
+
+    def set_fallback(self, method, endpoint, name="fallback", middleware=()):
+        route = Route(method.upper(), "*", endpoint, name, None, middleware).compile(self.middleware)
+        self._fallback[route.method] = route
+        self.routes.append(route)
+        return route
+
+    def _lookup(self, path):
+        """
+        返回 (方法 -> Route, 路径参数)；未匹配时返回 (None, None)
+        """
+        routes = self._static.get(path)
+        if routes is not None:
+            return routes, {}
+        segments = path[1:].split("/")
+        node = self._root
+        params = {}
+        for index, segment in enumerate(segments):
+            child = node.children.get(segment)
+            if child is not None:
+                node = child
+                continue
+            if node.param is not None:
+                param_name, convert, child = node.param
+                try:
+                    params[param_name] = convert(unquote(segment))
+                except ValueError:
+                    child = None
+                if child is not None:
+                    node = child
+                    continue
+            if node.rest is not None and segment:
+                param_name, routes = node.rest
+                params[param_name] = unquote("/".join(segments[index:]))
+                return routes, params
+            return None, None
+        return (node.routes or None), (params if node.routes else None)
+
+    def match(self, method, path):
+        """
+        匹配请求，返回 RouteMatch；路径存在但方法不支持时 route 为 None、allowed 为支持的方法
+        """
+        routes, params = self._lookup(path)
+        if routes is None:
+            routes, params = self._fallback, {}
+        route = routes.get(method)
+        if route is None and method == "HEAD":
+            route = routes.get("GET")
+        return RouteMatch(route, params, routes)
+
+    @staticmethod
+    def allowed_methods(routes):
+        methods = set(routes)
+        if "GET" in methods:
+            methods.add("HEAD")
+        methods.add("OPTIONS")
+        return sorted(methods)
+
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+AI工具本地全文索引 - 英文分词 + 中日韩二元切分、BM25排序、前缀匹配
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+
+
+# 英文/数字按单词切分；中日韩文字连续片段按二元组(bigram)切分
+TOKEN_PATTERN = re.compile(
+    "[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+
+# 各字段的权重，名称命中比描述命中更重要
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "category": 1.0, "description": 1.0}
+
+# 前缀匹配最多展开的词项数，以及展开词相对完整词的分数折扣
+MAX_PREFIX_EXPANSIONS = 64
+PREFIX_BOOST = 0.5
+
+
+def tokenize(text):
+    """
+    把文本切分为词项列表
+    """
+    tokens = []
+    for run in TOKEN_PATTERN.findall(str(text or "").lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class SearchIndex:
+    """
+    增量维护的倒排索引
+
+    postings: 词项 -> {记录id: 加权词频}；查询时所有查询词项都必须命中(AND)，
+    最后一个查询词按前缀展开，用于输入即搜。
+    """
+
+    def __init__(self, field_weights=None, k1=1.2, b=0.75):
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_length = {}
+        self._total_length = 0.0
+        self._sorted_terms = []
+        self._terms_dirty = False
+        # 文档长度归一化因子与按分数排序的倒排表缓存，任何增删后失效
+        self._norms = None
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self._doc_length)
+
+    def _analyze(self, record):
+        weights = {}
+        for field, weight in self.field_weights.items():
+            for token in tokenize(record.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+        return weights
+
+    def add(self, record):
+        with self._lock:
+            record_id = record["id"]
+            if record_id in self._doc_terms:
+                self.remove(record_id)
+            weights = self._analyze(record)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._terms_dirty = True
+                postings[record_id] = weight
+            length = sum(weights.values())
+            self._doc_terms[record_id] = tuple(weights)
+            self._doc_length[record_id] = length
+            self._total_length += length
+            self._invalidate_scores()
+
+    def remove(self, record_id):
+        with self._lock:
+            terms = self._doc_terms.pop(record_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings[term]
+                postings.pop(record_id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._terms_dirty = True
+            self._total_length -= self._doc_length.pop(record_id)
+            self._invalidate_scores()
+
+    def rebuild(self, records):
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._doc_length = {}
+            self._total_length = 0.0
+            self._terms_dirty = True
+            self._invalidate_scores()
+            for record in records:
+                self.add(record)
+
+    def attach(self, catalog):
+        """
+        挂到 ToolCatalog 上，随目录变更增量更新索引
+        """
+        def listener(action, record, previous):
+            if action == "reset":
+                self.rebuild(catalog.iter_records())
+            elif action == "delete":
+                self.remove(previous["id"])
+            else:
+                self.add(record)
+
+        catalog.add_listener(listener)
+        if catalog.loaded:
+            self.rebuild(catalog.iter_records())
+        return self
+
+    def _expand_prefix(self, prefix):
+        """
+        返回以 prefix 开头的 [(词项, 权重)]，完整匹配的词不打折扣
+        """
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        expansions = []
+        for term in self._sorted_terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append((term, 1.0 if term == prefix else PREFIX_BOOST))
+        return expansions
+
+    def _invalidate_scores(self):
+        self._norms = None
+        self._impacts = {}
+
+    def _term_impacts(self, term, norms):
+        """
+        单个词项按BM25分数降序排列的 [(分数, 记录id)]，用于单词查询的top-k
+        """
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            postings = self._postings[term]
+            idf = self._idf(postings, 1.0)
+            impacts = sorted(
+                ((idf * tf / (tf + norms[record_id]), record_id) for record_id, tf in postings.items()),
+                reverse=True
+            )
+            self._impacts[term] = impacts
+        return impacts
+
+    def _doc_norms(self):
+        if self._norms is None:
+            doc_count = len(self._doc_length)
+            average_length = self._total_length / doc_count if doc_count else 1.0
+            k1, b = self.k1, self.b
+            self._norms = {
+                record_id: k1 * (1 - b + b * length / average_length)
+                for record_id, length in self._doc_length.items()
+            }
+        return self._norms
+
+    def _idf(self, postings, boost):
+        doc_count = len(self._doc_length)
+        return boost * (self.k1 + 1) * math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+    def _group_cost(self, terms):
+        return sum(len(self._postings.get(term, ())) for term, _ in terms)
+
+    def search(self, query, limit=50, prefix=True):
+        """
+        返回按相关度降序排列的 [(分数, 记录id)]
+        """
+        groups = [[(token, 1.0)] for token in tokenize(query)]
+        if not groups:
+            return []
+        with self._lock:
+            if prefix:
+                # 最后一个词按前缀展开(中文单字也可前缀匹配二元组)
+                groups[-1] = self._expand_prefix(groups[-1][0][0]) or groups[-1]
+            norms = self._doc_norms()
+            if len(groups) == 1 and len(groups[0]) == 1:
+                term = groups[0][0][0]
+                if term not in self._postings:
+                    return []
+                return self._term_impacts(term, norms)[:limit]
+            # 从最稀有的词组开始求交集，之后的词组只需给候选文档打分
+            groups.sort(key=self._group_cost)
+            scores = None
+            for terms in groups:
+                group_scores = {}
+                for term, boost in terms:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = self._idf(postings, boost)
+                    if scores is None:
+                        for record_id, tf in postings.items():
+                            group_scores[record_id] = group_scores.get(record_id, 0.0) + idf * tf / (tf + norms[record_id])
+                    else:
+                        for record_id in scores:
+                            tf = postings.get(record_id)
+                            if tf is not None:
+                                group_scores[record_id] = group_scores.get(record_id, 0.0) + idf * tf / (tf + norms[record_id])
+                if scores is not None:
+                    for record_id, score in group_scores.items():
+                        group_scores[record_id] = score + scores[record_id]
+                scores = group_scores
+                if not scores:
+                    return []
+            return heapq.nlargest(limit, ((score, record_id) for record_id, score in scores.items()))
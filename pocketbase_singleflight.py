@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+请求合并(single-flight) - 同一个键同时只有一次上游调用，并发的相同请求共享其结果
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    按键合并并发调用
+
+    第一个调用者执行函数，执行期间到达的相同键调用只等待并拿到同一个结果
+    (或同一个异常)；调用结束后键即释放，之后的调用会重新执行——这不是缓存。
+    按键统计调用数与被合并的调用数，只保留最近 max_tracked 个键。
+    """
+
+    def __init__(self, enabled=True, max_tracked=256):
+        self.enabled = enabled
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._key_stats = OrderedDict()
+        self._totals = {"calls": 0, "executions": 0, "merged": 0}
+
+    def _track(self, key, merged):
+        stats = self._key_stats.get(key)
+        if stats is None:
+            stats = self._key_stats[key] = {"calls": 0, "merged": 0}
+            while len(self._key_stats) > self.max_tracked:
+                self._key_stats.popitem(last=False)
+        else:
+            self._key_stats.move_to_end(key)
+        stats["calls"] += 1
+        self._totals["calls"] += 1
+        if merged:
+            stats["merged"] += 1
+            self._totals["merged"] += 1
+        else:
+            self._totals["executions"] += 1
+
+    def do(self, key, func):
+        """
+        执行 func() 并返回结果；已有相同键的调用在途时等待并共享其结果
+        """
+        if not self.enabled:
+            return func()
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+            self._track(key, merged=not leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self, top=10):
+        """
+        总计数，以及被合并次数最多的 top 个键
+        """
+        with self._lock:
+            data = dict(self._totals)
+            data["in_flight"] = len(self._calls)
+            keys = sorted(self._key_stats.items(), key=lambda item: item[1]["merged"], reverse=True)
+            data["top_keys"] = [
+                {"key": repr(key), "calls": stats["calls"], "merged": stats["merged"]}
+                for key, stats in keys[:top] if stats["merged"]
+            ]
+        return data
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+AI工具目录的磁盘快照 - 紧凑的二进制格式、mmap读取、原子写入，用于热重启
+
+文件布局(小端):
+    8 字节魔数 | uint32 头部JSON长度 | uint32 记录数
+    头部JSON {"source", "latest_updated", "written_at"}
+    (记录数 + 1) 个 uint64 偏移量（相对数据区起点）
+    数据区: 紧凑JSON数组 [记录,记录,...](UTF-8)，第 i 条为 data[offset[i]:offset[i+1] - 1]
+            （减去其后的 "," 或 "]"），整体载入时一次解析整个数组
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+
+
+SNAPSHOT_MAGIC = b"PBCAT\x00\x01\x00"
+PREAMBLE = struct.Struct("<8sII")
+
+
+def write_snapshot(path, records, source=None):
+    """
+    把记录写入快照文件：先写临时文件并fsync，再用 os.replace 原子替换
+    """
+    offsets = array("Q")
+    blobs = []
+    position = 1
+    latest = ""
+    for record in records:
+        blob = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        blobs.append(blob)
+        offsets.append(position)
+        position += len(blob) + 1
+        latest = max(latest, record.get("updated") or "")
+    offsets.append(max(position, 2))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    header = json.dumps({
+        "source": source,
+        "latest_updated": latest,
+        "written_at": time.time()
+    }).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, "wb") as handle:
+            handle.write(PREAMBLE.pack(SNAPSHOT_MAGIC, len(header), len(blobs)))
+            handle.write(header)
+            handle.write(offsets.tobytes())
+            handle.write(b"[")
+            handle.write(b",".join(blobs))
+            handle.write(b"]")
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(blobs)
+
+
+class CatalogSnapshot:
+    """
+    以 mmap 打开的只读快照，记录按需解码
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, header_length, count = PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"不是目录快照文件: {path}")
+            start = PREAMBLE.size
+            self.header = json.loads(self._mmap[start:start + header_length])
+            start += header_length
+            if sys.byteorder == "little":
+                # 偏移表直接映射，不复制
+                self._offsets = memoryview(self._mmap)[start:start + (count + 1) * 8].cast("Q")
+            else:
+                self._offsets = array("Q", self._mmap[start:start + (count + 1) * 8])
+                self._offsets.byteswap()
+            self._data_start = start + (count + 1) * 8
+            self._count = count
+            if self._data_start + self._offsets[count] > len(self._mmap):
+                raise ValueError(f"快照文件不完整: {path}")
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        start = self._data_start + self._offsets[index]
+        end = self._data_start + self._offsets[index + 1] - 1
+        return json.loads(self._mmap[start:end])
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def records(self):
+        """
+        一次解析整个数据区，比逐条解码快得多
+        """
+        return json.loads(self._mmap[self._data_start:self._data_start + self._offsets[self._count]])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def source(self):
+        return self.header.get("source")
+
+    @property
+    def latest_updated(self):
+        return self.header.get("latest_updated") or ""
+
+    def close(self):
+        offsets = getattr(self, "_offsets", None)
+        if isinstance(offsets, memoryview):
+            offsets.release()
+        self._offsets = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+def load_snapshot(path, source=None):
+    """
+    读取快照中的全部记录；文件不存在、损坏或来自其他PocketBase时返回 None
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with CatalogSnapshot(path) as snapshot:
+            if source is not None and snapshot.source not in (None, source):
+                print(f"ℹ️  目录快照来自 {snapshot.source}，与当前 {source} 不符，忽略")
+                return None
+            return snapshot.records()
+    except (OSError, ValueError, struct.error) as e:
+        print(f"⚠️ 目录快照不可用: {str(e)}")
+        return None
+
+
+class SnapshotWriter:
+    """
+    挂到 ToolCatalog 上，目录变更后在后台合并写盘
+
+    变更只标记脏位；后台线程等到连续 interval 秒没有新变更才写，但距第一次
+    未落盘的变更最多 max_delay 秒。stop() 时把未写的变更写完。
+    """
+
+    def __init__(self, catalog, path, source=None, interval=5.0, max_delay=60.0):
+        self.catalog = catalog
+        self.path = path
+        self.source = source
+        self.interval = interval
+        self.max_delay = max_delay
+        self.written_version = None
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"writes": 0, "failures": 0, "last_records": 0, "last_seconds": 0.0}
+
+    def attach(self):
+        self.catalog.add_listener(lambda action, record, previous: self._dirty.set())
+        return self
+
+    def mark_clean(self):
+        """
+        目录当前内容已在磁盘上（例如刚从快照载入），不必再写
+        """
+        self.written_version = self.catalog.version
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pb-snapshot", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止后台线程，并写出尚未落盘的变更
+        """
+        self._stop.set()
+        self._dirty.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+
+    def flush(self):
+        """
+        目录有未落盘的变更时立即写出
+        """
+        version = self.catalog.version
+        if not self.catalog.loaded or version == self.written_version:
+            return False
+        started = time.perf_counter()
+        try:
+            count = write_snapshot(self.path, self.catalog.records(), self.source)
+        except Exception as e:
+            self.stats["failures"] += 1
+            print(f"❌ 写入目录快照失败: {str(e)}")
+            return False
+        self.written_version = version
+        self.stats["writes"] += 1
+        self.stats["last_records"] = count
+        self.stats["last_seconds"] = round(time.perf_counter() - started, 4)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._dirty.wait()
+            # 合并突发的实时事件，持续有变更时也不会无限推迟
+            deadline = time.monotonic() + self.max_delay
+            while not self._stop.is_set():
+                self._dirty.clear()
+                wait = min(self.interval, deadline - time.monotonic())
+                if wait <= 0 or self._stop.wait(wait) or not self._dirty.is_set():
+                    break
+            if not self._stop.is_set():
+                self.flush()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+AI工具排序索引 - 按评分/名称预先排好序的id列表，支持 after=<id> 的键集分页
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+
+
+def rating_key(record):
+    """
+    评分从高到低，评分相同按id，保证顺序全序且稳定
+    """
+    rating = record.get("rating") or 0
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError):
+        rating = 0.0
+    return (-rating, record["id"])
+
+
+def name_key(record):
+    return (str(record.get("name") or "").lower(), record["id"])
+
+
+# 排序方式 -> 排序键函数；键的最后一项总是记录id
+SORT_KEYS = {"rating": rating_key, "name": name_key}
+
+
+class UnknownCursorError(KeyError):
+    """
+    after 指向的记录不存在（也不在最近删除的记录中）
+    """
+
+
+class SortedIndex:
+    """
+    每种排序方式一个有序的键列表，外加 id -> 键 的字典
+
+    翻页时先查出 after 记录的键，再二分定位到它之后的位置并切出 limit 条，
+    耗时与目录大小基本无关。记录的增删改只在有序列表中插入/删除一个键。
+    最近删除的记录保留其键（最多 max_tombstones 条），正在翻页的客户端
+    持有的游标即使指向刚删除的记录也能继续往后翻。
+    """
+
+    def __init__(self, sort_keys=None, max_tombstones=1024):
+        self.sort_keys = dict(sort_keys or SORT_KEYS)
+        self.max_tombstones = max_tombstones
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._keys = {order: [] for order in self.sort_keys}
+        self._key_of = {order: {} for order in self.sort_keys}
+        self._tombstones = OrderedDict()
+
+    def __len__(self):
+        return len(next(iter(self._key_of.values()), ()))
+
+    def add(self, record):
+        with self._lock:
+            record_id = record["id"]
+            self._tombstones.pop(record_id, None)
+            for order, key_func in self.sort_keys.items():
+                key = key_func(record)
+                keys, key_of = self._keys[order], self._key_of[order]
+                old = key_of.get(record_id)
+                if old == key:
+                    continue
+                if old is not None:
+                    del keys[bisect.bisect_left(keys, old)]
+                bisect.insort(keys, key)
+                key_of[record_id] = key
+
+    def remove(self, record_id):
+        with self._lock:
+            removed = {}
+            for order, key_of in self._key_of.items():
+                key = key_of.pop(record_id, None)
+                if key is not None:
+                    keys = self._keys[order]
+                    del keys[bisect.bisect_left(keys, key)]
+                    removed[order] = key
+            if removed:
+                self._tombstones[record_id] = removed
+                if len(self._tombstones) > self.max_tombstones:
+                    self._tombstones.popitem(last=False)
+
+    def rebuild(self, records):
+        with self._lock:
+            self._reset()
+            for record in records:
+                record_id = record["id"]
+                for order, key_func in self.sort_keys.items():
+                    key = key_func(record)
+                    self._keys[order].append(key)
+                    self._key_of[order][record_id] = key
+            for keys in self._keys.values():
+                keys.sort()
+
+    def attach(self, catalog):
+        """
+        挂到 ToolCatalog 上，随目录变更增量更新
+        """
+        def listener(action, record, previous):
+            if action == "reset":
+                self.rebuild(catalog.iter_records())
+            elif action == "delete":
+                self.remove(previous["id"])
+            else:
+                self.add(record)
+
+        catalog.add_listener(listener)
+        if catalog.loaded:
+            self.rebuild(catalog.iter_records())
+        return self
+
+    def _cursor_key(self, order, record_id):
+        key = self._key_of[order].get(record_id)
+        if key is None:
+            key = self._tombstones.get(record_id, {}).get(order)
+        return key
+
+    def page(self, order, after=None, limit=50):
+        """
+        返回 (本页记录id列表, 下一页游标, 总条数)；游标为本页最后一条记录的id，
+        没有下一页时为 None。after 未知时抛出 UnknownCursorError
+        """
+        with self._lock:
+            keys = self._keys[order]
+            start = 0
+            if after:
+                key = self._cursor_key(order, after)
+                if key is None:
+                    raise UnknownCursorError(after)
+                start = bisect.bisect_right(keys, key)
+            ids = [key[-1] for key in keys[start:start + limit]]
+            more = start + limit < len(keys)
+            return ids, (ids[-1] if ids and more else None), len(keys)
+
+    def order(self, ids, order):
+        """
+        按预先算好的排序键给一组id排序，不需要物化记录
+        """
+        with self._lock:
+            key_of = self._key_of[order]
+            present = [record_id for record_id in ids if record_id in key_of]
+            present.sort(key=key_of.__getitem__)
+            return present
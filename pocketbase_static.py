@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+主页静态资源 - 启动时读入内存、预压缩，以带内容指纹的URL提供并长期缓存
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from pocketbase_cache import EncodedBody
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_PREFIX = "/static/"
+
+CONTENT_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".html": "text/html; charset=utf-8",
+    ".svg": "image/svg+xml",
+    ".json": "application/json; charset=utf-8"
+}
+
+# 带指纹的资源内容永不变化，浏览器在有效期内无需重新验证
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+TEMPLATE_PLACEHOLDER = re.compile(r"\{([\w.-]+)\}")
+
+
+def content_type_for(name):
+    extension = os.path.splitext(name)[1].lower()
+    if extension in CONTENT_TYPES:
+        return CONTENT_TYPES[extension]
+    return mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def memory_file(data):
+    """
+    把字节放进匿名内存文件，供 socket.sendfile 零拷贝发送；平台不支持时返回 None
+    """
+    if not hasattr(os, "memfd_create"):
+        return None
+    try:
+        fd = os.memfd_create("pb-static", getattr(os, "MFD_CLOEXEC", 0))
+    except OSError:
+        return None
+    handle = os.fdopen(fd, "w+b")
+    handle.write(data)
+    handle.flush()
+    return handle
+
+
+class StaticAsset(EncodedBody):
+    """
+    内存中的静态资源: 原始字节与预压缩版本、强ETag，以及各版本对应的内存文件
+
+    sendfile=False 时不创建内存文件（频繁重新生成的小页面不值得占用文件描述符）
+    """
+
+    __slots__ = ("name", "content_type", "digest", "etag", "files")
+
+    def __init__(self, name, body, content_type=None, sendfile=True):
+        super().__init__(body)
+        self.name = name
+        self.content_type = content_type or content_type_for(name)
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = f'"{self.digest}"'
+        self.files = {}
+        if sendfile:
+            self.files[None] = memory_file(body)
+            for encoding, data in self.variants.items():
+                self.files[encoding] = memory_file(data)
+
+    @property
+    def fingerprinted_name(self):
+        stem, extension = os.path.splitext(self.name)
+        return f"{stem}.{self.digest[:12]}{extension}"
+
+    def etag_for(self, encoding=None):
+        if not encoding:
+            return self.etag
+        return f'"{self.digest}-{encoding}"'
+
+    def not_modified(self, if_none_match):
+        """
+        If-None-Match 弱比较；任一编码表示的ETag都算匹配
+        """
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        if "*" in tags:
+            return True
+        return any(self.etag_for(encoding) in tags for encoding in (None,) + tuple(self.variants))
+
+    def close(self):
+        for handle in self.files.values():
+            if handle is not None:
+                handle.close()
+
+
+class StaticAssets:
+    """
+    目录下全部静态资源，按 /static/<名称>.<指纹>.<扩展名> 提供
+
+    资源只在启动时读取一次；修改文件后重启即得到新的指纹URL，旧URL随之失效。
+    """
+
+    def __init__(self, directory=STATIC_DIR, prefix=STATIC_PREFIX):
+        self.directory = directory
+        self.prefix = prefix
+        self._by_name = {}
+        self._by_path = {}
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    with open(path, "rb") as handle:
+                        self.add(StaticAsset(name, handle.read()))
+
+    def add(self, asset):
+        self._by_name[asset.name] = asset
+        self._by_path[self.prefix + asset.fingerprinted_name] = asset
+        return asset
+
+    def url(self, name):
+        return self.prefix + self._by_name[name].fingerprinted_name
+
+    def lookup(self, path):
+        """
+        按请求路径查找资源；指纹不匹配（旧版本或伪造的URL）时返回 None
+        """
+        return self._by_path.get(path)
+
+    def render_template(self, text):
+        """
+        把模板中的 {资源文件名} 替换为带指纹的URL，其他花括号原样保留
+        """
+        def replace(match):
+            name = match.group(1)
+            return self.url(name) if name in self._by_name else match.group(0)
+        return TEMPLATE_PLACEHOLDER.sub(replace, text)
+
+    def __len__(self):
+        return len(self._by_name)
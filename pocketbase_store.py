@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+AI工具记录的列式存储 - 类别/标签/语言驻留为小整数，评分与布尔值放在类型化数组中
+
+每条记录是一个行号；字符串字段放在按行号索引的列表里，时间戳放在定长字节数组里。
+不符合 ai_tools 记录结构的记录原样保存为字典，行为不变，只是不省内存。
+"""
+
+import json
+import math
+from array import array
+from json.encoder import encode_basestring
+
+
+# PocketBase时间戳 "2024-01-01 00:00:00.000Z" 的定长字节数
+TIMESTAMP_WIDTH = 24
+
+# 列式存储要求的字段集合，以及物化字典与渲染JSON时的字段顺序
+TOOL_COLUMNS = (
+    "id", "collectionId", "collectionName", "created", "updated",
+    "name", "description", "url", "category", "rating",
+    "is_free", "is_featured", "language_support", "tags"
+)
+TOOL_COLUMN_SET = frozenset(TOOL_COLUMNS)
+
+# flags 列的位
+FLAG_FREE = 1
+FLAG_FEATURED = 2
+FLAG_RATING_INT = 4
+
+
+def json_fragment(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def parse_fields(text):
+    """
+    解析PocketBase风格的 fields 参数，如 "id,name,url"：去掉重复字段，按 TOOL_COLUMNS 的顺序
+    返回元组，相同的字段集合总得到相同的结果；参数为空时返回 None（全部字段），
+    含未知字段时抛出 ValueError
+    """
+    wanted = {part.strip() for part in str(text or "").split(",") if part.strip()}
+    if not wanted:
+        return None
+    unknown = wanted - TOOL_COLUMN_SET
+    if unknown:
+        raise ValueError(f"未知的字段: {','.join(sorted(unknown))}")
+    return tuple(field for field in TOOL_COLUMNS if field in wanted)
+
+
+def project(record, fields):
+    """
+    只保留 fields 中的字段；fields 为 None 时原样返回
+    """
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def collection_fragment(collection):
+    collection_id, collection_name = collection
+    return f'"collectionId":{json_fragment(collection_id)},"collectionName":{json_fragment(collection_name)}'
+
+
+class Interner:
+    """
+    值 <-> 小整数id 的双向映射；id 只增不减
+    """
+
+    __slots__ = ("values", "_ids", "fragments", "_encode")
+
+    def __init__(self, encode=json_fragment):
+        self.values = []
+        self._ids = {}
+        # 每个值预先编码好的JSON片段，渲染时直接拼接
+        self.fragments = []
+        self._encode = encode
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self._ids[value] = value_id
+            self.values.append(value)
+            self.fragments.append(self._encode(value))
+        return value_id
+
+    def find(self, value):
+        return self._ids.get(value)
+
+
+def is_timestamp(value):
+    return isinstance(value, str) and len(value) == TIMESTAMP_WIDTH and value.isascii()
+
+
+class ToolStore:
+    """
+    按行号存放工具记录的列式存储
+
+    tags / language_support 整个字符串驻留为"标签组"id，每行只存一个整数；新出现的
+    标签组再按 "," 拆分，每个标签驻留为id，tag_set_words[标签组id] 为其标签id元组。
+    """
+
+    def __init__(self):
+        self.categories = Interner()
+        self.tags = Interner()
+        self.languages = Interner()
+        self.tag_sets = Interner()
+        self.language_sets = Interner()
+        self.tag_set_words = []
+        self.language_set_words = []
+        self.collections = Interner(collection_fragment)
+        self.clear()
+
+    def clear(self):
+        self.ids = []
+        self.names = []
+        self.descriptions = []
+        self.urls = []
+        self.timestamps = bytearray()
+        self.category_col = array("I")
+        self.collection_col = array("I")
+        self.tag_set_col = array("I")
+        self.language_set_col = array("I")
+        self.ratings = array("d")
+        self.flags = bytearray()
+        # 不符合列式结构的行: 行号 -> 原始字典
+        self.raw = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _intern_set(self, value, words, sets, set_words):
+        set_id = sets.intern(value)
+        if set_id == len(set_words):
+            set_words.append(tuple(words.intern(word) for word in value.split(",") if word))
+        return set_id
+
+    def _fits(self, record):
+        if record.keys() != TOOL_COLUMN_SET:
+            return False
+        rating = record["rating"]
+        return (
+            is_timestamp(record["created"]) and is_timestamp(record["updated"])
+            and isinstance(rating, (int, float)) and not isinstance(rating, bool) and math.isfinite(rating)
+            and isinstance(record["is_free"], bool) and isinstance(record["is_featured"], bool)
+            and all(isinstance(record[field], str) for field in (
+                "id", "collectionId", "collectionName", "name", "description", "url",
+                "category", "language_support", "tags"))
+        )
+
+    def _grow(self):
+        self.ids.append(None)
+        self.names.append(None)
+        self.descriptions.append(None)
+        self.urls.append(None)
+        self.timestamps.extend(b" " * (2 * TIMESTAMP_WIDTH))
+        self.category_col.append(0)
+        self.collection_col.append(0)
+        self.tag_set_col.append(0)
+        self.language_set_col.append(0)
+        self.ratings.append(0.0)
+        self.flags.append(0)
+        return len(self.ids) - 1
+
+    def append(self, record):
+        row = self._grow()
+        self.set(row, record)
+        return row
+
+    def set(self, row, record):
+        """
+        把记录写入指定行（覆盖原有内容）
+        """
+        self.ids[row] = record["id"]
+        if not self._fits(record):
+            self.raw[row] = dict(record)
+            return
+        self.raw.pop(row, None)
+        self.names[row] = record["name"]
+        self.descriptions[row] = record["description"]
+        self.urls[row] = record["url"]
+        start = row * 2 * TIMESTAMP_WIDTH
+        self.timestamps[start:start + 2 * TIMESTAMP_WIDTH] = (record["created"] + record["updated"]).encode("ascii")
+        self.category_col[row] = self.categories.intern(record["category"])
+        self.collection_col[row] = self.collections.intern((record["collectionId"], record["collectionName"]))
+        self.tag_set_col[row] = self._intern_set(record["tags"], self.tags, self.tag_sets, self.tag_set_words)
+        self.language_set_col[row] = self._intern_set(
+            record["language_support"], self.languages, self.language_sets, self.language_set_words)
+        rating = record["rating"]
+        self.ratings[row] = rating
+        self.flags[row] = (
+            (FLAG_FREE if record["is_free"] else 0)
+            | (FLAG_FEATURED if record["is_featured"] else 0)
+            | (FLAG_RATING_INT if isinstance(rating, int) else 0)
+        )
+
+    def delete(self, row):
+        self.ids[row] = None
+        self.names[row] = self.descriptions[row] = self.urls[row] = None
+        self.raw.pop(row, None)
+
+    def rows(self):
+        """
+        按行号顺序产出仍存在的行
+        """
+        return (row for row, record_id in enumerate(self.ids) if record_id is not None)
+
+    def updated(self, row):
+        raw = self.raw.get(row)
+        if raw is not None:
+            return raw.get("updated") or ""
+        start = row * 2 * TIMESTAMP_WIDTH + TIMESTAMP_WIDTH
+        return self.timestamps[start:start + TIMESTAMP_WIDTH].decode("ascii")
+
+    def latest_updated(self, rows):
+        """
+        给定行中最新的 updated 时间（时间戳等宽，按字节比较即可）
+        """
+        latest = b""
+        stamps = self.timestamps
+        for row in rows:
+            raw = self.raw.get(row)
+            if raw is not None:
+                value = (raw.get("updated") or "").encode("utf-8")
+            else:
+                start = row * 2 * TIMESTAMP_WIDTH + TIMESTAMP_WIDTH
+                value = stamps[start:start + TIMESTAMP_WIDTH]
+            if value > latest:
+                latest = value
+        return latest.decode("utf-8")
+
+    def category_of(self, row):
+        raw = self.raw.get(row)
+        if raw is not None:
+            return raw.get("category")
+        return self.categories.values[self.category_col[row]]
+
+    def get(self, row):
+        """
+        把一行物化为与PocketBase返回格式相同的字典（每次返回新字典）
+        """
+        if self.ids[row] is None:
+            return None
+        raw = self.raw.get(row)
+        if raw is not None:
+            return dict(raw)
+        start = row * 2 * TIMESTAMP_WIDTH
+        stamps = self.timestamps[start:start + 2 * TIMESTAMP_WIDTH].decode("ascii")
+        collection_id, collection_name = self.collections.values[self.collection_col[row]]
+        flags = self.flags[row]
+        rating = self.ratings[row]
+        return {
+            "id": self.ids[row],
+            "collectionId": collection_id,
+            "collectionName": collection_name,
+            "created": stamps[:TIMESTAMP_WIDTH],
+            "updated": stamps[TIMESTAMP_WIDTH:],
+            "name": self.names[row],
+            "description": self.descriptions[row],
+            "url": self.urls[row],
+            "category": self.categories.values[self.category_col[row]],
+            "rating": int(rating) if flags & FLAG_RATING_INT else rating,
+            "is_free": bool(flags & FLAG_FREE),
+            "is_featured": bool(flags & FLAG_FEATURED),
+            "language_support": self.language_sets.values[self.language_set_col[row]],
+            "tags": self.tag_sets.values[self.tag_set_col[row]]
+        }
+
+    def render(self, row):
+        """
+        直接由列数据拼出一行的紧凑JSON文本，与 json.dumps(get(row), ensure_ascii=False,
+        separators=(",", ":")) 的结果相同
+        """
+        raw = self.raw.get(row)
+        if raw is not None:
+            return json.dumps(raw, ensure_ascii=False, separators=(",", ":"))
+        start = row * 2 * TIMESTAMP_WIDTH
+        stamps = self.timestamps[start:start + 2 * TIMESTAMP_WIDTH].decode("ascii")
+        flags = self.flags[row]
+        rating = self.ratings[row]
+        return "".join((
+            '{"id":', encode_basestring(self.ids[row]),
+            ',', self.collections.fragments[self.collection_col[row]],
+            ',"created":"', stamps[:TIMESTAMP_WIDTH],
+            '","updated":"', stamps[TIMESTAMP_WIDTH:],
+            '","name":', encode_basestring(self.names[row]),
+            ',"description":', encode_basestring(self.descriptions[row]),
+            ',"url":', encode_basestring(self.urls[row]),
+            ',"category":', self.categories.fragments[self.category_col[row]],
+            ',"rating":', str(int(rating)) if flags & FLAG_RATING_INT else float.__repr__(rating),
+            ',"is_free":', "true" if flags & FLAG_FREE else "false",
+            ',"is_featured":', "true" if flags & FLAG_FEATURED else "false",
+            ',"language_support":', self.language_sets.fragments[self.language_set_col[row]],
+            ',"tags":', self.tag_sets.fragments[self.tag_set_col[row]],
+            '}'
+        ))
+
+    def render_list(self, rows, fields=None):
+        """
+        渲染PocketBase列表接口格式的完整响应体(UTF-8字节)；fields 限定每条记录输出的字段
+        """
+        if fields is None:
+            items = [self.render(row) for row in rows]
+        else:
+            items = [json.dumps(project(self.get(row), fields), ensure_ascii=False, separators=(",", ":"))
+                     for row in rows]
+        count = len(items)
+        return (
+            f'{{"page":1,"perPage":{count},"totalItems":{count},"totalPages":1,"items":['
+            + ",".join(items) + "]}"
+        ).encode("utf-8")
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+多进程(pre-fork)运行 - 多个工作进程通过 SO_REUSEPORT 共享监听端口，由监督进程负责
+重启崩溃的进程并在 SIGTERM 时让它们处理完在途请求再退出
+
+目录只由监督进程从PocketBase同步，每条变更通过队列转发给各工作进程增量应用，
+工作进程不再各自访问PocketBase；整个目录只在进程启动与整表重载时传送一次。
+"""
+
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import threading
+import time
+
+
+# 启动后这么多秒内退出视为启动失败，重启间隔按指数退避
+RESTART_GRACE = 1.0
+MAX_RESTART_DELAY = 30.0
+
+
+def reuse_port_supported():
+    return hasattr(socket, "SO_REUSEPORT")
+
+
+def check_port(port, host=""):
+    """
+    以 SO_REUSEPORT 试绑定端口；端口被其他(未设置 SO_REUSEPORT 的)进程占用时抛出 OSError
+    """
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        probe.bind((host, port))
+    finally:
+        probe.close()
+
+
+class CatalogBroadcaster:
+    """
+    监督进程一侧: 把目录的每一条变更转发给所有工作进程
+
+    每个工作进程一个 multiprocessing 队列，在启动该进程前创建并作为参数传入。单条增删改只发送
+    这一条记录，工作进程增量应用（其搜索/分面/排序索引也只更新这一条）；只有整表重载和新进程
+    接入时才发送整个目录。监听器在持有目录锁的线程中按变更顺序放入消息。
+    """
+
+    def __init__(self, catalog, context=None):
+        self.catalog = catalog
+        # 与 PreforkSupervisor 一样以 spawn 方式启动进程，队列须来自同一种上下文
+        self.context = context or multiprocessing.get_context("spawn")
+        self._queues = {}
+        self.stats = {"events": 0, "resets": 0}
+        catalog.add_listener(self._on_change)
+
+    def open(self, index):
+        """
+        为(重新)启动的工作进程 index 创建新队列；目录已加载时先放入当前整个目录作为起点，
+        取目录与登记队列在同一次目录锁内完成，二者之间的变更不会遗漏
+        """
+        channel = self.context.Queue()
+
+        def register(records):
+            if records is not None:
+                channel.put(("reset", records))
+            self.close(index)
+            self._queues[index] = channel
+            return channel
+
+        return self.catalog.snapshot(register)
+
+    def close(self, index):
+        channel = self._queues.pop(index, None)
+        if channel is not None:
+            # 进程已退出，丢弃尚未读取的消息，不等待后台写线程
+            channel.cancel_join_thread()
+            channel.close()
+
+    def _on_change(self, action, record, previous):
+        if action == "reset":
+            message = ("reset", self.catalog.records())
+            self.stats["resets"] += 1
+        elif action == "delete":
+            message = ("delete", previous["id"])
+            self.stats["events"] += 1
+        else:
+            message = ("upsert", dict(record))
+            self.stats["events"] += 1
+        for channel in list(self._queues.values()):
+            channel.put(message)
+
+
+class CatalogFollower:
+    """
+    工作进程一侧: 按顺序把监督进程转发来的变更应用到本进程的内存目录
+    """
+
+    def __init__(self, catalog, queue, interval=0.5):
+        self.catalog = catalog
+        self.queue = queue
+        self.interval = interval
+        self._stop = threading.Event()
+        self._loaded = threading.Event()
+        self._thread = None
+        self.stats = {"events": 0, "resets": 0, "last_reset_records": 0, "last_reset_seconds": 0.0}
+
+    def apply(self, message):
+        action, payload = message
+        if action == "reset":
+            started = time.perf_counter()
+            self.catalog.replace_all(payload)
+            self.stats["resets"] += 1
+            self.stats["last_reset_records"] = len(payload)
+            self.stats["last_reset_seconds"] = round(time.perf_counter() - started, 4)
+            self._loaded.set()
+        elif action == "delete":
+            self.catalog.delete(payload)
+            self.stats["events"] += 1
+        else:
+            self.catalog.upsert(payload)
+            self.stats["events"] += 1
+
+    def start(self, wait=10.0):
+        """
+        启动后台线程；最多等待 wait 秒拿到第一份完整目录，工作进程开始接受连接时即可直接读内存
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pb-catalog-follower", daemon=True)
+            self._thread.start()
+        self._loaded.wait(wait)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                message = self.queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                # 监督进程已退出
+                return
+            try:
+                self.apply(message)
+            except Exception as e:
+                print(f"❌ 应用目录变更异常: {str(e)}")
+
+
+def drain_on_signals(server, signals=(signal.SIGTERM, signal.SIGINT)):
+    """
+    工作进程收到信号后停止 accept；serve_forever 返回后由调用方关闭服务器并处理完在途请求
+    """
+    def handle(signum, frame):
+        # shutdown() 会等待 serve_forever 退出，不能在运行 serve_forever 的主线程中直接调用
+        threading.Thread(target=server.shutdown, name="pb-drain", daemon=True).start()
+
+    for signum in signals:
+        signal.signal(signum, handle)
+
+
+class PreforkSupervisor:
+    """
+    启动并看护 processes 个工作进程，每个进程执行 target(序号, *args)；传入 broadcaster 时
+    每次启动都为该进程新开一个变更队列，作为最后一个参数传入
+
+    工作进程以 spawn 方式启动（监督进程中已有后台线程，fork 不安全）。意外退出的进程
+    被重新启动，启动后很快又退出时重启间隔按指数退避。收到 SIGTERM/SIGINT 后向所有
+    工作进程转发 SIGTERM，最多等待 drain_timeout 秒，仍未退出的强制结束。
+    """
+
+    def __init__(self, target, args=(), processes=None, drain_timeout=10.0, check_interval=0.5,
+                 broadcaster=None):
+        self.target = target
+        self.args = tuple(args)
+        self.processes = max(1, int(processes or os.cpu_count() or 1))
+        self.drain_timeout = drain_timeout
+        self.check_interval = check_interval
+        self._context = multiprocessing.get_context("spawn")
+        self.broadcaster = broadcaster
+        self._workers = [None] * self.processes
+        self._started_at = [0.0] * self.processes
+        self._restart_delay = [0.0] * self.processes
+        self._restart_at = [0.0] * self.processes
+        self._stopping = threading.Event()
+        self.stats = {"started": 0, "restarts": 0, "crashes": 0}
+
+    def _spawn(self, index):
+        args = (index,) + self.args
+        if self.broadcaster is not None:
+            args += (self.broadcaster.open(index),)
+        process = self._context.Process(target=self.target, args=args, name=f"pb-worker-{index}", daemon=False)
+        process.start()
+        self._workers[index] = process
+        self._started_at[index] = time.monotonic()
+        self.stats["started"] += 1
+        return process
+
+    def _reap(self):
+        """
+        重启已退出的工作进程
+        """
+        now = time.monotonic()
+        for index, process in enumerate(self._workers):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                process.join()
+                if self.broadcaster is not None:
+                    self.broadcaster.close(index)
+                self.stats["crashes"] += 1
+                lived = now - self._started_at[index]
+                if lived < RESTART_GRACE:
+                    delay = self._restart_delay[index]
+                    self._restart_delay[index] = min(MAX_RESTART_DELAY, delay * 2 if delay else 0.5)
+                else:
+                    self._restart_delay[index] = 0.0
+                self._restart_at[index] = now + self._restart_delay[index]
+                print(f"⚠️ 工作进程 {index} (pid {process.pid}) 退出，退出码 {process.exitcode}，"
+                      f"{self._restart_delay[index]:.1f}s 后重启")
+                self._workers[index] = None
+            if now >= self._restart_at[index]:
+                self._spawn(index)
+                self.stats["restarts"] += 1
+
+    def request_stop(self, signum=None, frame=None):
+        self._stopping.set()
+
+    def run(self):
+        """
+        启动全部工作进程并看护，直到收到停止信号；返回时所有工作进程均已退出
+        """
+        previous = {signum: signal.signal(signum, self.request_stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for index in range(self.processes):
+                self._spawn(index)
+            print(f"👷 已启动 {self.processes} 个工作进程: {[process.pid for process in self._workers]}")
+            while not self._stopping.wait(self.check_interval):
+                self._reap()
+        finally:
+            self.stop()
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+    def stop(self):
+        """
+        让工作进程处理完在途请求后退出，超时的强制结束
+        """
+        self._stopping.set()
+        alive = [process for process in self._workers if process is not None and process.is_alive()]
+        for process in alive:
+            process.terminate()
+        deadline = time.monotonic() + self.drain_timeout
+        for process in alive:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"⚠️ 工作进程 pid {process.pid} 未在 {self.drain_timeout}s 内退出，强制结束")
+                process.kill()
+                process.join()
+        if self.broadcaster is not None:
+            for index in range(self.processes):
+                self.broadcaster.close(index)
+        self._workers = [None] * self.processes
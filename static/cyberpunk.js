@@ -0,0 +1,232 @@
+// 目录加载后，过滤与输入联想都在本地完成；不短于 SERVER_QUERY_MIN 个字符的查询在回车或
+// 停顿 SEARCH_PAUSE_MS 后才请求服务器的完整搜索。目录加载前输入停顿 SUGGEST_DEBOUNCE_MS 请求轻量的输入联想
+const SERVER_QUERY_MIN = 3;
+const SUGGEST_DEBOUNCE_MS = 250;
+const SEARCH_PAUSE_MS = 1000;
+const SUGGEST_LIMIT = 8;
+const RENDER_BATCH = 60;
+// 卡片渲染、水合与本地过滤只用到这些字段，其余字段不必下载
+const TOOL_FIELDS = 'id,name,description,url,category,tags';
+
+const toolsContainer = document.getElementById('cyberToolsGrid');
+const statusElement = document.getElementById('cyberStatus');
+const searchInput = document.getElementById('cyberSearchInput');
+const suggestionList = document.getElementById('cyberSuggestions');
+
+let allTools = [];
+// 服务端已渲染的前N张卡片（见 HomepageRenderer），目录加载后只补齐其余卡片
+let serverRendered = parseInt(toolsContainer.dataset.rendered || '0', 10);
+let suggestTimer = null;
+let searchTimer = null;
+let searchController = null;
+let renderGeneration = 0;
+
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function createToolCard(tool) {
+    const toolCard = document.createElement('div');
+    toolCard.className = 'cyber-tool-card';
+    toolCard.dataset.id = tool.id || '';
+    toolCard.innerHTML = `
+        <span class="cyber-tool-category">${escapeHtml((tool.category || '').replace('_', ' ').toUpperCase())}</span>
+        <h3 class="cyber-tool-title">${escapeHtml(tool.name)}</h3>
+        <p class="cyber-tool-description">${escapeHtml(tool.description)}</p>
+        <div class="cyber-tool-actions">
+            <a href="${escapeHtml(tool.url)}" target="_blank" rel="noopener" class="cyber-tool-link">访问网站</a>
+        </div>
+    `;
+    return toolCard;
+}
+
+// 分批渲染卡片，每帧最多 RENDER_BATCH 张；新的渲染开始后旧的渲染自动停止。
+// start > 0 时保留已有的前 start 张卡片，只追加其余部分
+function renderTools(items, statusText, start = 0) {
+    const generation = ++renderGeneration;
+    serverRendered = 0;
+    statusElement.textContent = statusText;
+    if (start === 0) {
+        toolsContainer.innerHTML = '';
+    }
+    if (items.length === 0) {
+        toolsContainer.innerHTML = '<div class="cyber-status">未找到匹配的工具</div>';
+        return;
+    }
+    let index = start;
+    function renderBatch() {
+        if (generation !== renderGeneration) {
+            return;
+        }
+        const fragment = document.createDocumentFragment();
+        const end = Math.min(index + RENDER_BATCH, items.length);
+        for (; index < end; index++) {
+            fragment.appendChild(createToolCard(items[index]));
+        }
+        toolsContainer.appendChild(fragment);
+        if (index < items.length) {
+            requestAnimationFrame(renderBatch);
+        }
+    }
+    renderBatch();
+}
+
+// 加载工具数据
+async function loadTools() {
+    try {
+        const response = await fetch(`/api/tools?fields=${TOOL_FIELDS}`);
+        const data = await response.json();
+        allTools = (data && data.items) || [];
+        if (searchInput.value.trim()) {
+            // 目录加载期间用户已开始输入，按当前输入重新过滤
+            handleSearchInput();
+        } else if (allTools.length > 0) {
+            renderTools(allTools, `共加载 ${allTools.length} 个AI工具`, hydratedCount());
+        } else {
+            statusElement.textContent = '暂无工具数据';
+        }
+    } catch (error) {
+        console.error('加载工具数据失败:', error);
+        statusElement.textContent = '加载失败: ' + error.message;
+    }
+}
+
+// 服务端渲染的卡片与目录开头的记录一致时可直接保留，否则整体重新渲染
+function hydratedCount() {
+    if (!serverRendered || allTools.length < serverRendered) {
+        return 0;
+    }
+    const cards = toolsContainer.querySelectorAll('.cyber-tool-card');
+    if (cards.length !== serverRendered) {
+        return 0;
+    }
+    for (let i = 0; i < cards.length; i++) {
+        if (cards[i].dataset.id !== allTools[i].id) {
+            return 0;
+        }
+    }
+    return serverRendered;
+}
+
+function filterLocal(query) {
+    const needle = query.toLowerCase();
+    return allTools.filter(tool =>
+        (tool.name || '').toLowerCase().includes(needle) ||
+        (tool.description || '').toLowerCase().includes(needle) ||
+        (tool.tags || '').toLowerCase().includes(needle)
+    );
+}
+
+function cancelSearch() {
+    clearTimeout(suggestTimer);
+    clearTimeout(searchTimer);
+    if (searchController) {
+        searchController.abort();
+        searchController = null;
+    }
+}
+
+// 同一次输入的联想与搜索请求共用一个 AbortController，新输入会中止尚未返回的请求；
+// 被限流(429)或服务器暂不可用(503)时 onResult 收到 null，保留本地过滤的结果
+async function fetchForInput(url, onResult) {
+    if (!searchController) {
+        searchController = new AbortController();
+    }
+    const controller = searchController;
+    try {
+        const response = await fetch(url, { signal: controller.signal });
+        const data = response.ok ? await response.json() : null;
+        if (controller === searchController) {
+            onResult(data);
+        }
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('请求失败:', error);
+        }
+    }
+}
+
+function showSuggestions(items) {
+    suggestionList.innerHTML = items
+        .map(item => `<option value="${escapeHtml(item.name)}"></option>`)
+        .join('');
+}
+
+// 目录已在本地时直接从中取联想：名称以输入开头的排在前面，不再请求 /api/suggest
+function suggestLocal(query) {
+    const needle = query.toLowerCase();
+    const prefix = [];
+    const contains = [];
+    for (const tool of allTools) {
+        const name = (tool.name || '').toLowerCase();
+        if (name.startsWith(needle)) {
+            prefix.push(tool);
+        } else if (name.includes(needle)) {
+            contains.push(tool);
+        }
+        if (prefix.length >= SUGGEST_LIMIT) {
+            break;
+        }
+    }
+    showSuggestions(prefix.concat(contains).slice(0, SUGGEST_LIMIT));
+}
+
+function suggestServer(query) {
+    return fetchForInput(`/api/suggest?q=${encodeURIComponent(query)}&limit=${SUGGEST_LIMIT}`, suggestions => {
+        showSuggestions((suggestions && suggestions.items) || []);
+    });
+}
+
+function searchServer(query) {
+    clearTimeout(searchTimer);
+    return fetchForInput(`/api/search/${encodeURIComponent(query)}`, results => {
+        if (results) {
+            const items = results.items || [];
+            renderTools(items, items.length > 0 ? `搜索到 ${items.length} 个结果` : '未找到匹配的工具');
+        }
+    });
+}
+
+function handleSearchInput() {
+    const query = searchInput.value.trim();
+    cancelSearch();
+    if (query.length === 0) {
+        // 搜索框清空时显示已加载的全部工具
+        suggestionList.innerHTML = '';
+        renderTools(allTools, `共加载 ${allTools.length} 个AI工具`);
+        return;
+    }
+    if (allTools.length > 0) {
+        // 先用本地目录即时给出结果与联想，较长的查询再在停顿后交给服务器的相关度排序
+        const items = filterLocal(query);
+        renderTools(items, items.length > 0 ? `匹配到 ${items.length} 个工具` : '未找到匹配的工具');
+        suggestLocal(query);
+        if (query.length >= SERVER_QUERY_MIN) {
+            searchTimer = setTimeout(() => searchServer(query), SEARCH_PAUSE_MS);
+        }
+        return;
+    }
+    // 目录尚未加载: 联想与搜索都只能交给服务器
+    suggestTimer = setTimeout(() => suggestServer(query), SUGGEST_DEBOUNCE_MS);
+    searchTimer = setTimeout(() => searchServer(query), SEARCH_PAUSE_MS);
+}
+
+// 回车立即做完整搜索，不再等待停顿
+function handleSearchKey(event) {
+    const query = searchInput.value.trim();
+    if (event.key === 'Enter' && query.length > 0) {
+        event.preventDefault();
+        searchServer(query);
+    }
+}
+
+// 搜索功能
+searchInput.addEventListener('input', handleSearchInput);
+searchInput.addEventListener('keydown', handleSearchKey);
+
+// 页面加载完成后获取工具数据
+document.addEventListener('DOMContentLoaded', () => {
+    loadTools();
+});
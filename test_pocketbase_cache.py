@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+响应缓存与请求合并的测试: python -m unittest test_pocketbase_cache
+"""
+
+import threading
+import unittest
+
+from pocketbase_cache import CACHE_HIT, CACHE_MISS, ResponseCache
+from pocketbase_singleflight import SingleFlight
+
+
+class InvalidateDuringLoadTest(unittest.TestCase):
+    """
+    失效发生在一次加载进行期间: 失效前开始的加载结果不能被缓存，失效后到达的请求也不能与它合并
+    """
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.cache = ResponseCache(ttl=60.0, single_flight=self.single_flight)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.version = "old"
+        self.loads = 0
+
+    def loader(self):
+        self.loads += 1
+        value = self.version
+        if value == "old":
+            self.started.set()
+            self.release.wait(5)
+        return value
+
+    def start_first_request(self):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.cache.get_or_load("key", self.loader)))
+        thread.start()
+        self.assertTrue(self.started.wait(5))
+        return thread, results
+
+    def test_request_after_invalidate_does_not_join_old_load(self):
+        first, first_result = self.start_first_request()
+        self.version = "new"
+        self.cache.invalidate()
+
+        second = self.cache.get_or_load("key", self.loader)
+        self.release.set()
+        first.join(5)
+
+        self.assertEqual(second, ("new", CACHE_MISS))
+        self.assertEqual(first_result, [("old", CACHE_MISS)])
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.cache.get_or_load("key", self.loader), ("new", CACHE_HIT))
+
+    def test_load_started_before_invalidate_is_not_stored(self):
+        first, first_result = self.start_first_request()
+        self.cache.invalidate()
+        self.release.set()
+        first.join(5)
+
+        self.assertEqual(first_result, [("old", CACHE_MISS)])
+        self.assertEqual(self.cache.stats()["discarded"], 1)
+        self.version = "new"
+        self.assertEqual(self.cache.get_or_load("key", self.loader), ("new", CACHE_MISS))
+
+    def test_concurrent_misses_share_one_load(self):
+        first, first_result = self.start_first_request()
+        waiter_result = []
+        waiter = threading.Thread(target=lambda: waiter_result.append(self.cache.get_or_load("key", self.loader)))
+        waiter.start()
+        while self.single_flight.stats()["merged"] < 1:
+            threading.Event().wait(0.001)
+        self.release.set()
+        first.join(5)
+        waiter.join(5)
+
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(waiter_result, [("old", CACHE_MISS)])
+        self.assertEqual(self.cache.get_or_load("key", self.loader), ("old", CACHE_HIT))
+
+
+if __name__ == "__main__":
+    unittest.main()
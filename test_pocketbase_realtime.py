@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+实时订阅的测试: 连接本地PocketBase替身(pocketbase_benchmark.FakePocketBase)的SSE流，
+验证增删改事件修补内存目录并使响应缓存失效，以及断线重连后的增量同步
+
+运行: python -m unittest test_pocketbase_realtime
+"""
+
+import os
+import time
+import unittest
+from unittest import mock
+
+from pocketbase_benchmark import FakePocketBase, make_tool
+from pocketbase_cache import CACHE_HIT, CACHE_MISS
+from pocketbase_catalog import RealtimeSubscriber
+from pocketbase_integration import PocketBaseCyberpunkServer
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class RealtimeSubscriberTest(unittest.TestCase):
+
+    def setUp(self):
+        environ = mock.patch.dict(os.environ, {"PB_SNAPSHOT_PATH": "", "PB_ACCESS_LOG": "off"})
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.fake = FakePocketBase(catalog_size=20)
+        self.fake_server = self.fake.serve()
+        self.addCleanup(self.fake_server.shutdown)
+        self.pb_client = PocketBaseCyberpunkServer(f"http://127.0.0.1:{self.fake_server.server_address[1]}")
+        self.addCleanup(self.pb_client.http.close)
+        self.catalog = self.pb_client.catalog
+        self.realtime = RealtimeSubscriber(self.pb_client, self.catalog, min_backoff=0.05, max_backoff=0.2).start()
+        self.addCleanup(self.stop_realtime)
+        self.assertTrue(wait_until(lambda: self.realtime.stats["connects"] == 1
+                                   and self.realtime.stats["resyncs"] == 1))
+
+    def stop_realtime(self):
+        self.realtime.stop()
+        # 让阻塞在流读取上的订阅线程醒来并退出
+        self.fake.drop_realtime_clients()
+
+    def prime_cache(self):
+        cache = self.pb_client.response_cache
+        self.assertEqual(cache.get_or_load(("tools",), lambda: "cached"), ("cached", CACHE_MISS))
+        self.assertEqual(cache.get_or_load(("tools",), lambda: "reloaded"), ("cached", CACHE_HIT))
+
+    def assert_cache_invalidated(self):
+        self.assertEqual(self.pb_client.response_cache.stats()["entries"], 0)
+
+    def test_initial_connect_loads_full_catalog(self):
+        self.assertTrue(self.catalog.loaded)
+        self.assertEqual(self.realtime.stats["resyncs"], 1)
+        self.assertEqual(self.realtime.stats["delta_syncs"], 0)
+        self.assertEqual(self.catalog.get("tool00000000003")["name"], "Tool 3")
+
+    def test_create_update_delete_events_patch_catalog(self):
+        self.prime_cache()
+        record = self.fake.create_record({"name": "New Tool", "description": "d", "category": "text_gen",
+                                          "url": "https://example.com/new"})
+        self.assertTrue(wait_until(lambda: self.catalog.get(record["id"]) is not None))
+        self.assertEqual(len(self.catalog), 21)
+        self.assert_cache_invalidated()
+
+        self.prime_cache()
+        self.fake.update_record(record["id"], {"name": "Renamed Tool"})
+        self.assertTrue(wait_until(lambda: self.catalog.get(record["id"])["name"] == "Renamed Tool"))
+        self.assert_cache_invalidated()
+
+        self.prime_cache()
+        self.fake.delete_record(record["id"])
+        self.assertTrue(wait_until(lambda: self.catalog.get(record["id"]) is None))
+        self.assertEqual(len(self.catalog), 20)
+        self.assert_cache_invalidated()
+        self.assertEqual(self.realtime.stats["events"], 3)
+
+    def test_reconnect_runs_delta_sync(self):
+        # 断线期间的变更不发布事件，只能靠重连后的增量同步补上
+        with self.fake.lock:
+            changed = self.fake.tools[5]
+            changed.update(name="Changed Offline", updated=self.fake._now())
+            removed = self.fake.tools.pop(6)
+            added = dict(make_tool(100), updated=self.fake._now())
+            self.fake.tools.append(added)
+        self.prime_cache()
+        self.fake.drop_realtime_clients()
+
+        self.assertTrue(wait_until(lambda: self.realtime.stats["connects"] == 2
+                                   and self.realtime.stats["delta_syncs"] == 1))
+        self.assertEqual(self.realtime.stats["resyncs"], 1)
+        self.assertEqual(self.catalog.get(changed["id"])["name"], "Changed Offline")
+        self.assertIsNone(self.catalog.get(removed["id"]))
+        self.assertIsNotNone(self.catalog.get(added["id"]))
+        self.assertEqual(len(self.catalog), 20)
+        self.assert_cache_invalidated()
+
+        # 重连后的订阅继续修补目录
+        self.fake.update_record(changed["id"], {"name": "Changed Online"})
+        self.assertTrue(wait_until(lambda: self.catalog.get(changed["id"])["name"] == "Changed Online"))
+
+
+if __name__ == "__main__":
+    unittest.main()